@@ -54,7 +54,7 @@ class ProductSitemap(I18nSitemap):
 class CategorySitemap(I18nSitemap):
 
     def items(self):
-        return Category.objects.all()
+        return Category.objects.with_full_slugs()
 
 
 language_neutral_sitemaps = {
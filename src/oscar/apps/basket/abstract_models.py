@@ -5,7 +5,7 @@ from operator import itemgetter
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Sum
 from django.utils.encoding import smart_str
 from django.utils.timezone import now
@@ -20,7 +20,10 @@ from oscar.templatetags.currency_filters import currency
 
 OfferApplications = get_class("offer.results", "OfferApplications")
 Unavailable = get_class("partner.availability", "Unavailable")
-LineDiscountRegistry = get_class("basket.utils", "LineDiscountRegistry")
+BasketPricing, BasketSummary, LineDiscountRegistry, OfferLine = get_classes(
+    "basket.utils",
+    ["BasketPricing", "BasketSummary", "LineDiscountRegistry", "OfferLine"],
+)
 OpenBasketManager, SavedBasketManager = get_classes(
     "basket.managers", ["OpenBasketManager", "SavedBasketManager"]
 )
@@ -95,8 +98,15 @@ class AbstractBasket(models.Model):
         # so we want to avoid reloading them as this would drop the discount
         # information.
         self._lines = None
+        self._range_product_ids = {}
+        self._offer_lines = None
+        self._pricing = None
         self.offer_applications = OfferApplications()
 
+        # The state of the last offer application, which is kept when offer
+        # applications are reset so offers can be re-applied incrementally.
+        self.offer_application_state = None
+
     def __str__(self):
         return _("%(status)s basket (owner: %(owner)s, lines: %(num_lines)d)") % {
             "status": self.status,
@@ -140,7 +150,7 @@ class AbstractBasket(models.Model):
             return self.lines.model.objects.none()  # pylint: disable=E1101
         if self._lines is None:
             self._lines = (
-                self.lines.select_related("product", "stockrecord")
+                self.lines.select_related("product", "stockrecord", "stock_reservation")
                 .prefetch_related("attributes", "product__images")
                 .order_by(self._meta.pk.name)
             )
@@ -221,6 +231,7 @@ class AbstractBasket(models.Model):
             raise PermissionDenied("A frozen basket cannot be flushed")
         self.lines.all().delete()
         self._lines = None
+        self._pricing = None
 
     # pylint: disable=unused-argument
     def get_stock_info(self, product, options):
@@ -249,30 +260,9 @@ class AbstractBasket(models.Model):
         if not self.id:
             self.save()
 
-        # Ensure that all lines are the same currency
-        price_currency = self.currency
         stock_info = self.get_stock_info(product, options)
-
-        if not stock_info.price.exists:
-            raise ValueError("Strategy hasn't found a price for product %s" % product)
-
-        if price_currency and stock_info.price.currency != price_currency:
-            raise ValueError(
-                (
-                    "Basket lines must all have the same currency. Proposed "
-                    "line has currency %s, while basket has currency %s"
-                )
-                % (stock_info.price.currency, price_currency)
-            )
-
-        if stock_info.stockrecord is None:
-            raise ValueError(
-                (
-                    "Basket lines must all have stock records. Strategy hasn't "
-                    "found any stock record for product %s"
-                )
-                % product
-            )
+        # Ensure that all lines are the same currency
+        self._check_stock_info(product, stock_info, self.currency)
 
         # Line reference is used to distinguish between variations of the same
         # product (eg T-shirts with different personalisations)
@@ -311,6 +301,207 @@ class AbstractBasket(models.Model):
     add_product.alters_data = True
     add = add_product
 
+    def _check_stock_info(self, product, stock_info, price_currency):
+        """
+        Check that a product can be added to the basket with the given stock
+        info, raising a ValueError if it can't.
+        """
+        if not stock_info.price.exists:
+            raise ValueError("Strategy hasn't found a price for product %s" % product)
+
+        if price_currency and stock_info.price.currency != price_currency:
+            raise ValueError(
+                (
+                    "Basket lines must all have the same currency. Proposed "
+                    "line has currency %s, while basket has currency %s"
+                )
+                % (stock_info.price.currency, price_currency)
+            )
+
+        if stock_info.stockrecord is None:
+            raise ValueError(
+                (
+                    "Basket lines must all have stock records. Strategy hasn't "
+                    "found any stock record for product %s"
+                )
+                % product
+            )
+
+    def get_stock_infos(self, products):
+        """
+        Hook for fetching the purchase info of several products at once,
+        returning a dict keyed by product id.
+
+        Like ``get_stock_info``, the built-in implementation ignores options.
+        When ``get_stock_info`` is overridden, it's called for each product
+        instead, without options.
+        """
+        if self._overrides_get_stock_info():
+            return {
+                product.id: self.get_stock_info(product, []) for product in products
+            }
+        return self.strategy.fetch_for_products(products)
+
+    def _overrides_get_stock_info(self):
+        return (
+            type(self).get_stock_info is not AbstractBasket.get_stock_info
+            and type(self).get_stock_infos is AbstractBasket.get_stock_infos
+        )
+
+    def add_products(self, items):
+        """
+        Add several products to the basket at once
+
+        The 'items' should be an iterable of (product, quantity, options)
+        tuples, where 'options' is a list of dicts as for ``add_product``, or
+        None. Products are validated, and lines created or updated, in a fixed
+        number of queries. Products that are passed more than once are added
+        to the same line, and lines whose quantity drops to zero are deleted.
+
+        Returns a list of (line, created) tuples, one per created or updated
+        line.
+        """
+        items = [
+            (product, quantity, options or []) for product, quantity, options in items
+        ]
+        if not items:
+            return []
+        if not self.id:
+            self.save()
+
+        additions = self._get_line_additions(items)
+        if not self.can_be_edited:
+            raise PermissionDenied(
+                _("You cannot modify a %s basket") % (self.status.lower(),)
+            )
+
+        with transaction.atomic():
+            results = self._save_line_additions(additions)
+
+        self.reset_offer_applications()
+        # Bulk updates don't send the signals the basket summary cache and
+        # stock reservations rely on.
+        if settings.OSCAR_BASKET_SUMMARY_CACHE_ENABLED:
+            BasketSummary.invalidate(self.id)
+        if settings.OSCAR_STOCK_RESERVATION_ENABLED:
+            for line, __ in results:
+                line.reserve_stock()
+        return results
+
+    add_products.alters_data = True
+
+    def _get_line_additions(self, items):
+        """
+        Validate the (product, quantity, options) items to add to the basket,
+        and combine those which end up on the same line.
+
+        Returns a dict of [product, quantity, options, stock info] lists,
+        keyed by line reference, in order.
+        """
+        stock_infos = self.get_stock_infos([product for product, __, __ in items])
+        price_currency = self.currency
+        additions = {}
+        for product, quantity, options in items:
+            if options and self._overrides_get_stock_info():
+                stock_info = self.get_stock_info(product, options)
+            else:
+                stock_info = stock_infos[product.id]
+            self._check_stock_info(product, stock_info, price_currency)
+            price_currency = price_currency or stock_info.price.currency
+            line_ref = self._create_line_reference(
+                product, stock_info.stockrecord, options
+            )
+            if line_ref in additions:
+                additions[line_ref][1] += quantity
+            else:
+                additions[line_ref] = [product, quantity, options, stock_info]
+        return additions
+
+    def _save_line_additions(self, additions):
+        """
+        Create and update the lines of the given additions, as returned by
+        ``_get_line_additions``. Lines whose quantity drops to zero are
+        deleted instead.
+
+        Returns a list of (line, created) tuples, one per saved line.
+        """
+        Line = self.lines.model
+        existing_lines = {
+            line.line_reference: line
+            for line in self.lines.filter(line_reference__in=additions.keys())
+        }
+        results, updated_lines, deleted_lines, new_lines = [], [], [], []
+        for line_ref, (product, quantity, options, stock_info) in additions.items():
+            line = existing_lines.get(line_ref)
+            if line is not None:
+                line.quantity += quantity
+                if line.quantity <= 0:
+                    deleted_lines.append(line.id)
+                    continue
+                line.date_updated = now()
+                updated_lines.append(line)
+                results.append((line, False))
+            elif quantity > 0:
+                line = self._build_line(line_ref, product, quantity, stock_info)
+                new_lines.append((line, options))
+                results.append((line, True))
+
+        if deleted_lines:
+            Line.objects.filter(id__in=deleted_lines).delete()
+        if updated_lines:
+            Line.objects.bulk_update(updated_lines, ["quantity", "date_updated"])
+        if new_lines:
+            self._bulk_create_lines(new_lines)
+        return results
+
+    def _build_line(self, line_ref, product, quantity, stock_info):
+        """
+        Return an unsaved line for the product, as created by ``add_product``
+        """
+        Line = self.lines.model
+        line = Line(
+            basket=self,
+            line_reference=line_ref,
+            product=product,
+            stockrecord=stock_info.stockrecord,
+            quantity=quantity,
+            price_excl_tax=stock_info.price.excl_tax,
+            price_currency=stock_info.price.currency,
+            tax_code=stock_info.price.tax_code,
+        )
+        if stock_info.price.is_tax_known:
+            line.price_incl_tax = stock_info.price.incl_tax
+        return line
+
+    def _bulk_create_lines(self, new_lines):
+        """
+        Create the given (line, options) pairs and the lines' attributes
+        """
+        Line = self.lines.model
+        LineAttribute = Line.attributes.rel.related_model
+        Line.objects.bulk_create([line for line, __ in new_lines])
+        if any(line.pk is None for line, __ in new_lines):
+            # The database can't return primary keys from bulk inserts
+            line_ids = dict(
+                self.lines.filter(
+                    line_reference__in=[line.line_reference for line, __ in new_lines]
+                ).values_list("line_reference", "id")
+            )
+            for line, __ in new_lines:
+                line.pk = line_ids[line.line_reference]
+                line._state.adding = False
+        LineAttribute.objects.bulk_create(
+            [
+                LineAttribute(
+                    line=line,
+                    option=option_dict["option"],
+                    value=option_dict["value"],
+                )
+                for line, options in new_lines
+                for option_dict in options
+            ]
+        )
+
     def applied_offers(self):
         """
         Return a dict of offers successfully applied to the basket.
@@ -326,6 +517,9 @@ class AbstractBasket(models.Model):
         """
         self.offer_applications = OfferApplications()
         self._lines = None
+        self._range_product_ids = {}
+        self._offer_lines = None
+        self._pricing = None
 
     def merge_line(self, line, add_quantities=True):
         """
@@ -350,6 +544,7 @@ class AbstractBasket(models.Model):
             line.delete()
         finally:
             self._lines = None
+            self._pricing = None
 
     merge_line.alters_data = True
 
@@ -360,21 +555,141 @@ class AbstractBasket(models.Model):
         :basket: The basket to merge into this one.
         :add_quantities: Whether to add line quantities when they are merged.
         """
-        # Use basket.lines.all instead of all_lines as this function is called
-        # before a strategy has been assigned.
-        for line_to_merge in basket.lines.all():
-            self.merge_line(line_to_merge, add_quantities)
-        basket.status = self.MERGED
-        basket.date_merged = now()
-        basket._lines = None
-        basket.save()
-        # Ensure all vouchers are moved to the new basket
-        for voucher in basket.vouchers.all():
-            basket.vouchers.remove(voucher)
-            self.vouchers.add(voucher)
+        self.merge_many([basket], add_quantities)
 
     merge.alters_data = True
 
+    def merge_many(self, baskets, add_quantities=True):
+        """
+        Merges other baskets with this one, in a fixed number of queries.
+
+        Lines are moved across in bulk, together with their attributes. Lines
+        with the same line reference as a line of this basket (or of a basket
+        merged before them) are combined with it. Vouchers are moved across
+        too, and the merged baskets are marked as merged.
+
+        :baskets: The baskets to merge into this one.
+        :add_quantities: Whether to add line quantities when they are merged.
+        """
+        baskets = [basket for basket in baskets if basket.id != self.id]
+        basket_ids = [basket.id for basket in baskets if basket.id is not None]
+        Line = self.lines.model
+        BasketVoucher = self.vouchers.through
+
+        with transaction.atomic():
+            lines, updated, moved, deleted = self._get_lines_to_merge(
+                basket_ids, add_quantities
+            )
+            if (moved or deleted) and not self.can_be_edited:
+                raise PermissionDenied(
+                    _("You cannot modify a %s basket") % (self.status.lower(),)
+                )
+            date_updated = now()
+            if deleted:
+                Line.objects.filter(id__in=deleted).delete()
+            if moved:
+                Line.objects.filter(id__in=moved).update(
+                    basket=self, date_updated=date_updated
+                )
+            if updated:
+                Line.objects.bulk_update(
+                    [
+                        Line(id=line_id, quantity=quantity, date_updated=date_updated)
+                        for line_id, quantity in lines.values()
+                        if line_id in updated
+                    ],
+                    ["quantity", "date_updated"],
+                )
+                # Bulk updates don't send the signal stock reservations are
+                # kept in sync by.
+                if settings.OSCAR_STOCK_RESERVATION_ENABLED:
+                    self._reserve_stock_for_lines(updated)
+
+            # Move vouchers across, unless this basket already has them
+            voucher_ids = (
+                BasketVoucher.objects.filter(basket_id__in=basket_ids)
+                .exclude(
+                    voucher_id__in=BasketVoucher.objects.filter(basket=self).values(
+                        "voucher_id"
+                    )
+                )
+                .values_list("voucher_id", flat=True)
+                .distinct()
+            )
+            BasketVoucher.objects.bulk_create(
+                [
+                    BasketVoucher(basket_id=self.id, voucher_id=voucher_id)
+                    for voucher_id in voucher_ids
+                ]
+            )
+            BasketVoucher.objects.filter(basket_id__in=basket_ids).delete()
+
+            date_merged = now()
+            type(self).objects.filter(id__in=basket_ids).update(
+                status=self.MERGED, date_merged=date_merged
+            )
+
+        for basket in baskets:
+            basket.status = self.MERGED
+            basket.date_merged = date_merged
+            basket._lines = None
+            basket._pricing = None
+        self._lines = None
+        self._pricing = None
+        # Bulk updates don't send the signals the basket summary cache relies
+        # on to be invalidated.
+        if settings.OSCAR_BASKET_SUMMARY_CACHE_ENABLED:
+            BasketSummary.invalidate(self.id)
+
+    merge_many.alters_data = True
+
+    def _get_lines_to_merge(self, basket_ids, add_quantities):
+        """
+        Work out how the lines of the given baskets are merged with this one.
+
+        Returns the merged line references, mapped to the id and quantity of
+        the line they end up on, together with the ids of the lines of this
+        basket to update and of the lines to move and to delete.
+        """
+        Line = self.lines.model
+        # Line references of this basket, mapped to the id and quantity of
+        # the line that lines with the same reference are combined with.
+        lines = {
+            reference: [line_id, quantity]
+            for line_id, reference, quantity in Line.objects.filter(
+                basket=self
+            ).values_list("id", "line_reference", "quantity")
+        }
+        updated, moved, deleted = set(), [], []
+        for line_id, reference, quantity in (
+            Line.objects.filter(basket_id__in=basket_ids)
+            .order_by("basket_id", "id")
+            .values_list("id", "line_reference", "quantity")
+        ):
+            if reference not in lines:
+                lines[reference] = [line_id, quantity]
+                moved.append(line_id)
+                continue
+            line = lines[reference]
+            if add_quantities:
+                line[1] += quantity
+            else:
+                line[1] = max(line[1], quantity)
+            updated.add(line[0])
+            deleted.append(line_id)
+
+        return lines, updated, moved, deleted
+
+    def _reserve_stock_for_lines(self, line_ids):
+        """
+        Update the stock reservations of the given lines of this basket
+        """
+        for line in self.lines.filter(id__in=line_ids).select_related(
+            "product__product_class", "product__parent__product_class"
+        ):
+            line.basket = self
+            line.reserve_stock()
+
     def freeze(self):
         """
         Freezes the basket so it cannot be modified.
@@ -454,6 +769,25 @@ class AbstractBasket(models.Model):
                     raise
         return total
 
+    def get_pricing(self):
+        """
+        Return a snapshot of the basket totals.
+
+        The snapshot is reused until the lines, their quantities or their
+        discounts change, so rendering several totals only walks the lines
+        once.
+        """
+        if self._pricing is None or self._pricing.is_stale(self):
+            self._pricing = BasketPricing(self)
+        return self._pricing
+
+    def _get_pricing_total(self, name):
+        # Projects overriding _get_total keep their totals, at the cost of
+        # walking the lines for each of them.
+        if type(self)._get_total is not AbstractBasket._get_total:
+            return self._get_total(BasketPricing.line_properties[name])
+        return self.get_pricing().get_total(name)
+
     # ==========
     # Properties
     # ==========
@@ -481,30 +815,30 @@ class AbstractBasket(models.Model):
         """
         Return total line price excluding tax
         """
-        return self._get_total("line_price_excl_tax_incl_discounts")
+        return self._get_pricing_total("total_excl_tax")
 
     @property
     def total_tax(self):
         """Return total tax for a line"""
-        return self._get_total("line_tax")
+        return self._get_pricing_total("total_tax")
 
     @property
     def total_incl_tax(self):
         """
         Return total price inclusive of tax and discounts
         """
-        return self._get_total("line_price_incl_tax_incl_discounts")
+        return self._get_pricing_total("total_incl_tax")
 
     @property
     def total_incl_tax_excl_discounts(self):
         """
         Return total price inclusive of tax but exclusive discounts
         """
-        return self._get_total("line_price_incl_tax")
+        return self._get_pricing_total("total_incl_tax_excl_discounts")
 
     @property
     def total_discount(self):
-        return self._get_total("discount_value")
+        return self._get_pricing_total("total_discount")
 
     @property
     def offer_discounts(self):
@@ -552,7 +886,7 @@ class AbstractBasket(models.Model):
         """
         Return total price excluding tax and discounts
         """
-        return self._get_total("line_price_excl_tax")
+        return self._get_pricing_total("total_excl_tax_excl_discounts")
 
     @property
     def num_lines(self):
@@ -631,6 +965,55 @@ class AbstractBasket(models.Model):
         else:
             return True
 
+    def get_offer_lines(self):
+        """
+        Return compact views of the basket lines for the offer engine.
+
+        The views are built once for the cached basket lines and rebuilt
+        whenever the lines are reloaded.
+        """
+        return self._get_offer_lines()[1]
+
+    def _get_offer_lines(self):
+        lines = self.all_lines()
+        if self._offer_lines is None or self._offer_lines[0] is not lines:
+            offer_lines = [OfferLine(line, self) for line in lines]
+            product_ids = frozenset(line.product_id for line in offer_lines)
+            self._offer_lines = (lines, offer_lines, product_ids)
+        return self._offer_lines
+
+    def get_range_product_ids(self, product_range):
+        """
+        Return the ids of the products in this basket that are contained in
+        the passed range.
+
+        The result is cached for the current set of basket products, so the
+        offer engine checks range membership once per range rather than once
+        per line for every offer.
+        """
+        product_ids = self._get_offer_lines()[2]
+        key = (product_range.pk, product_ids)
+        if key not in self._range_product_ids:
+            self._range_product_ids[key] = product_range.filter_products(product_ids)
+        return self._range_product_ids[key]
+
+    def reserved_quantity(self, stockrecord):
+        """
+        Return the quantity of a stockrecord that is reserved for the basket's
+        lines
+        """
+        if (
+            not settings.OSCAR_STOCK_RESERVATION_ENABLED
+            or self.id is None
+            or stockrecord is None
+        ):
+            return 0
+        return sum(
+            line.reserved_quantity
+            for line in self.all_lines()
+            if line.stockrecord_id == stockrecord.id
+        )
+
     def product_quantity(self, product):
         """
         Return the quantity of a product in the basket
@@ -760,8 +1143,19 @@ class AbstractLine(models.Model):
             raise PermissionDenied(
                 _("You cannot modify a %s basket") % (self.basket.status.lower(),)
             )
+        self.reset_basket_pricing()
         return super().save(*args, **kwargs)
 
+    def reset_basket_pricing(self):
+        """
+        Discard the totals memoised by the basket, e.g. when the quantity or
+        discounts of this line change.
+        """
+        # Lines loaded through their basket refer to it, other baskets can't
+        # have memoised this line.
+        if type(self).basket.is_cached(self):
+            self.basket._pricing = None
+
     # =============
     # Offer methods
     # =============
@@ -771,6 +1165,16 @@ class AbstractLine(models.Model):
         Remove any discounts from this line.
         """
         self.discounts = LineDiscountRegistry(self)
+        self.reset_basket_pricing()
+
+    def set_discounts(self, discounts):
+        """
+        Take over a discount registry, e.g. one from another instance of this
+        line.
+        """
+        discounts._line = self
+        self.discounts = discounts
+        self.reset_basket_pricing()
 
     def discount(self, discount_value, affected_quantity, incl_tax=True, offer=None):
         """
@@ -916,6 +1320,35 @@ class AbstractLine(models.Model):
     def discount_value(self):
         return self.discounts.total
 
+    @property
+    def reserved_quantity(self):
+        """
+        Return the quantity of stock that is reserved for the line
+        """
+        if not settings.OSCAR_STOCK_RESERVATION_ENABLED or self.id is None:
+            return 0
+        try:
+            return self.stock_reservation.quantity
+        except ObjectDoesNotExist:
+            return 0
+
+    def reserve_stock(self):
+        """
+        Reserve stock for the line, or release it once the basket has been
+        saved for later, merged or submitted.
+        """
+        StockReservation = self._meta.get_field("stock_reservation").related_model
+        if (
+            self.basket.status in (self.basket.OPEN, self.basket.FROZEN)
+            and self.product.get_product_class().track_stock
+        ):
+            StockReservation.objects.reserve(self)
+        else:
+            StockReservation.objects.filter(line=self).delete()
+            self._meta.get_field("stock_reservation").set_cached_value(self, None)
+
+    reserve_stock.alters_data = True
+
     # pylint: disable=W0201
     @property
     def purchase_info(self):
@@ -16,9 +16,12 @@ class BasketConfig(OscarConfig):
 
     # pylint: disable=attribute-defined-outside-init
     def ready(self):
+        from . import receivers
+
         self.summary_view = get_class("basket.views", "BasketView")
         self.saved_view = get_class("basket.views", "SavedView")
         self.add_view = get_class("basket.views", "BasketAddView")
+        self.quick_order_view = get_class("basket.views", "QuickOrderView")
         self.add_voucher_view = get_class("basket.views", "VoucherAddView")
         self.remove_voucher_view = get_class("basket.views", "VoucherRemoveView")
 
@@ -26,6 +29,7 @@ class BasketConfig(OscarConfig):
         urls = [
             path("", self.summary_view.as_view(), name="summary"),
             path("add/<int:pk>/", self.add_view.as_view(), name="add"),
+            path("quick-order/", self.quick_order_view.as_view(), name="quick-order"),
             path("vouchers/add/", self.add_voucher_view.as_view(), name="vouchers-add"),
             path(
                 "vouchers/<int:pk>/remove/",
@@ -1,8 +1,11 @@
 # pylint: disable=unused-argument
+import re
+from collections import defaultdict
+
 from django import forms
 from django.conf import settings
 from django.core.validators import EMPTY_VALUES
-from django.db.models import Sum
+from django.db.models import Q, Sum
 from django.forms.utils import ErrorDict
 from django.utils.translation import gettext_lazy as _
 
@@ -182,9 +185,11 @@ class SavedLineForm(forms.ModelForm):
         # only one but there can be more if you allow product options).
         lines = self.basket.lines.filter(product=self.instance.product)
         current_qty = lines.aggregate(Sum("quantity"))["quantity__sum"] or 0
+        result = self.strategy.fetch_for_product(self.instance.product)
+        # Stock reserved for the basket isn't included in the available stock
+        current_qty -= self.basket.reserved_quantity(result.stockrecord)
         desired_qty = current_qty + self.instance.quantity
 
-        result = self.strategy.fetch_for_product(self.instance.product)
         is_available, reason = result.availability.is_purchase_permitted(
             quantity=desired_qty
         )
@@ -350,6 +355,8 @@ class AddToBasketForm(forms.Form):
         # Check user has permission to add the desired quantity to their
         # basket.
         current_qty = self.basket.product_quantity(self.product)
+        # Stock reserved for the basket isn't included in the available stock
+        current_qty -= self.basket.reserved_quantity(info.stockrecord)
         desired_qty = current_qty + self.cleaned_data.get("quantity", 1)
         is_permitted, reason = info.availability.is_purchase_permitted(desired_qty)
         if not is_permitted:
@@ -391,3 +398,200 @@ class SimpleAddToBasketForm(SimpleAddToBasketMixin, AddToBasketForm):
     class SimpleAddToBasketForm(SimpleAddToBasketMixin, AddToBasketForm):
         pass
     """
+
+
+class QuickOrderForm(forms.Form):
+    """
+    Adds several products to the basket at once, from a list of SKUs or UPCs
+    and quantities, such as one pasted from a spreadsheet or CSV file.
+    """
+
+    ROW_REGEX = re.compile(r"^([^,;\s]+)(?:[,;\s]+(\d+))?[,;\s]*$")
+
+    products = forms.CharField(
+        widget=forms.Textarea,
+        label=_("Products"),
+        help_text=_(
+            "One product per line, as its SKU or UPC followed by the quantity, "
+            "e.g. 'ABC123, 2'. The quantity defaults to 1."
+        ),
+    )
+
+    def __init__(self, basket, *args, **kwargs):
+        self.basket = basket
+        self.items = []
+        self.skus = defaultdict(set)
+        super().__init__(*args, **kwargs)
+
+    def clean_products(self):
+        quantities = self.parse_quantities(self.cleaned_data["products"])
+        products_by_code = self.get_products_by_code(quantities.keys())
+
+        missing_codes = [code for code in quantities if code not in products_by_code]
+        if missing_codes:
+            raise forms.ValidationError(
+                _("No products exist with a SKU or UPC matching %s")
+                % ", ".join(missing_codes)
+            )
+        parent_codes = [code for code in quantities if products_by_code[code].is_parent]
+        if parent_codes:
+            raise forms.ValidationError(
+                _("Please enter the SKU or UPC of a variant instead of %s")
+                % ", ".join(parent_codes)
+            )
+        # Options can't be entered here
+        option_product_ids = self.get_ids_with_required_options(
+            products_by_code.values()
+        )
+        option_codes = [
+            code
+            for code in quantities
+            if products_by_code[code].id in option_product_ids
+        ]
+        if option_codes:
+            raise forms.ValidationError(
+                _("Please add %s from the product page, to choose its options")
+                % ", ".join(option_codes)
+            )
+
+        items = {}
+        for code, quantity in quantities.items():
+            product = products_by_code[code]
+            if code != product.upc:
+                self.skus[product.id].add(code)
+            if product.id in items:
+                items[product.id][1] += quantity
+            else:
+                items[product.id] = [product, quantity]
+        self.items = list(items.values())
+        return self.cleaned_data["products"]
+
+    def parse_quantities(self, text):
+        """
+        Return the quantities entered for each SKU or UPC
+        """
+        quantities = {}
+        for number, row in enumerate(text.splitlines(), 1):
+            row = row.strip()
+            if not row:
+                continue
+            match = self.ROW_REGEX.match(row)
+            if match is None or match.group(2) == "0":
+                raise forms.ValidationError(
+                    _("Line %(number)d isn't a SKU or UPC followed by a quantity")
+                    % {"number": number}
+                )
+            code, quantity = match.group(1), int(match.group(2) or 1)
+            quantities[code] = quantities.get(code, 0) + quantity
+        if not quantities:
+            raise forms.ValidationError(_("Please enter at least one product"))
+        return quantities
+
+    def get_products_by_code(self, codes):
+        """
+        Return the public products matching the given SKUs and UPCs, keyed by
+        code
+        """
+        products = (
+            Product.objects.public()
+            .filter(Q(upc__in=codes) | Q(stockrecords__partner_sku__in=codes))
+            .prefetch_related("stockrecords")
+            .distinct()
+        )
+        products_by_code = {}
+        for product in products:
+            for stockrecord in product.stockrecords.all():
+                products_by_code.setdefault(stockrecord.partner_sku, product)
+            if product.upc:
+                products_by_code[product.upc] = product
+        return products_by_code
+
+    def get_ids_with_required_options(self, products):
+        """
+        Return the ids of the passed products which have required options,
+        either their own or those of their product class
+        """
+        return set(
+            Product.objects.filter(pk__in=[product.id for product in products])
+            .filter(
+                Q(product_options__required=True)
+                | Q(product_class__options__required=True)
+                | Q(parent__product_class__options__required=True)
+            )
+            .values_list("pk", flat=True)
+        )
+
+    def clean(self):
+        if not self.items:
+            return self.cleaned_data
+
+        basket_threshold = settings.OSCAR_MAX_BASKET_QUANTITY_THRESHOLD
+        total_basket_quantity = self.basket.num_items
+        if basket_threshold:
+            quantity = sum(quantity for __, quantity in self.items)
+            if quantity > basket_threshold - total_basket_quantity:
+                raise forms.ValidationError(
+                    _(
+                        "Due to technical limitations we are not able to ship"
+                        " more than %(threshold)d items in one order. Your"
+                        " basket currently has %(basket)d items."
+                    )
+                    % {"threshold": basket_threshold, "basket": total_basket_quantity}
+                )
+
+        # Stock reserved for the basket isn't included in the available stock
+        current_quantities = defaultdict(int)
+        for line in self.basket.all_lines():
+            current_quantities[line.product_id] += (
+                line.quantity - line.reserved_quantity
+            )
+        infos = self.basket.get_stock_infos([product for product, __ in self.items])
+        currency = self.basket.currency
+        errors = []
+        for product, quantity in self.items:
+            info = infos[product.id]
+            error = self.get_item_error(
+                product, current_quantities[product.id] + quantity, info, currency
+            )
+            if error:
+                errors.append(error)
+            if info.price.exists:
+                currency = currency or info.price.currency
+        if errors:
+            raise forms.ValidationError(errors)
+        return self.cleaned_data
+
+    def get_item_error(self, product, quantity, info, currency):
+        """
+        Return the reason why the product can't be added to the basket in the
+        given quantity, if any
+        """
+        if not info.price.exists:
+            return _(
+                "%(product)s cannot be added to the basket because a "
+                "price could not be determined for it."
+            ) % {"product": product.get_title()}
+        if currency and info.price.currency != currency:
+            return _(
+                "%(product)s cannot be added to the basket as its "
+                "currency isn't the same as other products in your "
+                "basket"
+            ) % {"product": product.get_title()}
+        # Products are added with the stockrecord the strategy selects, which
+        # must be the one of the SKU that was entered.
+        skus = self.skus[product.id]
+        if skus and skus != {info.stockrecord.partner_sku}:
+            return _(
+                "%(product)s cannot be added to the basket by its SKU "
+                "%(sku)s, as it isn't available from that partner"
+            ) % {"product": product.get_title(), "sku": ", ".join(sorted(skus))}
+        is_permitted, reason = info.availability.is_purchase_permitted(quantity)
+        if not is_permitted:
+            return "%s: %s" % (product.get_title(), reason)
+        return None
+
+    def get_items(self):
+        """
+        Return the products to add, as (product, quantity, options) tuples
+        """
+        return [(product, quantity, None) for product, quantity in self.items]
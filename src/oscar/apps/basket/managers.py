@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Prefetch
 
 
 class OpenBasketManager(models.Manager):
@@ -12,6 +13,41 @@ class OpenBasketManager(models.Manager):
     def get_or_create(self, **kwargs):
         return self.get_queryset().get_or_create(status=self.status_filter, **kwargs)
 
+    def load_for_request(self, **kwargs):
+        """
+        Return the open basket matching the passed lookup arguments, with its
+        lines and everything needed to price and render them.
+
+        The basket is loaded in a fixed number of queries, regardless of the
+        number of lines.
+        """
+        basket = (
+            self.get_queryset()
+            .prefetch_related(Prefetch("lines", queryset=self.get_lines_queryset()))
+            .get(**kwargs)
+        )
+        # pylint: disable=protected-access
+        basket._lines = basket.lines.all()
+        return basket
+
+    def get_lines_queryset(self):
+        Line = self.model._meta.get_field("lines").related_model
+        return (
+            Line.objects.select_related(
+                "product__product_class",
+                "product__parent__product_class",
+                "stockrecord",
+                "stock_reservation",
+            )
+            .prefetch_related(
+                "attributes__option",
+                "product__images",
+                "product__parent__images",
+                "product__stockrecords",
+            )
+            .order_by("pk")
+        )
+
 
 class SavedBasketManager(models.Manager):
     """For searching/creating SAVED baskets only."""
@@ -1,13 +1,18 @@
 from django.conf import settings
 from django.contrib import messages
+from django.core.cache import cache
 from django.core.signing import BadSignature, Signer
+from django.db.models import Sum
 from django.utils.functional import SimpleLazyObject, empty
 from django.utils.translation import ngettext_lazy
 
 from oscar.core.loading import get_class, get_model
 
 Applicator = get_class("offer.applicator", "Applicator")
+BasketOfferCache = get_class("offer.cache", "BasketOfferCache")
 Basket = get_model("basket", "basket")
+Line = get_model("basket", "line")
+BasketSummary = get_class("basket.utils", "BasketSummary")
 Selector = get_class("partner.strategy", "Selector")
 
 selector = Selector()
@@ -52,10 +57,20 @@ class BasketMiddleware:
             if basket.id:
                 return self.get_basket_hash(basket.id)
 
+        def load_basket_summary():
+            """
+            Return the summary of the basket, which only applies offers to the
+            basket if the summary isn't cached.
+            """
+            basket = self.get_basket(request)
+            basket.strategy = request.strategy
+            return self.get_basket_summary(request, basket)
+
         # Use Django's SimpleLazyObject to only perform the loading work
         # when the attribute is accessed.
         request.basket = SimpleLazyObject(load_full_basket)
         request.basket_hash = SimpleLazyObject(load_basket_hash)
+        request.basket_summary = SimpleLazyObject(load_basket_summary)
 
         response = self.get_response(request)
         return self.process_response(request, response)
@@ -148,16 +163,22 @@ class BasketMiddleware:
             # that they have just signed in and we need to merge their cookie
             # basket into their user basket, then delete the cookie.
             try:
-                basket, __ = manager.get_or_create(owner=request.user)
+                basket = manager.load_for_request(owner=request.user)
+            except Basket.DoesNotExist:
+                basket = manager.create(owner=request.user)
             except Basket.MultipleObjectsReturned:
                 # Not sure quite how we end up here with multiple baskets.
-                # We merge them and create a fresh one
+                # We merge them into the first one
                 old_baskets = list(manager.filter(owner=request.user))
                 basket = old_baskets[0]
-                for other_basket in old_baskets[1:]:
-                    self.merge_baskets(basket, other_basket)
-                    # count number of items that have been merged
-                    num_items_merged += other_basket.num_items
+                # count number of items that will be merged
+                num_items_merged += (
+                    Line.objects.filter(basket__in=old_baskets[1:]).aggregate(
+                        num_items=Sum("quantity")
+                    )["num_items"]
+                    or 0
+                )
+                self.merge_many_baskets(basket, old_baskets[1:])
 
             # Assign user onto basket to prevent further SQL queries when
             # basket.owner is accessed.
@@ -205,6 +226,19 @@ class BasketMiddleware:
         """
         master.merge(slave, add_quantities=False)
 
+    def merge_many_baskets(self, master, slaves):
+        """
+        Merge several baskets into another.
+
+        The baskets are merged in bulk, unless merge_baskets has been
+        overridden, in which case it is called for each of them.
+        """
+        if type(self).merge_baskets is not BasketMiddleware.merge_baskets:
+            for slave in slaves:
+                self.merge_baskets(master, slave)
+        else:
+            master.merge_many(slaves, add_quantities=False)
+
     # pylint: disable=unused-argument
     def get_cookie_basket(self, cookie_key, request, manager):
         """
@@ -218,16 +252,33 @@ class BasketMiddleware:
             basket_hash = request.COOKIES[cookie_key]
             try:
                 basket_id = Signer().unsign(basket_hash)
-                basket = Basket.objects.get(
-                    pk=basket_id, owner=None, status=Basket.OPEN
-                )
+                basket = Basket.open.load_for_request(pk=basket_id, owner=None)
             except (BadSignature, Basket.DoesNotExist):
                 request.cookies_to_delete.append(cookie_key)
         return basket
 
     def apply_offers_to_basket(self, request, basket):
-        if not basket.is_empty:
+        if basket.is_empty:
+            return
+        if settings.OSCAR_OFFERS_BASKET_CACHE_ENABLED:
+            BasketOfferCache(Applicator()).apply(basket, request.user, request)
+        else:
             Applicator().apply(basket, request.user, request)
 
+    def get_basket_summary(self, request, basket):
+        if not (settings.OSCAR_BASKET_SUMMARY_CACHE_ENABLED and basket.id):
+            return BasketSummary(basket, BasketSummary.get_values(request.basket))
+        # The values of each variant are stored under the basket's key, so
+        # they are all invalidated together
+        key = BasketSummary.get_key(basket.id)
+        variant = BasketSummary.get_variant(basket)
+        variants = cache.get(key) or {}
+        values = variants.get(variant)
+        if values is None:
+            values = BasketSummary.get_values(request.basket)
+            variants[variant] = values
+            cache.set(key, variants, BasketSummary.get_timeout())
+        return BasketSummary(basket, values)
+
     def get_basket_hash(self, basket_id):
         return Signer().sign(basket_id)
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from oscar.core.loading import get_class, get_model
+
+Basket = get_model("basket", "Basket")
+Line = get_model("basket", "Line")
+StockRecord = get_model("partner", "StockRecord")
+BasketSummary = get_class("basket.utils", "BasketSummary")
+
+
+def basket_summary_cache_enabled(**kwargs):
+    return settings.OSCAR_BASKET_SUMMARY_CACHE_ENABLED and not kwargs.get("raw")
+
+
+# pylint: disable=unused-argument
+@receiver(post_save, sender=Basket)
+def invalidate_basket_summary_on_basket_save(sender, instance, **kwargs):
+    if basket_summary_cache_enabled(**kwargs):
+        BasketSummary.invalidate(instance.id)
+
+
+@receiver(post_save, sender=Line)
+@receiver(post_delete, sender=Line)
+def invalidate_basket_summary_on_line_change(sender, instance, **kwargs):
+    if basket_summary_cache_enabled(**kwargs):
+        BasketSummary.invalidate(instance.basket_id)
+
+
+@receiver(m2m_changed, sender=Basket.vouchers.through)
+def invalidate_basket_summary_on_voucher_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if not basket_summary_cache_enabled() or not action.startswith("post_"):
+        return
+    basket_ids = (pk_set or []) if reverse else [instance.id]
+    for basket_id in basket_ids:
+        BasketSummary.invalidate(basket_id)
+
+
+@receiver(post_save, sender=StockRecord)
+def invalidate_basket_summary_on_stockrecord_change(sender, instance, **kwargs):
+    # Deleting a stockrecord deletes its basket lines, which invalidates the
+    # summaries of their baskets
+    if basket_summary_cache_enabled(**kwargs):
+        BasketSummary.invalidate_stockrecords([instance.pk])
@@ -1,7 +1,13 @@
+import math
 from collections import defaultdict, namedtuple
+from decimal import Decimal as D
 
+from django.conf import settings
 from django.contrib import messages
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
 from django.template.loader import render_to_string
+from django.utils.timezone import now
 
 from oscar.core.loading import get_class, get_model
 from oscar.core.decorators import deprecated
@@ -219,6 +225,7 @@ class LineDiscountRegistry(LineOfferConsumer):
             self._discount_incl_tax = None
         else:
             self._discount_excl_tax = None
+        self._line.reset_basket_pricing()
 
     @property
     def excl_tax(self):
@@ -243,5 +250,296 @@ class LineDiscountRegistry(LineOfferConsumer):
     def all(self):
         return self._discounts
 
+    def get_state(self):
+        """
+        Return a picklable representation of the discounts, which refers to
+        offers by their ids.
+        """
+        return {
+            "affected_quantity": self._affected_quantity,
+            "consumptions": {
+                offer_id: quantity
+                for offer_id, quantity in self._consumptions.items()
+                if quantity
+            },
+            "discounts": [
+                (d.amount, d.quantity, d.incl_tax, d.offer.pk if d.offer else None)
+                for d in self._discounts
+            ],
+        }
+
+    def set_state(self, state, offers):
+        """
+        Restore the discounts from a representation returned by ``get_state``,
+        using the passed dict of offers keyed by id.
+        """
+        self._affected_quantity = state["affected_quantity"]
+        self._consumptions = defaultdict(int, state["consumptions"])
+        self._offers = {pk: offers[pk] for pk in self._consumptions}
+        self._discounts = [
+            DiscountApplication(amount, quantity, incl_tax, offers.get(offer_id))
+            for amount, quantity, incl_tax, offer_id in state["discounts"]
+        ]
+        self._discount_excl_tax = None
+        self._discount_incl_tax = None
+        self._line.reset_basket_pricing()
+
     def __iter__(self):
         return iter(self._discounts)
+
+
+class OfferLine(object):
+    """
+    A compact view of a basket line for the offer engine.
+
+    Conditions and benefits loop over these views rather than the model
+    lines. A view holds the product id, the product and the unit price of its
+    line, and remembers which ranges contain the product, so they are looked
+    up once per line rather than on every check of every offer.
+
+    Consumptions and discounts are recorded in the line's discount registry,
+    which the view shares with the line instead of copying. The model lines
+    therefore always reflect the offers applied so far, and nothing needs to
+    be written back once they are applied.
+
+    Any other attribute is looked up on the line, so custom conditions and
+    benefits can use the view as they would use the line.
+    """
+
+    __slots__ = (
+        "line",
+        "basket",
+        "product_id",
+        "product",
+        "stockrecord_id",
+        "_unit_price",
+        "_ranges",
+    )
+
+    def __init__(self, line, basket):
+        self.line = line
+        self.basket = basket
+        self.product_id = line.product_id
+        self.product = line.product
+        self.stockrecord_id = line.stockrecord_id
+        self._unit_price = None
+        self._ranges = {}
+
+    def __getattr__(self, name):
+        return getattr(self.line, name)
+
+    def __repr__(self):
+        return "<OfferLine product_id=%r>" % self.product_id
+
+    @property
+    def quantity(self):
+        return self.line.quantity
+
+    @property
+    def discounts(self):
+        return self.line.discounts
+
+    @property
+    def unit_effective_price(self):
+        # Computed on first use, as it raises for lines whose tax isn't known
+        if self._unit_price is None:
+            self._unit_price = self.line.unit_effective_price
+        return self._unit_price
+
+    def in_range(self, product_range):
+        if product_range.pk not in self._ranges:
+            self._ranges[product_range.pk] = (
+                self.product_id in self.basket.get_range_product_ids(product_range)
+            )
+        return self._ranges[product_range.pk]
+
+    def consume(self, quantity, offer=None):
+        return self.line.discounts.consume(quantity, offer=offer)
+
+    def discount(self, discount_value, affected_quantity, incl_tax=True, offer=None):
+        self.line.discount(discount_value, affected_quantity, incl_tax, offer)
+
+    def quantity_with_offer_discount(self, offer):
+        return self.line.discounts.num_consumed(offer)
+
+    def quantity_without_offer_discount(self, offer):
+        return self.line.discounts.available(offer)
+
+    def is_available_for_offer_discount(self, offer):
+        return self.line.discounts.available(offer) > 0
+
+    def quantity_available_for_offer(self, offer):
+        discounts = self.line.discounts
+        return discounts.available(offer) + discounts.num_consumed(offer)
+
+
+class BasketPricing(object):
+    """
+    A snapshot of the totals of a basket, computed in a single pass over its
+    lines.
+
+    Errors raised while computing a total (e.g. a ``TypeError`` when the tax
+    of an available product isn't known) are only raised when that total is
+    accessed, as when each total was computed separately.
+
+    The quantities of the lines are recorded, so a snapshot can tell it's
+    stale when a quantity was changed without saving the line.
+    """
+
+    line_properties = {
+        "total_excl_tax": "line_price_excl_tax_incl_discounts",
+        "total_tax": "line_tax",
+        "total_incl_tax": "line_price_incl_tax_incl_discounts",
+        "total_incl_tax_excl_discounts": "line_price_incl_tax",
+        "total_excl_tax_excl_discounts": "line_price_excl_tax",
+        "total_discount": "discount_value",
+    }
+
+    def __init__(self, basket):
+        self.totals = dict.fromkeys(self.line_properties, D("0.00"))
+        self.errors = {}
+        lines = basket.all_lines()
+        self.quantities = self.get_quantities(lines)
+        for line in lines:
+            self.add_line(basket, line)
+
+    def get_quantities(self, lines):
+        return [(id(line), line.quantity) for line in lines]
+
+    def is_stale(self, basket):
+        return self.quantities != self.get_quantities(basket.all_lines())
+
+    def add_line(self, basket, line):
+        is_available_to_buy = None
+        for name, model_property in self.line_properties.items():
+            if name in self.errors:
+                continue
+            try:
+                self.totals[name] += getattr(line, model_property)
+            except ObjectDoesNotExist:
+                # Handle situation where the product may have been deleted
+                pass
+            except TypeError as e:
+                # Handle Unavailable products with no known price
+                if is_available_to_buy is None:
+                    info = basket.get_stock_info(line.product, line.attributes.all())
+                    is_available_to_buy = info.availability.is_available_to_buy
+                if is_available_to_buy:
+                    self.errors[name] = e
+            except Exception as e:  # pylint: disable=broad-except
+                self.errors[name] = e
+
+    def get_total(self, name):
+        if name in self.errors:
+            raise self.errors[name]
+        return self.totals[name]
+
+
+class BasketSummary(object):
+    """
+    The number of items in a basket and its totals, as shown in the header and
+    the mini-basket.
+
+    When ``OSCAR_BASKET_SUMMARY_CACHE_ENABLED`` is set, the values are cached
+    between requests and invalidated when the basket changes, so pages that
+    only show the summary don't need to apply offers to the basket. The lines
+    are read from the passed basket, which doesn't need offers applied.
+
+    The values of a basket are cached separately for each strategy and
+    currency it's priced with (see ``get_variant``), and expire when a site
+    offer starts or ends.
+    """
+
+    key_prefix = "oscar_basket_summary"
+    fields = (
+        "num_lines",
+        "num_items",
+        "currency",
+        "is_tax_known",
+        "total_excl_tax",
+        "total_incl_tax",
+        "total_excl_tax_excl_discounts",
+        "total_incl_tax_excl_discounts",
+        "total_discount",
+    )
+    tax_fields = ("total_incl_tax", "total_incl_tax_excl_discounts")
+
+    def __init__(self, basket, values):
+        self.basket = basket
+        for name in self.fields:
+            setattr(self, name, values[name])
+
+    @property
+    def is_empty(self):
+        return self.num_lines == 0
+
+    def all_lines(self):
+        return self.basket.all_lines()
+
+    @classmethod
+    def get_values(cls, basket):
+        """
+        Return the summary values of a basket which has offers applied.
+        """
+        is_tax_known = basket.is_tax_known
+        return {
+            name: (
+                getattr(basket, name)
+                if is_tax_known or name not in cls.tax_fields
+                else None
+            )
+            for name in cls.fields
+        }
+
+    @classmethod
+    def get_variant(cls, basket):
+        """
+        Return what the summary depends on besides the basket: the class of
+        its strategy, and the currency that strategy prices in.
+
+        Strategies which price differently depending on anything else, like
+        the user, should expose it by overriding this method.
+        """
+        strategy = basket.strategy
+        return "%s.%s_%s" % (
+            type(strategy).__module__,
+            type(strategy).__qualname__,
+            getattr(strategy, "currency", settings.OSCAR_DEFAULT_CURRENCY),
+        )
+
+    @classmethod
+    def get_timeout(cls):
+        """
+        Return the number of seconds to cache summaries for, which ends when
+        the next site offer starts or ends.
+        """
+        timeout = settings.OSCAR_BASKET_SUMMARY_CACHE_TIMEOUT
+        next_change = Applicator.catalogue.get_next_change()
+        if next_change is not None:
+            seconds = math.ceil((next_change - now()).total_seconds())
+            timeout = seconds if timeout is None else min(timeout, seconds)
+        return timeout
+
+    @classmethod
+    def get_key(cls, basket_id):
+        # Offer changes affect the totals of all baskets
+        version = Applicator.catalogue.get_version()
+        return "%s_%s_%s" % (cls.key_prefix, basket_id, version)
+
+    @classmethod
+    def invalidate(cls, basket_id):
+        cache.delete(cls.get_key(basket_id))
+
+    @classmethod
+    def invalidate_stockrecords(cls, stockrecord_ids):
+        """
+        Invalidate the summaries of the baskets with lines for the passed
+        stockrecords, e.g. because their prices have changed
+        """
+        Line = get_model("basket", "Line")
+        basket_ids = (
+            Line.objects.filter(stockrecord_id__in=stockrecord_ids)
+            .values_list("basket_id", flat=True)
+            .distinct()
+        )
+        cache.delete_many([cls.get_key(basket_id) for basket_id in basket_ids])
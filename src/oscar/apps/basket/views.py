@@ -8,6 +8,7 @@ from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils.http import url_has_allowed_host_and_scheme
 from django.utils.translation import gettext_lazy as _
+from django.utils.translation import ngettext
 from django.views.generic import FormView, View
 from extra_views import ModelFormSetView
 
@@ -17,9 +18,21 @@ from oscar.core.loading import get_class, get_classes, get_model
 from oscar.core.utils import is_ajax, redirect_to_referrer, safe_referrer
 
 Applicator = get_class("offer.applicator", "Applicator")
-(BasketLineForm, AddToBasketForm, BasketVoucherForm, SavedLineForm) = get_classes(
+(
+    BasketLineForm,
+    AddToBasketForm,
+    BasketVoucherForm,
+    SavedLineForm,
+    QuickOrderForm,
+) = get_classes(
     "basket.forms",
-    ("BasketLineForm", "AddToBasketForm", "BasketVoucherForm", "SavedLineForm"),
+    (
+        "BasketLineForm",
+        "AddToBasketForm",
+        "BasketVoucherForm",
+        "SavedLineForm",
+        "QuickOrderForm",
+    ),
 )
 BasketLineFormSet, SavedLineFormSet = get_classes(
     "basket.formsets", ("BasketLineFormSet", "SavedLineFormSet")
@@ -395,6 +408,55 @@ class BasketAddView(FormView):
         return safe_referrer(self.request, "basket:summary")
 
 
+class QuickOrderView(FormView):
+    """
+    Adds several products to the basket at once, from a pasted list of SKUs
+    or UPCs and quantities.
+    """
+
+    form_class = QuickOrderForm
+    template_name = "oscar/basket/quick_order.html"
+    add_signal = basket_addition
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs["basket"] = self.request.basket
+        return kwargs
+
+    def form_valid(self, form):
+        offers_before = self.request.basket.applied_offers()
+
+        items = form.get_items()
+        self.request.basket.add_products(items)
+
+        messages.success(
+            self.request,
+            ngettext(
+                "%(count)d product has been added to your basket",
+                "%(count)d products have been added to your basket",
+                len(items),
+            )
+            % {"count": len(items)},
+        )
+
+        # Check for additional offer messages
+        BasketMessageGenerator().apply_messages(self.request, offers_before)
+
+        # Send signal for basket addition
+        for product, __, __ in items:
+            self.add_signal.send(
+                sender=self,
+                product=product,
+                user=self.request.user,
+                request=self.request,
+            )
+
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        return reverse("basket:summary")
+
+
 class VoucherAddView(FormView):
     form_class = BasketVoucherForm
     voucher_model = get_model("voucher", "voucher")
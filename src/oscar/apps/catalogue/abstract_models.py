@@ -1,5 +1,7 @@
 import logging
 import os
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import date, datetime
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
@@ -15,7 +17,7 @@ from django.core.validators import MinValueValidator
 from django.core.files.base import File
 from django.core.validators import RegexValidator
 from django.db import models
-from django.db.models import Count, Exists, OuterRef, Sum
+from django.db.models import Count, Sum
 from django.db.models.fields import Field
 from django.db.models.lookups import StartsWith
 from django.template.defaultfilters import striptags
@@ -42,6 +44,13 @@ CategoryQuerySet, ProductQuerySet = get_classes(
 ProductAttributesContainer = get_class(
     "catalogue.product_attributes", "ProductAttributesContainer"
 )
+CategoryTreeCache = get_class("catalogue.cache", "CategoryTreeCache")
+
+# Set while updating ancestors_are_public is deferred, see
+# AbstractCategory.defer_ancestors_are_public()
+_ancestors_are_public_deferred = ContextVar(
+    "ancestors_are_public_deferred", default=False
+)
 
 
 # pylint: disable=abstract-method
@@ -192,6 +201,9 @@ class AbstractCategory(MP_Node):
     def get_full_slug(self, parent_slug=None):
         if self.is_root():
             return self.slug
+        # Computed by CategoryQuerySet.with_full_slugs()
+        if getattr(self, "_full_slug", None) is not None:
+            return self._full_slug
 
         cache_key = self.get_url_cache_key()
         full_slug = cache.get(cache_key)
@@ -236,20 +248,48 @@ class AbstractCategory(MP_Node):
         super().save(*args, **kwargs)
 
     def set_ancestors_are_public(self):
+        if _ancestors_are_public_deferred.get():
+            return
+
         # Update ancestors_are_public for the sub tree.
         # note: This doesn't trigger a new save for each instance, rather
         # just a SQL update.
-        included_in_non_public_subtree = self.__class__.objects.filter(
-            is_public=False,
-            path__rstartswith=OuterRef("path"),
-            depth__lt=OuterRef("depth"),
-        )
-        self.get_descendants_and_self().update(
-            ancestors_are_public=~Exists(included_in_non_public_subtree.values("id"))
-        )
+        self.get_descendants_and_self().update_ancestors_are_public()
 
         # Correctly populate ancestors_are_public
-        self.refresh_from_db()
+        self.refresh_from_db(fields=["ancestors_are_public"])
+
+        if settings.OSCAR_CATEGORY_TREE_CACHE_ENABLED:
+            CategoryTreeCache.bump_version()
+
+    @classmethod
+    @contextmanager
+    def defer_ancestors_are_public(cls):
+        """
+        Context manager that defers updating ``ancestors_are_public`` when
+        categories are saved, e.g. while importing many categories, and
+        updates it for all categories at once at the end instead.
+        """
+        if _ancestors_are_public_deferred.get():
+            # Already deferred by an outer block
+            yield
+            return
+
+        token = _ancestors_are_public_deferred.set(True)
+        try:
+            yield
+        finally:
+            _ancestors_are_public_deferred.reset(token)
+        cls.get_tree().update_ancestors_are_public()
+        if settings.OSCAR_CATEGORY_TREE_CACHE_ENABLED:
+            CategoryTreeCache.bump_version()
+
+    def move(self, target, pos=None):
+        super().move(target, pos)
+        # Moving a category updates the tree without saving it, so no
+        # signals are sent
+        if settings.OSCAR_CATEGORY_TREE_CACHE_ENABLED:
+            CategoryTreeCache.bump_version()
 
     def get_public_children(self):
         children = self.get_children()
@@ -258,14 +298,11 @@ class AbstractCategory(MP_Node):
     @classmethod
     def fix_tree(cls, destructive=False, fix_paths=False):
         super().fix_tree(destructive, fix_paths)
-        for node in cls.get_root_nodes():
-            # ancestors_are_public *must* be True for root nodes, or all trees
-            # will become non-public
-            if not node.ancestors_are_public:
-                node.ancestors_are_public = True
-                node.save()
-            else:
-                node.set_ancestors_are_public()
+        # This also sets ancestors_are_public to True for root nodes, which
+        # they *must* be, or all trees will become non-public
+        cls.get_tree().update_ancestors_are_public()
+        if settings.OSCAR_CATEGORY_TREE_CACHE_ENABLED:
+            CategoryTreeCache.bump_version()
 
     def get_meta_title(self):
         return self.meta_title or self.name
@@ -0,0 +1,70 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import get_language
+
+from oscar.core.loading import get_model
+
+
+class CategoryTreeCache(object):
+    """
+    Caches a snapshot of the browsable category tree.
+
+    The snapshot is a list of ``(category, url)`` tuples of all browsable
+    categories in tree order, so the ``category_tree`` template tag can render
+    any part of the tree without querying the database. It is stored under a
+    version that is changed whenever a category is saved or deleted.
+    """
+
+    key_prefix = "oscar_category_tree"
+    version_cache_key = "oscar_category_tree_version"
+
+    @classmethod
+    def bump_version(cls):
+        """
+        Invalidate the cached category tree
+        """
+
+        # The version is changed straight away, so the rest of the transaction
+        # doesn't see a stale tree, and again once the transaction has been
+        # committed, as other processes may have cached the tree from before
+        # the change in the meantime.
+        def change():
+            cache.set(cls.version_cache_key, uuid4().hex, None)
+
+        change()
+        transaction.on_commit(change)
+
+    def get_version(self):
+        version = cache.get(self.version_cache_key)
+        if version is None:
+            # Use add() so concurrent processes end up agreeing on the same
+            # version.
+            cache.add(self.version_cache_key, uuid4().hex, None)
+            version = cache.get(self.version_cache_key)
+        return version
+
+    def get_cache_key(self):
+        # URLs can depend on the active language, e.g. with i18n_patterns
+        return "%s_%s_%s" % (self.key_prefix, get_language(), self.get_version())
+
+    def get_nodes(self):
+        """
+        Return the snapshot of the category tree, building it if it isn't
+        cached.
+        """
+        key = self.get_cache_key()
+        nodes = cache.get(key)
+        if nodes is None:
+            nodes = self.build()
+            cache.set(key, nodes, settings.OSCAR_CATEGORY_TREE_CACHE_TIMEOUT)
+        return nodes
+
+    def build(self):
+        Category = get_model("catalogue", "Category")
+        return [
+            (category, category.get_absolute_url())
+            for category in Category.get_tree().browsable().with_full_slugs()
+        ]
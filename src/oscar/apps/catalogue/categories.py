@@ -1,6 +1,16 @@
-from oscar.core.loading import get_model
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from treebeard.exceptions import PathOverflow
+
+from oscar.core.loading import get_class, get_model
 
 Category = get_model("catalogue", "category")
+CategoryTreeCache = get_class("catalogue.cache", "CategoryTreeCache")
+
+# Marks names that are shared by several siblings
+_AMBIGUOUS = object()
 
 
 def create_from_sequence(bits):
@@ -46,3 +56,139 @@ def create_from_breadcrumbs(breadcrumb_str, separator=">"):
     category_names = [x.strip() for x in breadcrumb_str.split(separator)]
     categories = create_from_sequence(category_names)
     return categories[-1]
+
+
+class BreadcrumbTree(object):
+    """
+    The existing category tree, as used by ``bulk_create_from_breadcrumbs`` to
+    look up categories by name and to assign paths to new ones.
+
+    Only the fields needed for that are loaded. A tree can be passed to
+    several calls of ``bulk_create_from_breadcrumbs``, e.g. by an importer
+    that creates categories in chunks, so it's only loaded once. The
+    categories created by those calls are added to it, so a tree must be
+    discarded after a call fails.
+    """
+
+    def __init__(self):
+        # Categories by name, by the path of their parent
+        self.children = defaultdict(dict)
+        # Last step of the paths of the children, by the path of their parent
+        self.last_steps = defaultdict(int)
+        for category in Category.objects.order_by("path").only(
+            "path", "depth", "name", "numchild", "is_public", "ancestors_are_public"
+        ):
+            self.add(category)
+
+    def add(self, category):
+        parent_path = category.path[: -Category.steplen]
+        siblings = self.children[parent_path]
+        siblings[category.name] = _AMBIGUOUS if category.name in siblings else category
+        self.last_steps[parent_path] = max(
+            self.last_steps[parent_path], category._get_lastpos_in_path()
+        )
+
+    def get_or_build(self, parent, name):
+        """
+        Return the child of the parent with the given name, or a new, unsaved
+        one with the next free path, and whether it is new.
+        """
+        parent_path = parent.path if parent is not None else ""
+        category = self.children[parent_path].get(name)
+        if category is _AMBIGUOUS:
+            if parent is None:
+                raise ValueError(
+                    "There are more than one categories with name %s at "
+                    "depth=1" % name
+                )
+            raise ValueError(
+                "There are more than one categories with name %s which "
+                "are children of %s" % (name, parent)
+            )
+        if category is not None:
+            return category, False
+
+        category = _new_category(parent, name, self.last_steps[parent_path] + 1)
+        self.add(category)
+        if parent is not None:
+            parent.numchild += 1
+        return category, True
+
+
+def bulk_create_from_breadcrumbs(breadcrumb_strs, separator=">", tree=None):
+    """
+    Create categories from many breadcrumb strings at once, and return the
+    last category of each.
+
+    The existing category tree is loaded once, unless a ``BreadcrumbTree`` is
+    passed in, and the missing categories of all breadcrumbs are inserted
+    with a single bulk insert, with their materialised paths computed
+    beforehand.  As with ``bulk_create``, the categories' ``save`` method
+    isn't called and no signals are sent.  The tree mustn't be changed by
+    anything else while this runs.
+    """
+    if Category.node_order_by:
+        # Sorted trees need their siblings' paths to be shifted on insertion
+        return [create_from_breadcrumbs(s, separator) for s in breadcrumb_strs]
+
+    with transaction.atomic():
+        if tree is None:
+            tree = BreadcrumbTree()
+        new_categories, updated_parents, results = [], {}, []
+        for breadcrumb_str in breadcrumb_strs:
+            parent = None
+            for name in [x.strip() for x in breadcrumb_str.split(separator)]:
+                category, created = tree.get_or_build(parent, name)
+                if created:
+                    new_categories.append(category)
+                    if parent is not None and parent.pk is not None:
+                        updated_parents[parent.pk] = parent
+                parent = category
+            results.append(parent)
+
+        if new_categories:
+            _save_new_categories(new_categories, updated_parents.values())
+
+    return results
+
+
+def _save_new_categories(new_categories, updated_parents):
+    """
+    Insert the new categories, and update the number of children of their
+    existing parents
+    """
+    Category.objects.bulk_create(new_categories)
+    if any(category.pk is None for category in new_categories):
+        # The database can't return primary keys from bulk inserts
+        pks = dict(
+            Category.objects.filter(
+                path__in=[category.path for category in new_categories]
+            ).values_list("path", "pk")
+        )
+        for category in new_categories:
+            category.pk = pks[category.path]
+    Category.objects.bulk_update(updated_parents, ["numchild"])
+    if settings.OSCAR_CATEGORY_TREE_CACHE_ENABLED:
+        CategoryTreeCache.bump_version()
+
+
+def _new_category(parent, name, step):
+    """
+    Return a new, unsaved category with the given step as the last step of its
+    path
+    """
+    depth = parent.depth + 1 if parent is not None else 1
+    if len(Category._int2str(step)) > Category.steplen:
+        raise PathOverflow("Path Overflow from: '%s'" % (parent.path if parent else ""))
+    category = Category(
+        name=name,
+        depth=depth,
+        numchild=0,
+        path=Category._get_path(parent.path if parent else "", depth, step),
+        # Categories are public by default, so they are browsable if their
+        # parent is
+        ancestors_are_public=parent is None
+        or (parent.is_public and parent.ancestors_are_public),
+    )
+    category.slug = category.generate_slug()
+    return category
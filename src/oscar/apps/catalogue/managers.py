@@ -1,8 +1,10 @@
 from collections import defaultdict
 
+from django.core.cache import cache
 from django.db import models
 from django.db.models import Exists, OuterRef, Prefetch, F
 from django.db.models.constants import LOOKUP_SEP
+from django.db.models.query import ModelIterable
 from treebeard.mp_tree import MP_NodeQuerySet
 
 from oscar.core.loading import get_model
@@ -241,9 +243,84 @@ class ProductQuerySet(models.query.QuerySet):
         return queryset
 
 
+class FullSlugModelIterable(ModelIterable):
+    """
+    Yields categories with their full slugs computed from the slugs of their
+    ancestors, which are looked up by their materialised paths.
+    """
+
+    def __iter__(self):
+        categories = list(super().__iter__())
+        model = self.queryset.model
+        slugs = {category.path: category.slug for category in categories}
+        ancestor_paths = {
+            model._get_basepath(category.path, depth)
+            for category in categories
+            for depth in range(1, category.depth)
+        }
+        missing_paths = ancestor_paths.difference(slugs)
+        if missing_paths:
+            slugs.update(
+                model._base_manager.using(self.queryset.db)
+                .filter(path__in=missing_paths)
+                .values_list("path", "slug")
+            )
+
+        full_slugs = {}
+        for category in categories:
+            paths = [
+                model._get_basepath(category.path, depth)
+                for depth in range(1, category.depth + 1)
+            ]
+            if all(path in slugs for path in paths):
+                category._full_slug = model._slug_separator.join(
+                    slugs[path] for path in paths
+                )
+                if not category.is_root():
+                    full_slugs[category.get_url_cache_key()] = category._full_slug
+        # Prime the cache get_full_slug() uses for other instances, writing
+        # only the full slugs that aren't cached yet
+        if full_slugs:
+            cached = cache.get_many(full_slugs.keys())
+            missing = {
+                key: full_slug
+                for key, full_slug in full_slugs.items()
+                if cached.get(key) != full_slug
+            }
+            if missing:
+                cache.set_many(missing)
+        yield from categories
+
+
 class CategoryQuerySet(MP_NodeQuerySet):
     def browsable(self):
         """
         Excludes non-public categories
         """
         return self.filter(is_public=True, ancestors_are_public=True)
+
+    def update_ancestors_are_public(self):
+        """
+        Recomputes ``ancestors_are_public`` for all categories in the queryset
+        with a single UPDATE. A category's ancestors are the non-public
+        categories whose materialised paths are prefixes of its path.
+        """
+        non_public_ancestors = self.model._base_manager.filter(
+            is_public=False,
+            path__rstartswith=OuterRef("path"),
+            depth__lt=OuterRef("depth"),
+        )
+        return self.update(
+            ancestors_are_public=~Exists(non_public_ancestors.values("id"))
+        )
+
+    def with_full_slugs(self):
+        """
+        Computes the full slugs of all categories in one pass when the queryset
+        is evaluated, so getting their URLs doesn't look up each category's
+        full slug in the cache. The slugs of ancestors that aren't part of the
+        queryset are loaded with a single query.
+        """
+        clone = self._chain()
+        clone._iterable_class = FullSlugModelIterable
+        return clone
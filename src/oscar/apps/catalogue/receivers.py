@@ -3,9 +3,10 @@ from django.conf import settings
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from oscar.core.loading import get_model
+from oscar.core.loading import get_class, get_model
 
 Category = get_model("catalogue", "Category")
+CategoryTreeCache = get_class("catalogue.cache", "CategoryTreeCache")
 
 
 if settings.OSCAR_DELETE_IMAGE_FILES:
@@ -41,3 +42,10 @@ def post_save_set_ancestors_are_public(sender, instance, **kwargs):
         return
 
     instance.set_ancestors_are_public()
+
+
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree(sender, instance, **kwargs):
+    # Saved categories invalidate the tree through set_ancestors_are_public
+    if settings.OSCAR_CATEGORY_TREE_CACHE_ENABLED:
+        CategoryTreeCache.bump_version()
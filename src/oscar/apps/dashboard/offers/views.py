@@ -37,6 +37,7 @@ OfferWizardStepView = get_class("dashboard.offers.wizard_views", "OfferWizardSte
 OrderDiscountCSVFormatter = get_class(
     "dashboard.offers.reports", "OrderDiscountCSVFormatter"
 )
+OfferStatistics = get_class("offer.instrumentation", "OfferStatistics")
 
 
 # pylint: disable=attribute-defined-outside-init
@@ -119,8 +120,27 @@ class OfferListView(ListView):
         ctx["form"] = self.form
         ctx["advanced_form"] = self.advanced_form
         ctx["search_filters"] = self.search_filters
+        if settings.OSCAR_OFFERS_INSTRUMENTATION_ENABLED:
+            ctx["offer_statistics"] = self.get_offer_statistics(ctx["offers"])
         return ctx
 
+    def get_offer_statistics(self, offers):
+        """
+        Return the offers on the page that have been evaluated, annotated with
+        their average evaluation statistics, slowest first.
+        """
+        statistics = OfferStatistics().get_many([offer.id for offer in offers])
+        evaluated_offers = []
+        for offer in offers:
+            if offer.id in statistics:
+                offer.statistics = statistics[offer.id]
+                evaluated_offers.append(offer)
+        return sorted(
+            evaluated_offers,
+            key=lambda o: o.statistics["avg_time_ms"],
+            reverse=True,
+        )
+
 
 class OfferMetaDataView(OfferWizardStepView):
     step_name = "metadata"
@@ -30,7 +30,10 @@ class RangeListView(ListView):
     paginate_by = settings.OSCAR_DASHBOARD_ITEMS_PER_PAGE
 
     def get_queryset(self):
-        return self.model._default_manager.prefetch_related("included_categories")
+        qs = self.model._default_manager.prefetch_related("included_categories")
+        if settings.OSCAR_OFFERS_RANGE_MEMBERSHIP_ENABLED:
+            qs = qs.with_num_memberships()
+        return qs
 
 
 class RangeCreateView(CreateView):
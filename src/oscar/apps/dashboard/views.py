@@ -6,7 +6,7 @@ from decimal import Decimal as D
 from django.contrib import messages
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.forms import AuthenticationForm
-from django.db.models import Avg, Count, Sum
+from django.db.models import Avg, Count, Q, Sum
 from django.template.response import TemplateResponse
 from django.urls import reverse_lazy
 from django.utils.timezone import now
@@ -123,9 +123,7 @@ class IndexView(TemplateView):
             partners_ids = tuple(user.partners.values_list("id", flat=True))
             orders = orders.filter(lines__partner_id__in=partners_ids).distinct()
             alerts = alerts.filter(stockrecord__partner_id__in=partners_ids)
-            baskets = baskets.filter(
-                lines__stockrecord__partner_id__in=partners_ids
-            ).distinct()
+            baskets = baskets.filter(lines__stockrecord__partner_id__in=partners_ids)
             customers = customers.filter(
                 orders__lines__partner_id__in=partners_ids
             ).distinct()
@@ -138,6 +136,14 @@ class IndexView(TemplateView):
         closed_alerts = alerts.filter(status=StockAlert.CLOSED)
 
         total_lines_last_day = lines.filter(order__in=orders_last_day).count()
+        # Count the open baskets in a single query, as the basket table can be
+        # large
+        basket_stats = baskets.aggregate(
+            total=Count("id", distinct=True),
+            last_day=Count(
+                "id", distinct=True, filter=Q(date_created__gt=datetime_24hrs_ago)
+            ),
+        )
         stats = {
             "total_orders_last_day": orders_last_day.count(),
             "total_lines_last_day": total_lines_last_day,
@@ -153,14 +159,12 @@ class IndexView(TemplateView):
             "total_customers_last_day": customers.filter(
                 date_joined__gt=datetime_24hrs_ago,
             ).count(),
-            "total_open_baskets_last_day": baskets.filter(
-                date_created__gt=datetime_24hrs_ago
-            ).count(),
+            "total_open_baskets_last_day": basket_stats["last_day"],
             "total_products": products.count(),
             "total_open_stock_alerts": open_alerts.count(),
             "total_closed_stock_alerts": closed_alerts.count(),
             "total_customers": customers.count(),
-            "total_open_baskets": baskets.count(),
+            "total_open_baskets": basket_stats["total"],
             "total_orders": orders.count(),
             "total_lines": lines.count(),
             "total_revenue": orders.aggregate(Sum("total_incl_tax"))[
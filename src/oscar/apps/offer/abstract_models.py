@@ -550,6 +550,7 @@ class AbstractBenefit(BaseOfferMixin, models.Model):
         "Shipping absolute",
         "Shipping fixed price",
     )
+    SHIPPING_TYPES = (SHIPPING_PERCENTAGE, SHIPPING_ABSOLUTE, SHIPPING_FIXED_PRICE)
     TYPE_CHOICES = (
         (PERCENTAGE, _("Discount is a percentage off of the product's value")),
         (FIXED, _("Discount is a fixed amount off of the basket's total")),
@@ -791,10 +792,10 @@ class AbstractBenefit(BaseOfferMixin, models.Model):
         if range is None:
             range = self.range
         line_tuples = []
-        for line in basket.all_lines():
-            product = line.product
-
-            if not range.contains_product(product) or not self.can_apply_benefit(line):
+        for line in basket.get_offer_lines():
+            if not line.in_range(range):
+                continue
+            if not self.can_apply_benefit(line):
                 continue
 
             price = unit_price(offer, line)
@@ -934,15 +935,15 @@ class AbstractCondition(BaseOfferMixin, models.Model):
         """
         if not line.stockrecord_id:
             return False
-        product = line.product
-        return self.range.contains_product(product) and product.is_discountable
+        range_product_ids = line.basket.get_range_product_ids(self.range)
+        return line.product_id in range_product_ids and line.product.is_discountable
 
     def get_applicable_lines(self, offer, basket, most_expensive_first=True):
         """
         Return line data for the lines that can be consumed by this condition
         """
         line_tuples = []
-        for line in basket.all_lines():
+        for line in basket.get_offer_lines():
             if not self.can_apply_condition(line):
                 continue
 
@@ -1088,8 +1089,37 @@ class AbstractRange(models.Model):
     def contains_product(self, product):
         if self.proxy:
             return self.proxy.contains_product(product)
+        if settings.OSCAR_OFFERS_RANGE_MEMBERSHIP_ENABLED:
+            return self.product_memberships.filter(product_id=product.id).exists()
         return self.product_queryset.filter(id=product.id).exists()
 
+    def filter_products(self, product_ids):
+        """
+        Return the set of ids, out of the passed product ids, of the products
+        contained in this range.
+
+        This allows checking many products (e.g. all products in a basket)
+        with a single query, rather than calling ``contains_product`` for each
+        of them.
+        """
+        product_ids = set(product_ids)
+        if not product_ids:
+            return set()
+        if self.proxy:
+            if hasattr(self.proxy, "filter_products"):
+                return set(self.proxy.filter_products(product_ids))
+            Product = self.included_products.model
+            return {
+                product.id
+                for product in Product.objects.filter(id__in=product_ids)
+                if self.proxy.contains_product(product)
+            }
+        if settings.OSCAR_OFFERS_RANGE_MEMBERSHIP_ENABLED:
+            memberships = self.product_memberships.filter(product_id__in=product_ids)
+            return set(memberships.values_list("product_id", flat=True))
+        products = self.product_queryset.filter(id__in=product_ids)
+        return set(products.values_list("id", flat=True))
+
     def invalidate_cached_queryset(self):
         try:
             del self.product_queryset
@@ -1102,6 +1132,12 @@ class AbstractRange(models.Model):
             return self.proxy.num_products()
         if self.includes_all_products:
             return None
+        if settings.OSCAR_OFFERS_RANGE_MEMBERSHIP_ENABLED:
+            # Use the count annotated by RangeQuerySet.with_num_memberships()
+            # if available.
+            if hasattr(self, "num_memberships"):
+                return self.num_memberships
+            return self.product_memberships.count()
         return self.all_products().count()
 
     def all_products(self):
@@ -1176,6 +1212,29 @@ class AbstractRange(models.Model):
         # make sure to filter out duplicates originating from a join
         return qs.distinct()
 
+    def update_product_memberships(self):
+        """
+        Rebuild the materialised product memberships of this range.
+
+        Ranges delegating to a proxy class have no memberships as the proxy
+        decides which products it contains.
+        """
+        RangeProductMembership = self.product_memberships.model
+        self.invalidate_cached_queryset()
+        self.product_memberships.all().delete()
+        if self.proxy:
+            return
+        product_ids = self.product_queryset.values_list("id", flat=True)
+        RangeProductMembership.objects.bulk_create(
+            [
+                RangeProductMembership(range=self, product_id=product_id)
+                for product_id in product_ids.iterator()
+            ],
+            batch_size=1000,
+        )
+
+    update_product_memberships.alters_data = True
+
     @property
     def is_editable(self):
         """
@@ -1211,6 +1270,36 @@ class AbstractRangeProduct(models.Model):
         unique_together = ("range", "product")
 
 
+class AbstractRangeProductMembership(models.Model):
+    """
+    Materialised membership of a product in a range.
+
+    These rows are only maintained when OSCAR_OFFERS_RANGE_MEMBERSHIP_ENABLED
+    is set. They allow testing whether a range contains a product, and counting
+    the products in a range, without evaluating the range's product queryset.
+    """
+
+    range = models.ForeignKey(
+        "offer.Range",
+        on_delete=models.CASCADE,
+        related_name="product_memberships",
+        verbose_name=_("Range"),
+    )
+    product = models.ForeignKey(
+        "catalogue.Product",
+        on_delete=models.CASCADE,
+        related_name="range_memberships",
+        verbose_name=_("Product"),
+    )
+
+    class Meta:
+        abstract = True
+        app_label = "offer"
+        unique_together = ("range", "product")
+        verbose_name = _("Range product membership")
+        verbose_name_plural = _("Range product memberships")
+
+
 class AbstractRangeProductFileUpload(models.Model):
     range = models.ForeignKey(
         "offer.Range",
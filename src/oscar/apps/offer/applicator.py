@@ -1,10 +1,26 @@
 import logging
+import time
+from collections import namedtuple
+from decimal import Decimal as D
 from itertools import chain
 
-from oscar.core.loading import get_class, get_model
+from django.conf import settings
+from django.db import connection
+
+from oscar.apps.offer.signals import offer_evaluated
+from oscar.core.loading import get_class, get_classes, get_model
 
 logger = logging.getLogger("oscar.offers")
 OfferApplications = get_class("offer.results", "OfferApplications")
+OfferCatalogue = get_class("offer.catalogue", "OfferCatalogue")
+OfferEvaluationStats, QueryCounter = get_classes(
+    "offer.instrumentation", ["OfferEvaluationStats", "QueryCounter"]
+)
+
+OfferApplicationState = namedtuple(
+    "OfferApplicationState",
+    ["offer_ids", "lines", "line_keys", "footprints", "applications"],
+)
 
 
 class OfferApplicationError(Exception):
@@ -12,6 +28,10 @@ class OfferApplicationError(Exception):
 
 
 class Applicator(object):
+    # Process-local compiled site offers, shared by all applicator instances.
+    # Only used when OSCAR_OFFERS_CATALOGUE_ENABLED is set.
+    catalogue = OfferCatalogue()
+
     def apply(self, basket, user=None, request=None):
         """
         Apply all relevant offers to the given basket.
@@ -23,25 +43,217 @@ class Applicator(object):
         self.apply_offers(basket, offers)
 
     def apply_offers(self, basket, offers):
+        if settings.OSCAR_OFFERS_INCREMENTAL_APPLICATION:
+            self.apply_offers_incrementally(basket, offers)
+            return
+
         applications = OfferApplications()
         for offer in offers:
-            num_applications = 0
-            # Keep applying the offer until either
-            # (a) We reach the max number of applications for the offer.
-            # (b) The benefit can't be applied successfully.
-            while num_applications < offer.get_max_applications(basket.owner):
-                result = offer.apply_benefit(basket)
-                num_applications += 1
-                if not result.is_successful:
-                    break
-                applications.add(offer, result)
-                if result.is_final:
-                    break
+            self.apply_offer(basket, offer, applications)
 
         # Store this list of discounts with the basket so it can be
         # rendered in templates
         basket.offer_applications = applications
 
+    def apply_offer(self, basket, offer, applications):
+        """
+        Apply the offer to the basket as many times as possible, and return
+        the number of times its benefit was evaluated.
+        """
+        if settings.OSCAR_OFFERS_INSTRUMENTATION_ENABLED:
+            return self.apply_offer_instrumented(basket, offer, applications)
+        return self.apply_benefit(basket, offer, applications)
+
+    def apply_benefit(self, basket, offer, applications):
+        num_applications = 0
+        # Keep applying the offer until either
+        # (a) We reach the max number of applications for the offer.
+        # (b) The benefit can't be applied successfully.
+        while num_applications < offer.get_max_applications(basket.owner):
+            result = offer.apply_benefit(basket)
+            num_applications += 1
+            if not result.is_successful:
+                break
+            applications.add(offer, result)
+            if result.is_final:
+                break
+        return num_applications
+
+    def apply_offer_instrumented(self, basket, offer, applications):
+        """
+        Apply the offer while measuring the time and queries it takes, and
+        send the ``offer_evaluated`` signal with the results.
+        """
+        num_applied = self.get_num_applied(applications, offer)
+        query_counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(query_counter):
+            num_evaluations = self.apply_benefit(basket, offer, applications)
+        wall_time = time.perf_counter() - start
+
+        stats = OfferEvaluationStats(
+            wall_time=wall_time,
+            num_queries=query_counter.num_queries,
+            num_evaluations=num_evaluations,
+            num_applications=self.get_num_applied(applications, offer) - num_applied,
+            num_lines=self.get_num_lines_considered(basket, offer),
+        )
+        offer_evaluated.send(
+            sender=self.__class__, offer=offer, basket=basket, stats=stats
+        )
+        return num_evaluations
+
+    def apply_offers_incrementally(self, basket, offers):
+        """
+        Apply offers, only re-evaluating those affected by the changes made to
+        the basket since offers were last applied to it.
+
+        An offer is affected when its ranges contain the product of a line
+        that was added, removed or changed, or when it shares basket products
+        with another affected offer. The applications and line discounts of
+        all other offers are carried over from the last application, which
+        is stored with the basket as a picklable ``OfferApplicationState`` so
+        it can also be kept between requests (see ``BasketOfferCache``).
+        """
+        lines = list(basket.all_lines())
+        offers_by_id = {offer.id: offer for offer in offers}
+        offer_ids = [offer.id for offer in offers]
+        footprints = {
+            offer.id: self.get_offer_footprint(basket, offer) for offer in offers
+        }
+        line_keys = self.get_line_keys(lines)
+        previous = basket.offer_application_state
+        if previous is None or previous.offer_ids != offer_ids:
+            affected_offer_ids, affected_product_ids = set(offer_ids), None
+        else:
+            affected_offer_ids, affected_product_ids = self.get_affected_offers(
+                offers,
+                footprints,
+                previous.footprints,
+                self.get_changed_product_ids(previous.line_keys, line_keys),
+            )
+
+        for line in lines:
+            line.clear_discount()
+            if (
+                affected_product_ids is not None
+                and line.product_id not in affected_product_ids
+                and line.id in previous.lines
+            ):
+                line.discounts.set_state(previous.lines[line.id], offers_by_id)
+
+        applications = OfferApplications()
+        if affected_product_ids is not None:
+            previous_applications = OfferApplications()
+            previous_applications.set_state(previous.applications, offers_by_id)
+        for offer in offers:
+            if offer.id in affected_offer_ids:
+                self.apply_offer(basket, offer, applications)
+            else:
+                applications.add_from(previous_applications, offer)
+        basket.offer_applications = applications
+
+        basket.offer_application_state = OfferApplicationState(
+            offer_ids=offer_ids,
+            lines={line.id: line.discounts.get_state() for line in lines},
+            line_keys=line_keys,
+            footprints=footprints,
+            applications=applications.get_state(),
+        )
+
+    def get_num_applied(self, applications, offer):
+        application = applications.applications.get(offer.id)
+        return application["freq"] if application else 0
+
+    def get_num_lines_considered(self, basket, offer):
+        """
+        Return the number of basket lines within the offer's ranges.
+        """
+        product_ids = self.get_offer_footprint(basket, offer)
+        if product_ids is None:
+            return basket.num_lines
+        return len(
+            [line for line in basket.all_lines() if line.product_id in product_ids]
+        )
+
+    def get_offer_footprint(self, basket, offer):
+        """
+        Return the ids of the basket products that the offer's condition and
+        benefit ranges contain, or None if the offer may affect any line.
+        """
+        Benefit = get_model("offer", "Benefit")
+        condition, benefit = offer.condition, offer.benefit
+        if condition.proxy_class or benefit.proxy_class or condition.range is None:
+            return None
+        product_ids = set(basket.get_range_product_ids(condition.range))
+        if benefit.range is not None:
+            product_ids.update(basket.get_range_product_ids(benefit.range))
+        elif benefit.type not in Benefit.SHIPPING_TYPES:
+            return None
+        return product_ids
+
+    def get_line_keys(self, lines):
+        keys = {}
+        for line in lines:
+            price = line.purchase_info.price
+            keys[line.id] = (
+                line.product_id,
+                line.stockrecord_id,
+                line.quantity,
+                price.excl_tax,
+                price.incl_tax if price.is_tax_known else None,
+            )
+        return keys
+
+    def get_changed_product_ids(self, previous_line_keys, line_keys):
+        """
+        Return the ids of the products of the lines that were added, removed
+        or changed since the passed line keys were recorded.
+        """
+        product_ids = set()
+        for line_id in previous_line_keys.keys() | line_keys.keys():
+            previous_key = previous_line_keys.get(line_id)
+            key = line_keys.get(line_id)
+            if previous_key != key:
+                product_ids.update(k[0] for k in (previous_key, key) if k)
+        return product_ids
+
+    def get_affected_offers(self, offers, footprints, previous_footprints, product_ids):
+        """
+        Return the ids of the offers affected by changes to the passed
+        products, and the ids of the products those offers may affect in turn
+        (or None if they may affect any line).
+        """
+        affected_offer_ids = set()
+        product_ids = set(product_ids)
+        # Products that entered or left an offer's ranges (e.g. because a
+        # range was changed) are affected too
+        for offer in offers:
+            offer_footprints = (footprints[offer.id], previous_footprints[offer.id])
+            if None not in offer_footprints:
+                product_ids |= offer_footprints[0] ^ offer_footprints[1]
+        changed = bool(product_ids)
+        while changed:
+            changed = False
+            for offer in offers:
+                if offer.id in affected_offer_ids:
+                    continue
+                offer_footprints = (footprints[offer.id], previous_footprints[offer.id])
+                if None in offer_footprints:
+                    return {offer.id for offer in offers}, None
+                offer_product_ids = offer_footprints[0] | offer_footprints[1]
+                if offer_product_ids & product_ids:
+                    affected_offer_ids.add(offer.id)
+                    product_ids |= offer_product_ids
+                    changed = True
+        return affected_offer_ids, product_ids
+
+    def get_total_discount(self, applications):
+        return sum(
+            (application["discount"] for application in applications),
+            D("0.00"),
+        )
+
     def get_offers(self, basket, user=None, request=None):
         """
         Return all offers to apply to the basket.
@@ -67,6 +279,8 @@ class Applicator(object):
         """
         Return site offers that are available to all users
         """
+        if settings.OSCAR_OFFERS_CATALOGUE_ENABLED:
+            return self.catalogue.get_site_offers()
         ConditionalOffer = get_model("offer", "ConditionalOffer")
         qs = ConditionalOffer.active.filter(offer_type=ConditionalOffer.SITE)
         # Using select_related with the condition/benefit ranges doesn't seem
@@ -108,3 +322,161 @@ class Applicator(object):
         Eg: visitors coming from an affiliate site get a 10% discount
         """
         return []
+
+
+class OfferSearchTimeout(Exception):
+    pass
+
+
+class OptimalApplicator(Applicator):
+    """
+    An applicator that searches for the order in which to apply offers that
+    gives the customer the biggest discount.
+
+    The greedy application by priority is used as a starting point. Then
+    sequences of offers are explored depth first, skipping any sequence that
+    can't beat the best discount found so far. An offer can't discount more
+    than the value of the basket lines its benefit applies to, so a sequence
+    is skipped once the best discount found is at least its discount plus the
+    value of the lines the remaining offers apply to. When the search
+    completes, the result is the best of all the orders in which the offers
+    can be applied. It stops early when ``OSCAR_OFFERS_OPTIMAL_TIME_BUDGET``
+    runs out, keeping the best applications found so far, which may not be
+    the best possible. Baskets with fewer than
+    ``OSCAR_OFFERS_OPTIMAL_MIN_LINES`` lines are always applied greedily.
+
+    Only the greedy application sends the ``offer_evaluated`` signal, so the
+    statistics of offers aren't inflated by the search.
+
+    To use it, fork the offer app and set ``Applicator = OptimalApplicator``
+    in its ``applicator`` module.
+    """
+
+    def apply_offers(self, basket, offers):
+        lines = list(basket.all_lines())
+        if len(offers) < 2 or len(lines) < settings.OSCAR_OFFERS_OPTIMAL_MIN_LINES:
+            super().apply_offers(basket, offers)
+            return
+
+        self.deadline = time.perf_counter() + settings.OSCAR_OFFERS_OPTIMAL_TIME_BUDGET
+        self.offers_by_id = {offer.id: offer for offer in offers}
+
+        # Start with the greedy application, so the result is never worse
+        self.best = self.apply_sequence(basket, lines, offers, self.apply_offer)
+        # Offers whose benefit can't discount lines (e.g. shipping offers)
+        # aren't searched, and are applied after the best sequence found.
+        # Offers that don't discount the basket on their own are still
+        # searched, as they may once other offers have consumed some lines.
+        searched_offers = [offer for offer in offers if self.discounts_lines(offer)]
+        try:
+            self.max_discounts = {
+                offer.id: self.get_max_discount(basket, lines, offer)
+                for offer in searched_offers
+            }
+            self.search(
+                basket, lines, self.apply_sequence(basket, lines, []), searched_offers
+            )
+        except OfferSearchTimeout:
+            logger.info(
+                "Time budget exceeded searching offers for basket #%s", basket.id
+            )
+
+        self.restore(basket, lines, self.best[1])
+        applications = basket.offer_applications
+        for offer in offers:
+            if offer not in searched_offers:
+                self.apply_offer(basket, offer, applications)
+        # Discounts were replaced, so there's nothing to carry over
+        basket.offer_application_state = None
+
+    def discounts_lines(self, offer):
+        """
+        Return whether the offer's benefit can discount basket lines, which
+        shipping benefits can't.
+        """
+        ShippingBenefit = get_class("offer.benefits", "ShippingBenefit")
+        return not isinstance(offer.benefit.proxy(), ShippingBenefit)
+
+    def search(self, basket, lines, node, offers):
+        """
+        Try extending the sequence of offers applied in ``node`` with each of
+        the passed offers in turn, recording the best result found.
+        """
+        discount, state = node
+        if discount > self.best[0]:
+            self.best = node
+        bound = discount + sum(self.max_discounts[offer.id] for offer in offers)
+        if bound <= self.best[0]:
+            return
+
+        for offer in offers:
+            if time.perf_counter() > self.deadline:
+                raise OfferSearchTimeout
+            self.restore(basket, lines, state)
+            applications = basket.offer_applications
+            self.apply_benefit(basket, offer, applications)
+            child_state = self.get_state(basket, lines)
+            if child_state == state:
+                # The offer can't be applied at this point. Sequences applying
+                # it later are explored from the other branches.
+                continue
+            remaining = [o for o in offers if o is not offer]
+            self.search(
+                basket,
+                lines,
+                (self.get_total_discount(applications), child_state),
+                remaining,
+            )
+
+    def apply_sequence(self, basket, lines, offers, apply=None):
+        """
+        Apply the passed offers in order to a basket without discounts, and
+        return the total discount and the resulting state.
+        """
+        apply = apply or self.apply_benefit
+        for line in lines:
+            line.clear_discount()
+        applications = OfferApplications()
+        for offer in offers:
+            apply(basket, offer, applications)
+        basket.offer_applications = applications
+        return (self.get_total_discount(applications), self.get_state(basket, lines))
+
+    def get_max_discount(self, basket, lines, offer):
+        """
+        Return the most the offer can discount, whichever offers were applied
+        before it: the value of the basket lines its benefit applies to.
+        """
+        Benefit = get_model("offer", "Benefit")
+        unit_price = get_class("offer.utils", "unit_price")
+        benefit = offer.benefit
+        if benefit.type == Benefit.FIXED_PRICE:
+            # Fixed price benefits discount the condition range
+            rng = offer.condition.range
+        elif benefit.proxy_class:
+            rng = None
+        else:
+            rng = benefit.range
+        product_ids = None if rng is None else basket.get_range_product_ids(rng)
+        max_discount = D("0.00")
+        for line in lines:
+            if product_ids is None or line.product_id in product_ids:
+                price = unit_price(offer, line)
+                if price:
+                    max_discount += price * line.quantity
+        return max_discount
+
+    def get_state(self, basket, lines):
+        return (
+            basket.offer_applications.get_state(),
+            [line.discounts.get_state() for line in lines],
+        )
+
+    def restore(self, basket, lines, state):
+        applications_state, line_states = state
+        applications = OfferApplications()
+        applications.set_state(applications_state, self.offers_by_id)
+        basket.offer_applications = applications
+        for line, line_state in zip(lines, line_states):
+            line.clear_discount()
+            line.discounts.set_state(line_state, self.offers_by_id)
@@ -0,0 +1,126 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from oscar.core.loading import get_class
+
+Applicator = get_class("offer.applicator", "Applicator")
+
+
+class BasketOfferCache(object):
+    """
+    Caches the offers applied to a basket between requests.
+
+    The offer applications and line discounts of a basket are stored in the
+    default cache, keyed by a hash of the basket's contents and the offer
+    catalogue version, and restored instead of being recalculated as long as
+    neither changes.
+    """
+
+    key_prefix = "oscar_basket_offers"
+
+    def __init__(self, applicator=None):
+        self.applicator = applicator or Applicator()
+
+    def apply(self, basket, user=None, request=None):
+        """
+        Apply all relevant offers to the given basket, restoring them from the
+        cache when possible.
+        """
+        offers = self.applicator.get_offers(basket, user, request)
+        key = self.get_key(basket, offers, user)
+        state = cache.get(key)
+        if state is not None and self.restore(basket, offers, state):
+            return
+        if settings.OSCAR_OFFERS_INCREMENTAL_APPLICATION:
+            self.apply_incrementally(basket, offers, user)
+        else:
+            self.applicator.apply_offers(basket, offers)
+        cache.set(
+            key, self.get_state(basket), settings.OSCAR_OFFERS_BASKET_CACHE_TIMEOUT
+        )
+
+    def apply_incrementally(self, basket, offers, user=None):
+        """
+        Apply offers incrementally, starting from the offer application state
+        stored for the basket on an earlier request, and store the new state.
+        """
+        key = self.get_application_state_key(basket, user)
+        if basket.offer_application_state is None:
+            basket.offer_application_state = cache.get(key)
+        self.applicator.apply_offers(basket, offers)
+        if basket.offer_application_state is None:
+            cache.delete(key)
+        else:
+            cache.set(
+                key,
+                basket.offer_application_state,
+                settings.OSCAR_OFFERS_BASKET_CACHE_TIMEOUT,
+            )
+
+    def get_application_state_key(self, basket, user=None):
+        """
+        Return the cache key for the offer application state of the basket,
+        which is kept across changes to its contents.
+        """
+        return "%s_state_%s_%s_%s" % (
+            self.key_prefix,
+            basket.id,
+            getattr(user, "pk", None),
+            self.applicator.catalogue.get_version(),
+        )
+
+    def get_key(self, basket, offers, user=None):
+        """
+        Return the cache key for the basket's current contents and offers.
+        """
+        lines = []
+        for line in basket.all_lines():
+            price = line.purchase_info.price
+            lines.append(
+                (
+                    line.id,
+                    line.quantity,
+                    line.stockrecord_id,
+                    price.excl_tax,
+                    price.incl_tax if price.is_tax_known else None,
+                )
+            )
+        parts = (
+            basket.id,
+            getattr(user, "pk", None),
+            tuple(offer.id for offer in offers),
+            tuple(lines),
+            tuple(basket.vouchers.values_list("id", flat=True).order_by("id")),
+            self.applicator.catalogue.get_version(),
+        )
+        digest = hashlib.md5(repr(parts).encode("utf8")).hexdigest()
+        return "%s_%s" % (self.key_prefix, digest)
+
+    def get_state(self, basket):
+        return {
+            "applications": basket.offer_applications.get_state(),
+            "lines": {
+                line.id: line.discounts.get_state() for line in basket.all_lines()
+            },
+        }
+
+    def restore(self, basket, offers, state):
+        """
+        Restore the offer applications and line discounts of the basket.
+
+        Returns False if the cached state refers to offers which are no longer
+        available, in which case offers need to be applied again.
+        """
+        offers = {offer.id: offer for offer in offers}
+        offer_ids = {offer_id for offer_id, *__ in state["applications"]}
+        for line_state in state["lines"].values():
+            offer_ids.update(line_state["consumptions"])
+        if not offer_ids.issubset(offers):
+            return False
+
+        basket.offer_applications.set_state(state["applications"], offers)
+        for line in basket.all_lines():
+            line.discounts.set_state(state["lines"][line.id], offers)
+        return True
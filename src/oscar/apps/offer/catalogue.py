@@ -0,0 +1,150 @@
+import copy
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.timezone import now
+
+from oscar.core.loading import get_model
+
+
+class OfferCatalogue(object):
+    """
+    A process-local, compiled copy of the site offers.
+
+    Offers are loaded together with their conditions, benefits and ranges
+    and have their condition and benefit proxies resolved once.  The compiled
+    offers are only rebuilt when the shared catalogue version (stored in the
+    Django cache) changes, which happens whenever an offer, condition, benefit
+    or range is saved or deleted.
+
+    The version is shared through the default cache, so a cache backend that
+    is shared between processes is required when running more than one
+    process.
+    """
+
+    version_cache_key = "oscar_offer_catalogue_version"
+
+    def __init__(self):
+        self._compiled = (None, [])
+
+    # =======
+    # Version
+    # =======
+
+    @classmethod
+    def bump_version(cls):
+        """
+        Invalidate all compiled catalogues, once the current transaction has
+        been committed.
+        """
+        transaction.on_commit(
+            lambda: cache.set(cls.version_cache_key, uuid4().hex, None)
+        )
+
+    def get_version(self):
+        """
+        Return the current version of the catalogue
+        """
+        version = cache.get(self.version_cache_key)
+        if version is None:
+            # The version has never been set or has been evicted.  Use add() so
+            # concurrent processes end up agreeing on the same version.
+            cache.add(self.version_cache_key, uuid4().hex, None)
+            version = cache.get(self.version_cache_key)
+        return version
+
+    # =======
+    # Offers
+    # =======
+
+    def get_site_offers(self):
+        """
+        Return fresh copies of the currently active site offers.
+
+        Copies are returned so that per-basket state stored on offers and
+        their proxies never leaks between requests.
+        """
+        ranges = {}
+        return [
+            self.copy_offer(offer, ranges)
+            for offer in self.get_compiled_offers()
+            if self.is_offer_active(offer)
+        ]
+
+    def get_compiled_offers(self):
+        version = self.get_version()
+        compiled_version, offers = self._compiled
+        if version is None or version != compiled_version:
+            offers = self.compile()
+            self._compiled = (version, offers)
+        return offers
+
+    def get_next_change(self, test_date=None):
+        """
+        Return when the next site offer starts or ends, or None if none will.
+        """
+        if test_date is None:
+            test_date = now()
+        dates = [
+            date
+            for offer in self.get_compiled_offers()
+            for date in (offer.start_datetime, offer.end_datetime)
+            if date and date > test_date
+        ]
+        return min(dates, default=None)
+
+    def get_queryset(self):
+        ConditionalOffer = get_model("offer", "ConditionalOffer")
+        return ConditionalOffer.objects.filter(
+            offer_type=ConditionalOffer.SITE, status=ConditionalOffer.OPEN
+        ).select_related("condition__range", "benefit__range")
+
+    def compile(self):
+        """
+        Load the site offers and resolve their condition and benefit proxies.
+        """
+        offers = list(self.get_queryset())
+        for offer in offers:
+            offer.condition = self.resolve_proxy(offer.condition)
+            offer.benefit = self.resolve_proxy(offer.benefit)
+        return offers
+
+    def resolve_proxy(self, instance):
+        proxy = instance.proxy()
+        if proxy is instance or not isinstance(proxy, instance.__class__):
+            return instance
+        # Proxies are built from the instance's field values only, so carry
+        # over the already loaded range to avoid querying for it again.
+        if instance.range_id is not None:
+            proxy.range = instance.range
+        return proxy
+
+    def is_offer_active(self, offer, test_date=None):
+        """
+        Test whether the offer is within its date range, mirroring
+        ``ConditionalOffer.active``.
+        """
+        if test_date is None:
+            test_date = now()
+        if offer.start_datetime and offer.start_datetime > test_date:
+            return False
+        if offer.end_datetime and offer.end_datetime < test_date:
+            return False
+        return True
+
+    def copy_offer(self, offer, ranges):
+        offer = copy.copy(offer)
+        offer.condition = self.copy_with_range(offer.condition, ranges)
+        offer.benefit = self.copy_with_range(offer.benefit, ranges)
+        return offer
+
+    def copy_with_range(self, instance, ranges):
+        instance = copy.copy(instance)
+        if instance.range_id is not None:
+            # Offers sharing a range share the copy, so the range's product
+            # queryset is only built once per request.
+            if instance.range_id not in ranges:
+                ranges[instance.range_id] = copy.copy(instance.range)
+            instance.range = ranges[instance.range_id]
+        return instance
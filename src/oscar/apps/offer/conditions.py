@@ -46,7 +46,7 @@ class CountCondition(Condition):
         Determines whether a given basket meets this condition
         """
         num_matches = 0
-        for line in basket.all_lines():
+        for line in basket.get_offer_lines():
             if self.can_apply_condition(line):
                 num_matches += line.quantity_without_offer_discount(offer)
             if num_matches >= self.value:
@@ -57,7 +57,7 @@ class CountCondition(Condition):
         if hasattr(self, "_num_matches"):
             return getattr(self, "_num_matches")
         num_matches = 0
-        for line in basket.all_lines():
+        for line in basket.get_offer_lines():
             if self.can_apply_condition(line):
                 num_matches += line.quantity_available_for_offer(offer)
         # pylint: disable=W0201
@@ -138,7 +138,7 @@ class CoverageCondition(Condition):
         Determines whether a given basket meets this condition
         """
         covered_ids = []
-        for line in basket.all_lines():
+        for line in basket.get_offer_lines():
             if not line.is_available_for_offer_discount(offer):
                 continue
             product = line.product
@@ -150,7 +150,7 @@ class CoverageCondition(Condition):
 
     def _get_num_covered_products(self, basket, offer):
         covered_ids = set()
-        for line in basket.all_lines():
+        for line in basket.get_offer_lines():
             product = line.product
             if (
                 self.can_apply_condition(line)
@@ -186,7 +186,7 @@ class CoverageCondition(Condition):
         if to_consume == 0:
             return
 
-        for line in basket.all_lines():
+        for line in basket.get_offer_lines():
             product = line.product
             if not self.can_apply_condition(line):
                 continue
@@ -204,7 +204,7 @@ class CoverageCondition(Condition):
     def get_value_of_satisfying_items(self, offer, basket):
         covered_ids = []
         value = D("0.00")
-        for line in basket.all_lines():
+        for line in basket.get_offer_lines():
             if self.can_apply_condition(line) and line.product.id not in covered_ids:
                 covered_ids.append(line.product.id)
                 value += unit_price(offer, line)
@@ -246,7 +246,7 @@ class ValueCondition(Condition):
         Determine whether a given basket meets this condition
         """
         value_of_matches = D("0.00")
-        for line in basket.all_lines():
+        for line in basket.get_offer_lines():
             if (
                 self.can_apply_condition(line)
                 and line.quantity_without_offer_discount(offer) > 0
@@ -263,7 +263,7 @@ class ValueCondition(Condition):
         if hasattr(self, "_value_of_matches"):
             return getattr(self, "_value_of_matches")
         value_of_matches = D("0.00")
-        for line in basket.all_lines():
+        for line in basket.get_offer_lines():
             if self.can_apply_condition(line):
                 price = unit_price(offer, line)
                 value_of_matches += price * int(
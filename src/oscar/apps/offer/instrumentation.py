@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+from django.core.cache import cache
+
+OfferEvaluationStats = namedtuple(
+    "OfferEvaluationStats",
+    ["wall_time", "num_queries", "num_evaluations", "num_applications", "num_lines"],
+)
+
+
+class QueryCounter(object):
+    """
+    Database execute wrapper which counts the queries run through it.
+    """
+
+    def __init__(self):
+        self.num_queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.num_queries += 1
+        return execute(sql, params, many, context)
+
+
+class OfferStatistics(object):
+    """
+    Aggregates the evaluation statistics of offers in the default cache, so
+    they can be shown in the dashboard.
+
+    Statistics are buffered in the current thread, and added to the cached
+    totals when the request finishes, once ``flush_threshold`` evaluations
+    have been buffered, or once the buffer is ``flush_interval`` seconds old,
+    so recording them costs no cache round trips while offers are applied.
+    Buffers of code that runs outside of requests, like management commands
+    or task queues, are flushed by the age limit and when the process exits.
+
+    The totals of each offer are stored under a single key, and are read and
+    written with one ``get_many`` and one ``set_many`` call per flush. As
+    they aren't updated atomically, concurrent flushes can lose some counts,
+    which is acceptable for statistics.
+    """
+
+    key_prefix = "oscar_offer_statistics"
+    counters = (
+        "count",
+        "wall_time_us",
+        "num_queries",
+        "num_evaluations",
+        "num_applications",
+        "num_lines",
+    )
+    flush_threshold = 100
+    flush_interval = 60
+
+    _buffer = threading.local()
+
+    def get_key(self, offer_id):
+        return "%s_%s" % (self.key_prefix, offer_id)
+
+    def get_buffer(self):
+        if not hasattr(self._buffer, "totals"):
+            self.reset_buffer()
+        return self._buffer
+
+    def reset_buffer(self):
+        self._buffer.totals = {}
+        self._buffer.num_evaluations = 0
+        self._buffer.date_created = time.monotonic()
+
+    def record(self, offer, stats):
+        buffer = self.get_buffer()
+        totals = buffer.totals.setdefault(
+            offer.id, dict.fromkeys(self.counters + ("max_wall_time_us",), 0)
+        )
+        wall_time_us = int(stats.wall_time * 1000000)
+        totals["count"] += 1
+        totals["wall_time_us"] += wall_time_us
+        totals["max_wall_time_us"] = max(totals["max_wall_time_us"], wall_time_us)
+        for field in (
+            "num_queries",
+            "num_evaluations",
+            "num_applications",
+            "num_lines",
+        ):
+            totals[field] += getattr(stats, field)
+        buffer.num_evaluations += 1
+        if (
+            buffer.num_evaluations >= self.flush_threshold
+            or time.monotonic() - buffer.date_created >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self):
+        """
+        Add the buffered statistics to the totals in the cache
+        """
+        buffered = self.get_buffer().totals
+        self.reset_buffer()
+        if not buffered:
+            return
+        keys = {self.get_key(offer_id): offer_id for offer_id in buffered}
+        current = cache.get_many(keys)
+        updated = {}
+        for key, offer_id in keys.items():
+            totals = dict(current.get(key, {}))
+            for field in self.counters:
+                totals[field] = totals.get(field, 0) + buffered[offer_id][field]
+            totals["max_wall_time_us"] = max(
+                totals.get("max_wall_time_us", 0),
+                buffered[offer_id]["max_wall_time_us"],
+            )
+            updated[key] = totals
+        cache.set_many(updated, None)
+
+    def get_many(self, offer_ids):
+        """
+        Return a dict of the average statistics of the passed offers, keyed by
+        offer id. Offers that haven't been evaluated are left out.
+        """
+        self.flush()
+        keys = {self.get_key(offer_id): offer_id for offer_id in offer_ids}
+        statistics = {}
+        for key, offer_totals in cache.get_many(keys).items():
+            count = offer_totals.get("count")
+            if not count:
+                continue
+            offer_totals = defaultdict(int, offer_totals)
+            statistics[keys[key]] = {
+                "count": count,
+                "avg_time_ms": offer_totals["wall_time_us"] / 1000 / count,
+                "max_time_ms": offer_totals["max_wall_time_us"] / 1000,
+                "avg_queries": offer_totals["num_queries"] / count,
+                "avg_evaluations": offer_totals["num_evaluations"] / count,
+                "avg_applications": offer_totals["num_applications"] / count,
+                "avg_lines": offer_totals["num_lines"] / count,
+            }
+        return statistics
+
+    def clear(self, offer_ids):
+        cache.delete_many([self.get_key(offer_id) for offer_id in offer_ids])
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.16 on 2026-10-17 04:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from django.utils.module_loading import import_string
+from django.conf import settings
+
+models_AutoField = import_string(settings.DEFAULT_AUTO_FIELD)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("catalogue", "0028_product_priority"),
+        ("offer", "0013_range_excluded_categories"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RangeProductMembership",
+            fields=[
+                (
+                    "id",
+                    models_AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="range_memberships",
+                        to="catalogue.product",
+                        verbose_name="Product",
+                    ),
+                ),
+                (
+                    "range",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="product_memberships",
+                        to="offer.range",
+                        verbose_name="Range",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Range product membership",
+                "verbose_name_plural": "Range product memberships",
+                "abstract": False,
+                "unique_together": {("range", "product")},
+            },
+        ),
+    ]
@@ -84,3 +84,77 @@ class RangeQuerySet(models.query.QuerySet):
             includes_all_products=False,
         )
         return wide | narrow
+
+    def with_num_memberships(self):
+        """
+        Annotate the number of materialised product memberships, which
+        ``Range.num_products`` uses when range memberships are enabled.
+        """
+        return self.annotate(num_memberships=models.Count("product_memberships"))
+
+    def may_contain_products(self, product_ids):
+        """
+        Return the ranges whose rules can match the given products or their
+        child products, or which contain them already. Other ranges don't
+        need their memberships of these products to be updated.
+        """
+        Product = self.model.included_products.field.related_model
+        ProductCategory = Product.categories.through
+        parent_ids = (
+            Product.objects.filter(id__in=product_ids)
+            .exclude(parent=None)
+            .values("parent_id")
+        )
+        products = Product.objects.filter(
+            models.Q(id__in=product_ids) | models.Q(id__in=parent_ids)
+        )
+        category_ids = ProductCategory.objects.filter(product__in=products).values(
+            "category_id"
+        )
+        return self.filter(
+            models.Q(includes_all_products=True)
+            | models.Q(included_products__in=products)
+            | models.Q(included_products__parent_id__in=product_ids)
+            | models.Q(classes__products__in=products)
+            | models.Q(
+                included_categories__in=ExpandUpwardsCategoryQueryset(category_ids)
+            )
+            | models.Q(product_memberships__product_id__in=product_ids)
+            | models.Q(product_memberships__product__parent_id__in=product_ids)
+        ).distinct()
+
+    def update_product_memberships(self, product_ids):
+        """
+        Synchronise the materialised memberships of the given products, and
+        of their child products, with the ranges in this queryset.
+        """
+        Product = self.model.included_products.field.related_model
+        RangeProductMembership = self.model.product_memberships.rel.related_model
+
+        product_ids = set(product_ids)
+        product_ids.update(
+            Product.objects.filter(parent_id__in=product_ids).values_list(
+                "id", flat=True
+            )
+        )
+        if not product_ids:
+            return
+
+        ranges = list(self)
+        memberships = []
+        for rng in ranges:
+            if rng.proxy:
+                continue
+            rng.invalidate_cached_queryset()
+            member_ids = rng.product_queryset.filter(id__in=product_ids).values_list(
+                "id", flat=True
+            )
+            memberships.extend(
+                RangeProductMembership(range=rng, product_id=product_id)
+                for product_id in member_ids
+            )
+
+        RangeProductMembership.objects.filter(
+            range__in=ranges, product_id__in=product_ids
+        ).delete()
+        RangeProductMembership.objects.bulk_create(memberships, batch_size=1000)
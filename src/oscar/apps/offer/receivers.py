@@ -1,11 +1,26 @@
-from django.db.models.signals import post_delete
+import atexit
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
-from oscar.core.loading import get_model
+from oscar.apps.offer.signals import offer_evaluated
+from oscar.core.loading import get_class, get_model
 
 ConditionalOffer = get_model("offer", "ConditionalOffer")
 Condition = get_model("offer", "Condition")
 Benefit = get_model("offer", "Benefit")
+Range = get_model("offer", "Range")
+RangeProduct = get_model("offer", "RangeProduct")
+Product = get_model("catalogue", "Product")
+ProductCategory = get_model("catalogue", "ProductCategory")
+OfferCatalogue = get_class("offer.catalogue", "OfferCatalogue")
+OfferStatistics = get_class("offer.instrumentation", "OfferStatistics")
+PurchaseInfoCache = get_class("partner.cache", "PurchaseInfoCache")
+
+POST_M2M_ACTIONS = ("post_add", "post_remove", "post_clear")
 
 
 @receiver(post_delete, sender=ConditionalOffer)
@@ -29,3 +44,216 @@ def delete_unused_related_conditions_and_benefits(instance, **kwargs):
         # Only delete if not using a proxy, and not used by other offers
         if benefit.proxy_class == "" and not benefit.offers.exists():
             benefit.delete()
+
+
+def offer_caches_enabled(**kwargs):
+    return not kwargs.get("raw") and (
+        settings.OSCAR_OFFERS_CATALOGUE_ENABLED
+        or settings.OSCAR_OFFERS_BASKET_CACHE_ENABLED
+        or settings.OSCAR_BASKET_SUMMARY_CACHE_ENABLED
+        or settings.OSCAR_PURCHASE_INFO_CACHE_ENABLED
+    )
+
+
+# pylint: disable=unused-argument
+@receiver(post_save, dispatch_uid="invalidate_offer_catalogue_on_save")
+@receiver(post_delete, dispatch_uid="invalidate_offer_catalogue_on_delete")
+def invalidate_offer_catalogue(sender, **kwargs):
+    # Conditions and benefits are usually saved through their proxy classes,
+    # so compare against the concrete models rather than filtering on sender.
+    if not offer_caches_enabled(**kwargs):
+        return
+    if sender._meta.concrete_model in (
+        ConditionalOffer,
+        Condition,
+        Benefit,
+        Range,
+        RangeProduct,
+    ):
+        OfferCatalogue.bump_version()
+        if settings.OSCAR_PURCHASE_INFO_CACHE_ENABLED:
+            # Strategies may take offers into account when pricing products
+            PurchaseInfoCache.bump_version()
+
+
+@receiver(post_save, sender=Product, dispatch_uid="invalidate_product_ranges_on_save")
+@receiver(
+    post_save, sender=ProductCategory, dispatch_uid="invalidate_category_ranges_on_save"
+)
+@receiver(
+    post_delete,
+    sender=ProductCategory,
+    dispatch_uid="invalidate_category_ranges_on_delete",
+)
+def invalidate_product_ranges(sender, **kwargs):
+    """
+    Invalidate the cached offers when a product's class or categories change,
+    as they determine which ranges contain it.
+    """
+    if offer_caches_enabled(**kwargs):
+        OfferCatalogue.bump_version()
+
+
+def invalidate_range_contents(sender, action, **kwargs):
+    # Sent once the relations have been saved, so caches aren't refilled with
+    # the old range contents in between (e.g. when a range is saved through a
+    # form, which saves its many-to-many relations after the range itself).
+    if action in POST_M2M_ACTIONS and offer_caches_enabled():
+        OfferCatalogue.bump_version()
+
+
+for through in [
+    Product.categories.through,
+    Range.included_products.through,
+    Range.excluded_products.through,
+    Range.classes.through,
+    Range.included_categories.through,
+    Range.excluded_categories.through,
+]:
+    m2m_changed.connect(
+        invalidate_range_contents,
+        sender=through,
+        dispatch_uid="invalidate_range_contents_%s" % through._meta.model_name,
+    )
+
+
+@receiver(offer_evaluated, dispatch_uid="record_offer_statistics")
+def record_offer_statistics(sender, offer, stats, **kwargs):
+    OfferStatistics().record(offer, stats)
+
+
+@receiver(request_finished, dispatch_uid="flush_offer_statistics")
+def flush_offer_statistics(sender, **kwargs):
+    if settings.OSCAR_OFFERS_INSTRUMENTATION_ENABLED:
+        OfferStatistics().flush()
+
+
+@atexit.register
+def flush_offer_statistics_at_exit():
+    # Management commands and task workers never finish a request
+    if settings.OSCAR_OFFERS_INSTRUMENTATION_ENABLED:
+        OfferStatistics().flush()
+
+
+# Range product memberships
+# -------------------------
+
+
+def range_memberships_enabled(**kwargs):
+    return settings.OSCAR_OFFERS_RANGE_MEMBERSHIP_ENABLED and not kwargs.get("raw")
+
+
+def is_deleting(model, origin):
+    """
+    Test whether the deletion of an instance or queryset of the given model
+    caused a cascading delete. Memberships of products or ranges being
+    deleted must not be re-created.
+    """
+    return isinstance(origin, model) or getattr(origin, "model", None) is model
+
+
+def rebuild_range_memberships(ranges):
+    for rng in ranges:
+        rng.update_product_memberships()
+
+
+@receiver(post_save, sender=Product, dispatch_uid="update_product_memberships")
+def update_product_memberships(sender, instance, **kwargs):
+    if range_memberships_enabled(**kwargs):
+        Range.objects.may_contain_products([instance.pk]).update_product_memberships(
+            [instance.pk]
+        )
+
+
+@receiver(post_save, sender=ProductCategory, dispatch_uid="save_product_category")
+@receiver(post_delete, sender=ProductCategory, dispatch_uid="delete_product_category")
+@receiver(post_save, sender=RangeProduct, dispatch_uid="save_range_product")
+@receiver(post_delete, sender=RangeProduct, dispatch_uid="delete_range_product")
+def update_related_product_memberships(sender, instance, **kwargs):
+    if not range_memberships_enabled(**kwargs):
+        return
+    origin = kwargs.get("origin")
+    if is_deleting(Product, origin) or is_deleting(Range, origin):
+        return
+    ranges = Range.objects.all()
+    if sender is RangeProduct:
+        ranges = ranges.filter(pk=instance.range_id)
+    ranges.update_product_memberships([instance.product_id])
+
+
+@receiver(
+    m2m_changed,
+    sender=Product.categories.through,
+    dispatch_uid="update_product_categories_memberships",
+)
+def update_product_categories_memberships(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if not range_memberships_enabled() or action not in POST_M2M_ACTIONS:
+        return
+    if not reverse:
+        Range.objects.update_product_memberships([instance.pk])
+    elif pk_set is not None:
+        Range.objects.update_product_memberships(pk_set)
+    else:
+        # The category was removed from all of its products, which are no
+        # longer known at this point.
+        rebuild_range_memberships(
+            Range.objects.filter(
+                Q(included_categories__isnull=False)
+                | Q(excluded_categories__isnull=False)
+            ).distinct()
+        )
+
+
+def update_range_products_memberships(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    # Products added with add() or set() are inserted with bulk_create, which
+    # doesn't send post_save for the through model
+    if not range_memberships_enabled() or action not in POST_M2M_ACTIONS:
+        return
+    if not reverse:
+        if pk_set is None:
+            rebuild_range_memberships([instance])
+        else:
+            Range.objects.filter(pk=instance.pk).update_product_memberships(pk_set)
+    elif pk_set is None:
+        Range.objects.update_product_memberships([instance.pk])
+    else:
+        Range.objects.filter(pk__in=pk_set).update_product_memberships([instance.pk])
+
+
+for field_name in ["included_products", "excluded_products"]:
+    m2m_changed.connect(
+        update_range_products_memberships,
+        sender=getattr(Range, field_name).through,
+        dispatch_uid="update_%s_memberships" % field_name,
+    )
+
+
+def rebuild_changed_range_memberships(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if not range_memberships_enabled() or action not in POST_M2M_ACTIONS:
+        return
+    if not reverse:
+        rebuild_range_memberships([instance])
+    elif pk_set is not None:
+        rebuild_range_memberships(Range.objects.filter(pk__in=pk_set))
+    else:
+        rebuild_range_memberships(Range.objects.all())
+
+
+for field_name in ["classes", "included_categories", "excluded_categories"]:
+    m2m_changed.connect(
+        rebuild_changed_range_memberships,
+        sender=getattr(Range, field_name).through,
+        dispatch_uid="rebuild_%s_memberships" % field_name,
+    )
+
+
+@receiver(post_save, sender=Range, dispatch_uid="rebuild_range_memberships")
+def rebuild_saved_range_memberships(sender, instance, **kwargs):
+    if range_memberships_enabled(**kwargs):
+        instance.update_product_memberships()
@@ -35,6 +35,47 @@ class OfferApplications(object):
         self.applications[offer.id]["discount"] += result.discount
         self.applications[offer.id]["freq"] += 1
 
+    def add_from(self, applications, offer):
+        """
+        Copy the application of the passed offer from another collection of
+        offer applications, if it has one.
+        """
+        if offer.id in applications.applications:
+            self.applications[offer.id] = dict(applications.applications[offer.id])
+
+    def get_state(self):
+        """
+        Return a picklable representation of the applications, which refers
+        to offers by their ids.
+        """
+        return [
+            (
+                application["offer"].id,
+                application["result"],
+                application["freq"],
+                application["discount"],
+            )
+            for application in self.applications.values()
+        ]
+
+    def set_state(self, state, offers):
+        """
+        Restore the applications from a representation returned by
+        ``get_state``, using the passed dict of offers keyed by id.
+        """
+        self.applications = {}
+        for offer_id, result, freq, discount in state:
+            offer = offers[offer_id]
+            self.applications[offer_id] = {
+                "offer": offer,
+                "result": result,
+                "name": offer.name,
+                "description": result.description,
+                "voucher": offer.get_voucher(),
+                "freq": freq,
+                "discount": discount,
+            }
+
     @property
     def offer_discounts(self):
         """
@@ -0,0 +1,3 @@
+import django.dispatch
+
+offer_evaluated = django.dispatch.Signal()
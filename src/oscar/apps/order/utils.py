@@ -7,6 +7,7 @@ from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 
 from oscar.apps.order.signals import order_placed
+from oscar.apps.partner.exceptions import InsufficientStock
 from oscar.core.loading import get_class, get_model
 
 from . import exceptions
@@ -19,6 +20,8 @@ CommunicationEvent = get_model("order", "CommunicationEvent")
 CommunicationEventType = get_model("communication", "CommunicationEventType")
 Dispatcher = get_class("communication.utils", "Dispatcher")
 Surcharge = get_model("order", "Surcharge")
+StockRecord = get_model("partner", "StockRecord")
+StockReservation = get_model("partner", "StockReservation")
 
 
 class OrderNumberGenerator(object):
@@ -122,7 +125,8 @@ class OrderCreator(object):
 
             for line in basket.all_lines():
                 self.create_line_models(order, line)
-                self.update_stock_records(line)
+            self.release_stock_reservations(basket)
+            self._update_stock_records(basket.all_lines())
 
         # Send signal for analytics to pick up
         order_placed.send(sender=self, order=order, user=user)
@@ -243,8 +247,47 @@ class OrderCreator(object):
         """
         Update any relevant stock records for this order line
         """
-        if line.product.get_product_class().track_stock:
-            line.stockrecord.allocate(line.quantity)
+        self.allocate_stock([line])
+
+    def _update_stock_records(self, lines):
+        # Projects overriding the per-line hook keep updating stock their way
+        if type(self).update_stock_records is not OrderCreator.update_stock_records:
+            for line in lines:
+                self.update_stock_records(line)
+        else:
+            self.allocate_stock(lines)
+
+    def release_stock_reservations(self, basket):
+        """
+        Release the stock reserved for the basket, so it can be allocated
+        """
+        if settings.OSCAR_STOCK_RESERVATION_ENABLED:
+            StockReservation.objects.filter(line__basket=basket).delete()
+
+    def allocate_stock(self, lines):
+        """
+        Allocate the stock of all basket lines at once.
+
+        If ``OSCAR_PREVENT_OVERSELLING`` is set, ``UnableToPlaceOrder`` is
+        raised and no stock is allocated when there isn't enough stock left
+        for any of the lines.
+        """
+        allocations = [
+            (line.stockrecord, line.quantity)
+            for line in lines
+            if line.product.get_product_class().track_stock
+        ]
+        try:
+            StockRecord.objects.allocate(
+                allocations, check_stock=settings.OSCAR_PREVENT_OVERSELLING
+            )
+        except InsufficientStock as e:
+            raise exceptions.UnableToPlaceOrder(
+                _("There isn't enough stock left of %s")
+                % ", ".join(
+                    stockrecord.product.get_title() for stockrecord in e.stockrecords
+                )
+            )
 
     def create_line_discount_models(self, order, order_line, basket_line):
         for discount in basket_line.discounts:
@@ -8,9 +8,14 @@ from django.utils.translation import pgettext_lazy
 
 from oscar.apps.partner.exceptions import InvalidStockAdjustment
 from oscar.core.compat import AUTH_USER_MODEL
+from oscar.core.loading import get_classes
 from oscar.core.utils import get_default_currency
 from oscar.models.fields import AutoSlugField
 
+StockRecordQuerySet, StockReservationQuerySet = get_classes(
+    "partner.managers", ["StockRecordQuerySet", "StockReservationQuerySet"]
+)
+
 
 class AbstractPartner(models.Model):
     """
@@ -140,6 +145,11 @@ class AbstractStockRecord(models.Model):
     #: :py:attr:`.num_allocated` to zero.
     num_allocated = models.IntegerField(_("Number allocated"), blank=True, null=True)
 
+    #: The amount of stock reserved for basket lines, see
+    #: :py:class:`AbstractStockReservation`.  This is kept up-to-date as
+    #: reservations are made, changed and released.
+    num_reserved = models.IntegerField(_("Number reserved"), default=0)
+
     #: Threshold for low-stock alerts.  When stock goes beneath this threshold,
     #: an alert is triggered so warehouse managers can order more.
     low_stock_threshold = models.PositiveIntegerField(
@@ -150,6 +160,8 @@ class AbstractStockRecord(models.Model):
     date_created = models.DateTimeField(_("Date created"), auto_now_add=True)
     date_updated = models.DateTimeField(_("Date updated"), auto_now=True, db_index=True)
 
+    objects = StockRecordQuerySet.as_manager()
+
     def __str__(self):
         msg = "Partner: %s, product: %s" % (
             self.partner.display_name,
@@ -172,14 +184,12 @@ class AbstractStockRecord(models.Model):
         The effective number in stock (e.g. available to buy).
 
         This is correct property to show the customer, not the
-        :py:attr:`.num_in_stock` field as that doesn't account for allocations.
-        This can be negative in some unusual circumstances
+        :py:attr:`.num_in_stock` field as that doesn't account for allocations
+        and reservations.  This can be negative in some unusual circumstances
         """
         if self.num_in_stock is None:
             return 0
-        if self.num_allocated is None:
-            return self.num_in_stock
-        return self.num_in_stock - self.num_allocated
+        return self.num_in_stock - (self.num_allocated or 0) - self.num_reserved
 
     @cached_property
     def can_track_allocations(self):
@@ -347,3 +357,54 @@ class AbstractStockAlert(models.Model):
         ordering = ("-date_created",)
         verbose_name = _("Stock alert")
         verbose_name_plural = _("Stock alerts")
+
+
+class AbstractStockReservation(models.Model):
+    """
+    Stock of a stockrecord reserved for a basket line.
+
+    Reservations are made when products are added to a basket (if
+    ``OSCAR_STOCK_RESERVATION_ENABLED`` is set), so the stock isn't sold to
+    other customers while the basket's owner checks out.  They are released
+    when the order is placed or the line is removed, and expire after
+    ``OSCAR_STOCK_RESERVATION_TTL`` seconds, when they are deleted by the
+    ``oscar_release_stock_reservations`` command.
+
+    The reserved quantities are totalled in ``StockRecord.num_reserved``, so
+    availability can be determined without looking at the reservations.
+    """
+
+    stockrecord = models.ForeignKey(
+        "partner.StockRecord",
+        on_delete=models.CASCADE,
+        related_name="reservations",
+        verbose_name=_("Stock record"),
+    )
+    line = models.OneToOneField(
+        "basket.Line",
+        on_delete=models.CASCADE,
+        related_name="stock_reservation",
+        verbose_name=_("Basket line"),
+    )
+    quantity = models.PositiveIntegerField(_("Quantity"))
+    date_created = models.DateTimeField(_("Date created"), auto_now_add=True)
+    date_expires = models.DateTimeField(_("Date expires"), db_index=True)
+
+    objects = StockReservationQuerySet.as_manager()
+
+    def __str__(self):
+        return _("%(quantity)d of %(stockrecord)s reserved until %(date)s") % {
+            "quantity": self.quantity,
+            "stockrecord": self.stockrecord,
+            "date": self.date_expires,
+        }
+
+    class Meta:
+        abstract = True
+        app_label = "partner"
+        verbose_name = _("Stock reservation")
+        verbose_name_plural = _("Stock reservations")
+
+    @property
+    def is_expired(self):
+        return self.date_expires <= now()
@@ -0,0 +1,157 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+class PurchaseInfoCache(object):
+    """
+    Caches the purchase info that strategies return for anonymous users.
+
+    Anonymous visitors all get the same prices and availability, so their
+    ``PurchaseInfo`` instances are stored in the default cache and shared
+    between requests and processes, keyed by strategy class, product id and
+    the kind of purchase info (e.g. "parent" for the purchase info of a parent
+    product).
+
+    Each product has its own version, which is changed whenever the product,
+    or one of its stockrecords (or one of its children's), is saved or
+    deleted. A global version invalidates all entries at once, e.g. when
+    offers or product classes change.
+    """
+
+    key_prefix = "oscar_purchase_info"
+    version_cache_key = "oscar_purchase_info_version"
+
+    # =======
+    # Version
+    # =======
+
+    @classmethod
+    def get_product_version_key(cls, product_id):
+        return "%s_%s" % (cls.version_cache_key, product_id)
+
+    @classmethod
+    def bump_version(cls):
+        """
+        Invalidate the cached purchase info of all products
+        """
+        cls.change_versions([cls.version_cache_key])
+
+    @classmethod
+    def invalidate_products(cls, product_ids):
+        """
+        Invalidate the cached purchase info of the given products
+        """
+        cls.change_versions(
+            [cls.get_product_version_key(product_id) for product_id in product_ids]
+        )
+
+    @classmethod
+    def change_versions(cls, keys):
+        # Versions are changed straight away, so the rest of the transaction
+        # doesn't see stale entries, and again once the transaction has been
+        # committed, as other processes may have cached the purchase info
+        # from before the change in the meantime.
+        def change():
+            cache.set_many({key: uuid4().hex for key in keys}, None)
+
+        change()
+        transaction.on_commit(change)
+
+    def get_versions(self, product_ids):
+        """
+        Return the global version and the versions of the given products
+        """
+        keys = [self.version_cache_key] + [
+            self.get_product_version_key(product_id) for product_id in product_ids
+        ]
+        versions = cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                # The version has never been set or has been evicted. Use add()
+                # so concurrent processes end up agreeing on the same version.
+                cache.add(key, uuid4().hex, None)
+                versions[key] = cache.get(key)
+        return versions
+
+    # =============
+    # Purchase info
+    # =============
+
+    def get_keys(self, strategy, product_ids, kind="product"):
+        """
+        Return the cache keys of the purchase info of the given products,
+        keyed by product id.
+        """
+        versions = self.get_versions(product_ids)
+        strategy_class = "%s.%s" % (
+            type(strategy).__module__,
+            type(strategy).__qualname__,
+        )
+        return {
+            product_id: "%s_%s_%s_%s_%s_%s"
+            % (
+                self.key_prefix,
+                strategy_class,
+                kind,
+                product_id,
+                versions[self.get_product_version_key(product_id)],
+                versions[self.version_cache_key],
+            )
+            for product_id in product_ids
+        }
+
+    def get_many(self, strategy, products, kind="product"):
+        """
+        Return the cached purchase info of the given products, keyed by product
+        id. Products that aren't cached are left out.
+        """
+        product_ids = [product.id for product in products if product.id is not None]
+        if not product_ids:
+            return {}
+        keys = self.get_keys(strategy, product_ids, kind)
+        cached = cache.get_many(keys.values())
+        return {
+            product_id: cached[key] for product_id, key in keys.items() if key in cached
+        }
+
+    def set_many(self, strategy, infos, kind="product"):
+        """
+        Cache the given purchase info, keyed by product id
+        """
+        infos = {
+            product_id: info
+            for product_id, info in infos.items()
+            if product_id is not None
+        }
+        if not infos:
+            return
+        keys = self.get_keys(strategy, infos.keys(), kind)
+        cache.set_many(
+            {
+                keys[product_id]: self.serialise(info)
+                for product_id, info in infos.items()
+            },
+            settings.OSCAR_PURCHASE_INFO_CACHE_TIMEOUT,
+        )
+
+    def serialise(self, info):
+        """
+        Return a copy of the purchase info that can be cached. The stockrecord
+        is copied without any of its cached related objects, such as its
+        product and partner.
+        """
+        stockrecord = info.stockrecord
+        if stockrecord is None:
+            return info
+        copy = type(stockrecord)(
+            **{
+                field.attname: getattr(stockrecord, field.attname)
+                for field in stockrecord._meta.concrete_fields
+            }
+        )
+        copy._state.adding = False
+        copy._state.db = stockrecord._state.db
+        return info._replace(stockrecord=copy)
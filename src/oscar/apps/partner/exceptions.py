@@ -4,3 +4,15 @@ class ImportingError(Exception):
 
 class InvalidStockAdjustment(Exception):
     pass
+
+
+class InsufficientStock(InvalidStockAdjustment):
+    """
+    Raised when stock can't be allocated because there isn't enough stock
+    left. The stockrecords that don't have enough stock are passed as the
+    first argument.
+    """
+
+    def __init__(self, stockrecords):
+        super().__init__(stockrecords)
+        self.stockrecords = stockrecords
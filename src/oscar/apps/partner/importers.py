@@ -2,10 +2,13 @@ import csv
 import os
 from decimal import Decimal as D
 
+from django.conf import settings
 from django.db.transaction import atomic
+from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 
-from oscar.core.loading import get_class, get_model
+from oscar.core.loading import get_class, get_classes, get_model
+from oscar.core.utils import slugify
 
 ImportingError = get_class("partner.exceptions", "ImportingError")
 
@@ -15,29 +18,50 @@ Product = get_model("catalogue", "Product")
 ProductCategory = get_model("catalogue", "ProductCategory")
 ProductClass = get_model("catalogue", "ProductClass")
 StockRecord = get_model("partner", "StockRecord")
+Range = get_model("offer", "Range")
+BasketSummary = get_class("basket.utils", "BasketSummary")
+OfferCatalogue = get_class("offer.catalogue", "OfferCatalogue")
+PurchaseInfoCache = get_class("partner.cache", "PurchaseInfoCache")
 
-create_from_breadcrumbs = get_class("catalogue.categories", "create_from_breadcrumbs")
+BreadcrumbTree, bulk_create_from_breadcrumbs = get_classes(
+    "catalogue.categories", ["BreadcrumbTree", "bulk_create_from_breadcrumbs"]
+)
 
 
 class CatalogueImporter(object):
     """
     CSV product importer used to built sandbox. Might not work very well
     for anything else.
+
+    Rows are imported in chunks of ``chunk_size`` rows, each in its own
+    transaction.  The products and stockrecords of a chunk are looked up with
+    one query each, and created and updated in bulk.  If a ``checkpoint_path``
+    is given, the number of rows imported so far is written to it after each
+    chunk, so an interrupted import can be resumed from there.
     """
 
     _flush = False
 
-    def __init__(self, logger, delimiter=",", flush=False):
+    def __init__(
+        self, logger, delimiter=",", flush=False, chunk_size=1000, checkpoint_path=None
+    ):
         self.logger = logger
         self._delimiter = delimiter
         self._flush = flush
+        self._chunk_size = chunk_size
+        self._checkpoint_path = checkpoint_path
+        self._product_classes = {}
+        self._partners = {}
+        self._categories = {}
+        self._category_tree = None
 
     def handle(self, file_path=None):
         """Handles the actual import process"""
         if not file_path:
             raise ImportingError(_("No file path supplied"))
         Validator().validate(file_path)
-        if self._flush is True:
+        # Don't flush the rows imported before an import was interrupted
+        if self._flush is True and not self._read_checkpoint():
             self.logger.info(" - Flushing product data before import")
             self._flush_product_data()
         self._import(file_path)
@@ -48,74 +72,228 @@ class CatalogueImporter(object):
         ProductClass.objects.all().delete()
         Partner.objects.all().delete()
         StockRecord.objects.all().delete()
+        self._product_classes, self._partners = {}, {}
 
-    @atomic
     def _import(self, file_path):
         """Imports given file"""
         stats = {"new_items": 0, "updated_items": 0}
+        start_row = self._read_checkpoint()
+        if start_row:
+            self.logger.info(" - Resuming import after row %d", start_row)
         row_number = 0
+        chunk = []
         with open(file_path, "rt", encoding="utf-8") as f:
             reader = csv.reader(f, escapechar="\\")
             for row in reader:
                 row_number += 1
-                self._import_row(row_number, row, stats)
+                if row_number <= start_row:
+                    continue
+                row = self._clean_row(row_number, row)
+                if row is not None:
+                    chunk.append(row)
+                if len(chunk) >= self._chunk_size:
+                    self._import_chunk(chunk, stats)
+                    self._write_checkpoint(row_number)
+                    chunk = []
+        if chunk:
+            self._import_chunk(chunk, stats)
+        self._remove_checkpoint()
         msg = "New items: %d, updated items: %d" % (
             stats["new_items"],
             stats["updated_items"],
         )
         self.logger.info(msg)
 
-    def _import_row(self, row_number, row, stats):
+    def _clean_row(self, row_number, row):
         if len(row) != 5 and len(row) != 9:
             self.logger.error(
                 "Row number %d has an invalid number of fields"
                 " (%d), skipping..." % (row_number, len(row))
             )
-            return
-        item = self._create_item(*row[:5], stats=stats)
-        if len(row) == 9:
-            # With stock data
-            self._create_stockrecord(item, *row[5:9])
-
-    def _create_item(self, product_class, category_str, upc, title, description, stats):
+            return None
         # Ignore any entries that are NULL
-        if description == "NULL":
-            description = ""
+        if row[4] == "NULL":
+            row[4] = ""
+        return row
 
-        # Create item class and item
-        product_class, __ = ProductClass.objects.get_or_create(name=product_class)
-        try:
-            item = Product.objects.get(upc=upc)
-            stats["updated_items"] += 1
-        except Product.DoesNotExist:
-            item = Product()
-            stats["new_items"] += 1
-        item.upc = upc
-        item.title = title
-        item.description = description
-        item.product_class = product_class
-        item.save()
-
-        # Category
-        cat = create_from_breadcrumbs(category_str)
-        ProductCategory.objects.update_or_create(product=item, category=cat)
-
-        return item
-
-    def _create_stockrecord(self, item, partner_name, partner_sku, price, num_in_stock):
-        # Create partner and stock record
-        partner, _ = Partner.objects.get_or_create(name=partner_name)
-        try:
-            stock = StockRecord.objects.get(partner_sku=partner_sku)
-        except StockRecord.DoesNotExist:
-            stock = StockRecord()
-
-        stock.product = item
-        stock.partner = partner
-        stock.partner_sku = partner_sku
-        stock.price = D(price)
-        stock.num_in_stock = num_in_stock
-        stock.save()
+    # Checkpoints
+
+    def _read_checkpoint(self):
+        if not self._checkpoint_path or not os.path.exists(self._checkpoint_path):
+            return 0
+        with open(self._checkpoint_path, "rt", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+
+    def _write_checkpoint(self, row_number):
+        if self._checkpoint_path:
+            with open(self._checkpoint_path, "wt", encoding="utf-8") as f:
+                f.write(str(row_number))
+
+    def _remove_checkpoint(self):
+        if self._checkpoint_path and os.path.exists(self._checkpoint_path):
+            os.remove(self._checkpoint_path)
+
+    # Chunks
+
+    @atomic
+    def _import_chunk(self, rows, stats):
+        items = self._create_items(rows, stats)
+        self._create_product_categories(rows, items)
+        stockrecords = self._create_stockrecords(
+            [row for row in rows if len(row) == 9], items
+        )
+        self._products_imported(list(items.values()), stockrecords)
+
+    def _create_items(self, rows, stats):
+        """
+        Create or update the products of the rows, and return them keyed by
+        UPC. Later rows for the same UPC win, like when importing row by row.
+        """
+        product_classes = self._get_product_classes({row[0] for row in rows})
+        items = Product.objects.in_bulk({row[2] for row in rows}, field_name="upc")
+        new_items, updated_items = {}, {}
+        for product_class, __, upc, title, description in (row[:5] for row in rows):
+            if upc in items:
+                item = items[upc]
+                if item.pk is not None:
+                    updated_items[upc] = item
+                stats["updated_items"] += 1
+            else:
+                item = items[upc] = new_items[upc] = Product(upc=upc)
+                stats["new_items"] += 1
+            item.title = title
+            item.description = description
+            item.product_class = product_classes[product_class]
+
+        if updated_items:
+            for item in updated_items.values():
+                item.date_updated = now()
+            Product.objects.bulk_update(
+                updated_items.values(),
+                ["title", "description", "product_class", "date_updated"],
+            )
+        if new_items:
+            for item in new_items.values():
+                item.slug = slugify(item.get_title())
+            Product.objects.bulk_create(new_items.values())
+            if any(item.pk is None for item in new_items.values()):
+                # The database can't return primary keys from bulk inserts
+                pks = dict(
+                    Product.objects.filter(upc__in=new_items.keys()).values_list(
+                        "upc", "pk"
+                    )
+                )
+                for upc, item in new_items.items():
+                    item.pk = pks[upc]
+        return items
+
+    def _create_product_categories(self, rows, items):
+        categories = self._get_categories({row[1] for row in rows})
+        ProductCategory.objects.bulk_create(
+            {
+                (row[2], row[1]): ProductCategory(
+                    product=items[row[2]], category=categories[row[1]]
+                )
+                for row in rows
+            }.values(),
+            ignore_conflicts=True,
+        )
+
+    def _create_stockrecords(self, rows, items):
+        """
+        Create or update the stockrecords of the rows, which are looked up by
+        partner SKU
+        """
+        if not rows:
+            return []
+        partners = self._get_partners({row[5] for row in rows})
+        stockrecords = {
+            stockrecord.partner_sku: stockrecord
+            for stockrecord in StockRecord.objects.filter(
+                partner_sku__in={row[6] for row in rows}
+            )
+        }
+        new_stockrecords, updated_stockrecords = {}, {}
+        for row in rows:
+            upc, (partner_name, partner_sku, price, num_in_stock) = row[2], row[5:9]
+            if partner_sku in stockrecords:
+                stockrecord = stockrecords[partner_sku]
+                if stockrecord.pk is not None:
+                    updated_stockrecords[partner_sku] = stockrecord
+            else:
+                stockrecord = stockrecords[partner_sku] = new_stockrecords[
+                    partner_sku
+                ] = StockRecord(partner_sku=partner_sku)
+            stockrecord.product = items[upc]
+            stockrecord.partner = partners[partner_name]
+            stockrecord.price = D(price)
+            stockrecord.num_in_stock = int(num_in_stock)
+
+        if updated_stockrecords:
+            for stockrecord in updated_stockrecords.values():
+                stockrecord.date_updated = now()
+            StockRecord.objects.bulk_update(
+                updated_stockrecords.values(),
+                ["product", "partner", "price", "num_in_stock", "date_updated"],
+            )
+        if new_stockrecords:
+            StockRecord.objects.bulk_create(new_stockrecords.values())
+        return list(stockrecords.values())
+
+    def _products_imported(self, items, stockrecords):
+        """
+        Bulk operations don't send signals, so do what the receivers of
+        product and stockrecord changes do, once per chunk
+        """
+        if settings.OSCAR_OFFERS_RANGE_MEMBERSHIP_ENABLED:
+            Range.objects.update_product_memberships([item.pk for item in items])
+        # Product classes and categories determine which ranges contain the
+        # products
+        if (
+            settings.OSCAR_OFFERS_CATALOGUE_ENABLED
+            or settings.OSCAR_OFFERS_BASKET_CACHE_ENABLED
+            or settings.OSCAR_BASKET_SUMMARY_CACHE_ENABLED
+            or settings.OSCAR_PURCHASE_INFO_CACHE_ENABLED
+        ):
+            OfferCatalogue.bump_version()
+        if settings.OSCAR_PURCHASE_INFO_CACHE_ENABLED:
+            # The purchase info of parents depends on their children
+            product_ids = {item.pk for item in items}
+            product_ids.update(item.parent_id for item in items if item.parent_id)
+            PurchaseInfoCache.invalidate_products(product_ids)
+        if settings.OSCAR_BASKET_SUMMARY_CACHE_ENABLED and stockrecords:
+            BasketSummary.invalidate_stockrecords(
+                [stockrecord.pk for stockrecord in stockrecords]
+            )
+
+    # Lookups shared by all chunks
+
+    def _get_product_classes(self, names):
+        for name in names.difference(self._product_classes):
+            self._product_classes[name], __ = ProductClass.objects.get_or_create(
+                name=name
+            )
+        return self._product_classes
+
+    def _get_partners(self, names):
+        for name in names.difference(self._partners):
+            self._partners[name], __ = Partner.objects.get_or_create(name=name)
+        return self._partners
+
+    def _get_categories(self, breadcrumbs):
+        missing = list(breadcrumbs.difference(self._categories))
+        if missing:
+            # The category tree is loaded once, and kept up to date by
+            # bulk_create_from_breadcrumbs
+            if self._category_tree is None:
+                self._category_tree = BreadcrumbTree()
+            self._categories.update(
+                zip(
+                    missing,
+                    bulk_create_from_breadcrumbs(missing, tree=self._category_tree),
+                )
+            )
+        return self._categories
 
 
 class Validator(object):
@@ -0,0 +1,164 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, router, transaction
+from django.db.models import Case, F, Q, Value, When, signals
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from oscar.apps.partner.exceptions import InsufficientStock
+
+
+class StockRecordQuerySet(models.QuerySet):
+    def allocate(self, allocations, check_stock=False):
+        """
+        Record the stock allocations of several stockrecords at once.
+
+        'allocations' is an iterable of (stockrecord, quantity) tuples.  All
+        allocations are made in a single UPDATE statement, which increments
+        the allocated quantities in the database rather than writing back
+        values read earlier, so concurrent allocations are never lost.
+
+        If 'check_stock' is True, stock is only allocated if there is enough
+        stock left for all allocations when the UPDATE runs, not counting stock
+        that is reserved for basket lines.  Otherwise, no stock is allocated
+        and ``InsufficientStock`` is raised.
+
+        Unlike ``StockRecord.allocate``, this doesn't check whether the
+        products track stock, which is left to the caller.
+        """
+        instances, quantities = self._group_allocations(allocations)
+        if not quantities:
+            return
+
+        using = router.db_for_write(self.model)
+        sufficient = self._update_allocated(quantities, check_stock, using)
+        if sufficient is not None:
+            raise InsufficientStock(
+                [instances[pk][0] for pk in quantities if pk not in sufficient]
+            )
+
+        # Make sure the instances are up-to-date
+        for pk, value in self.filter(pk__in=quantities.keys()).values_list(
+            "pk", "num_allocated"
+        ):
+            for stockrecord in instances[pk]:
+                stockrecord.num_allocated = value
+
+        # Signals are only sent once the stock has been allocated
+        for records in instances.values():
+            self._send_save_signals(records[0], using)
+
+    def _group_allocations(self, allocations):
+        # Several instances of the same stockrecord may be passed, e.g. for
+        # basket lines of the same product with different options.
+        instances, quantities = {}, {}
+        for stockrecord, quantity in allocations:
+            instances.setdefault(stockrecord.pk, []).append(stockrecord)
+            quantities[stockrecord.pk] = quantities.get(stockrecord.pk, 0) + quantity
+        return instances, quantities
+
+    def _update_allocated(self, quantities, check_stock, using):
+        """
+        Increment the allocated quantities in a single UPDATE. If there isn't
+        enough stock for all of them, nothing is allocated and the ids of the
+        stockrecords that have enough stock are returned.
+        """
+        num_allocated = Coalesce(F("num_allocated"), 0)
+        queryset = self.filter(pk__in=quantities.keys())
+        if check_stock:
+            conditions = Q()
+            for pk, quantity in quantities.items():
+                conditions |= Q(
+                    pk=pk,
+                    num_in_stock__gte=num_allocated + F("num_reserved") + quantity,
+                )
+            queryset = queryset.filter(conditions)
+
+        with transaction.atomic(using=using):
+            num_updated = queryset.update(
+                num_allocated=num_allocated
+                + Case(
+                    *[
+                        When(pk=pk, then=Value(quantity))
+                        for pk, quantity in quantities.items()
+                    ],
+                    output_field=models.IntegerField(),
+                )
+            )
+            is_insufficient = check_stock and num_updated < len(quantities)
+            if is_insufficient:
+                # Some stockrecords don't have enough stock left, so roll back
+                # the other allocations
+                transaction.set_rollback(True, using=using)
+
+        if is_insufficient:
+            return set(queryset.values_list("pk", flat=True))
+        return None
+
+    def _send_save_signals(self, stockrecord, using):
+        signals.pre_save.send(
+            sender=self.model, instance=stockrecord, raw=False, using=using
+        )
+        signals.post_save.send(
+            sender=self.model,
+            instance=stockrecord,
+            created=False,
+            raw=False,
+            using=using,
+        )
+
+
+class StockReservationQuerySet(models.QuerySet):
+    def expired(self):
+        return self.filter(date_expires__lte=now())
+
+    def reserve(self, line, ttl=None):
+        """
+        Reserve stock for a basket line, or update its reservation after the
+        line's quantity or stockrecord has changed, and restart the
+        reservation's time to live.
+
+        Only stock that isn't allocated or reserved yet can be reserved.  If
+        there isn't enough left, the existing reservation is kept as it is.
+        Returns the line's reservation, or None if it doesn't have one.
+        """
+        if ttl is None:
+            ttl = settings.OSCAR_STOCK_RESERVATION_TTL
+        StockRecord = self.model._meta.get_field("stockrecord").related_model
+        using = router.db_for_write(self.model)
+        quantity = line.quantity if line.stockrecord_id is not None else 0
+        with transaction.atomic(using=using):
+            reservation = self.select_for_update().filter(line=line).first()
+            if reservation is not None and (
+                reservation.stockrecord_id != line.stockrecord_id or not quantity
+            ):
+                reservation.delete()
+                reservation = None
+
+            reserved = reservation.quantity if reservation is not None else 0
+            delta = quantity - reserved
+            stockrecords = StockRecord.objects.filter(pk=line.stockrecord_id)
+            if delta > 0:
+                stockrecords = stockrecords.filter(
+                    num_in_stock__gte=Coalesce(F("num_allocated"), 0)
+                    + F("num_reserved")
+                    + delta
+                )
+            if delta and stockrecords.update(num_reserved=F("num_reserved") + delta):
+                reserved = quantity
+
+            if reservation is None and reserved:
+                reservation = self.create(
+                    line=line,
+                    stockrecord_id=line.stockrecord_id,
+                    quantity=reserved,
+                    date_expires=now() + timedelta(seconds=ttl),
+                )
+            elif reservation is not None:
+                reservation.quantity = reserved
+                reservation.date_expires = now() + timedelta(seconds=ttl)
+                reservation.save()
+
+        line._meta.get_field("stock_reservation").set_cached_value(line, reservation)
+        return reservation
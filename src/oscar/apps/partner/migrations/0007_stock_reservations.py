@@ -0,0 +1,72 @@
+# Generated by Django 4.2.16 on 2026-10-17 06:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from django.utils.module_loading import import_string
+from django.conf import settings
+
+models_AutoField = import_string(settings.DEFAULT_AUTO_FIELD)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("basket", "0012_line_code"),
+        ("partner", "0006_auto_20200724_0909"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="stockrecord",
+            name="num_reserved",
+            field=models.IntegerField(default=0, verbose_name="Number reserved"),
+        ),
+        migrations.CreateModel(
+            name="StockReservation",
+            fields=[
+                (
+                    "id",
+                    models_AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.PositiveIntegerField(verbose_name="Quantity")),
+                (
+                    "date_created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Date created"
+                    ),
+                ),
+                (
+                    "date_expires",
+                    models.DateTimeField(db_index=True, verbose_name="Date expires"),
+                ),
+                (
+                    "line",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stock_reservation",
+                        to="basket.line",
+                        verbose_name="Basket line",
+                    ),
+                ),
+                (
+                    "stockrecord",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reservations",
+                        to="partner.stockrecord",
+                        verbose_name="Stock record",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Stock reservation",
+                "verbose_name_plural": "Stock reservations",
+                "abstract": False,
+            },
+        ),
+    ]
@@ -3,6 +3,7 @@ from oscar.apps.partner.abstract_models import (
     AbstractPartner,
     AbstractStockAlert,
     AbstractStockRecord,
+    AbstractStockReservation,
 )
 from oscar.core.loading import is_model_registered
 
@@ -39,3 +40,11 @@ if not is_model_registered("partner", "StockAlert"):
         pass
 
     __all__.append("StockAlert")
+
+
+if not is_model_registered("partner", "StockReservation"):
+
+    class StockReservation(AbstractStockReservation):
+        pass
+
+    __all__.append("StockReservation")
@@ -1,10 +1,18 @@
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from oscar.core.loading import get_model
+from oscar.core.loading import get_class, get_model
 
 StockAlert = get_model("partner", "StockAlert")
 StockRecord = get_model("partner", "StockRecord")
+StockReservation = get_model("partner", "StockReservation")
+Line = get_model("basket", "Line")
+Product = get_model("catalogue", "Product")
+ProductClass = get_model("catalogue", "ProductClass")
+Base = get_class("partner.strategy", "Base")
+PurchaseInfoCache = get_class("partner.cache", "PurchaseInfoCache")
 
 
 # pylint: disable=unused-argument
@@ -27,3 +35,109 @@ def update_stock_alerts(sender, instance, created, **kwargs):
         )
     elif not stockrecord.is_below_threshold and alert:
         alert.close()
+
+
+@receiver(post_save, sender=StockRecord)
+@receiver(post_delete, sender=StockRecord)
+def invalidate_purchase_info(sender, **kwargs):
+    """
+    Invalidate purchase info memoised by strategies, as stock levels or prices
+    have changed
+    """
+    Base.invalidate_purchase_info()
+
+
+@receiver(post_save, sender=StockRecord)
+@receiver(post_delete, sender=StockRecord)
+def invalidate_cached_purchase_info(sender, instance, **kwargs):
+    """
+    Invalidate the cached purchase info of the stockrecord's product and its
+    parent, whose purchase info depends on the stockrecords of its children
+    """
+    if kwargs.get("raw") or not settings.OSCAR_PURCHASE_INFO_CACHE_ENABLED:
+        return
+    invalidate_cached_product_purchase_info(instance.product_id)
+
+
+def invalidate_cached_product_purchase_info(product_id):
+    product_ids = [product_id]
+    parent_id = (
+        Product.objects.filter(pk=product_id)
+        .values_list("parent_id", flat=True)
+        .first()
+    )
+    if parent_id is not None:
+        product_ids.append(parent_id)
+    PurchaseInfoCache.invalidate_products(product_ids)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_purchase_info(sender, instance, **kwargs):
+    """
+    Invalidate the cached purchase info of a product, its parent and its
+    children, as it depends on whether products are public and on their
+    structure
+    """
+    if kwargs.get("raw") or not settings.OSCAR_PURCHASE_INFO_CACHE_ENABLED:
+        return
+    product_ids = [instance.pk]
+    if instance.parent_id is not None:
+        product_ids.append(instance.parent_id)
+    if instance.is_parent:
+        product_ids.extend(
+            Product.objects.filter(parent_id=instance.pk).values_list("pk", flat=True)
+        )
+    PurchaseInfoCache.invalidate_products(product_ids)
+
+
+@receiver(post_save, sender=ProductClass)
+@receiver(post_delete, sender=ProductClass)
+def invalidate_product_class_purchase_info(sender, **kwargs):
+    """
+    Invalidate all cached purchase info, as it depends on whether the product
+    classes track stock
+    """
+    if kwargs.get("raw") or not settings.OSCAR_PURCHASE_INFO_CACHE_ENABLED:
+        return
+    PurchaseInfoCache.bump_version()
+
+
+@receiver(post_delete, sender=StockReservation)
+def release_reserved_stock(sender, instance, **kwargs):
+    """
+    Return the stock of a reservation to its stockrecord
+    """
+    StockRecord.objects.filter(pk=instance.stockrecord_id).update(
+        num_reserved=F("num_reserved") - instance.quantity
+    )
+
+
+@receiver(post_save, sender=StockReservation)
+@receiver(post_delete, sender=StockReservation)
+def invalidate_reserved_purchase_info(sender, instance, **kwargs):
+    """
+    Invalidate the purchase info of the reserved product, as its stock level
+    has changed
+    """
+    if kwargs.get("raw"):
+        return
+    Base.invalidate_purchase_info()
+    if settings.OSCAR_PURCHASE_INFO_CACHE_ENABLED:
+        product_id = (
+            StockRecord.objects.filter(pk=instance.stockrecord_id)
+            .values_list("product_id", flat=True)
+            .first()
+        )
+        if product_id is not None:
+            invalidate_cached_product_purchase_info(product_id)
+
+
+@receiver(post_save, sender=Line)
+def reserve_stock(sender, instance, **kwargs):
+    """
+    Reserve stock for basket lines as they are added and changed
+    """
+    if kwargs.get("raw") or not settings.OSCAR_STOCK_RESERVATION_ENABLED:
+        return
+    instance.reserve_stock()
@@ -1,9 +1,11 @@
+import copy
 from collections import namedtuple
 from decimal import Decimal as D
 
-from django.db.models import QuerySet
+from django.conf import settings
+from django.db.models import Prefetch, QuerySet, prefetch_related_objects
 
-from oscar.core.loading import get_class
+from oscar.core.loading import get_class, get_model
 
 Unavailable = get_class("partner.availability", "Unavailable")
 Available = get_class("partner.availability", "Available")
@@ -11,6 +13,7 @@ StockRequiredAvailability = get_class("partner.availability", "StockRequired")
 UnavailablePrice = get_class("partner.prices", "Unavailable")
 FixedPrice = get_class("partner.prices", "FixedPrice")
 TaxInclusiveFixedPrice = get_class("partner.prices", "TaxInclusiveFixedPrice")
+PurchaseInfoCache = get_class("partner.cache", "PurchaseInfoCache")
 
 # A container for policies
 PurchaseInfo = namedtuple("PurchaseInfo", ["price", "availability", "stockrecord"])
@@ -58,11 +61,19 @@ class Base(object):
     - An availability policy instance
     """
 
+    # Incremented whenever a stockrecord is saved or deleted in this process,
+    # which invalidates all memoised purchase info.
+    stock_version = 0
+
     def __init__(self, request=None):
         self.request = request
         self.user = None
         if request and request.user.is_authenticated:
             self.user = request.user
+        # Purchase info is memoised for strategies that belong to a request,
+        # keyed by product id and stockrecord id.
+        self._purchase_info = {} if request is not None else None
+        self._purchase_info_version = Base.stock_version
 
     def fetch_for_product(self, product, stockrecord=None):
         """
@@ -93,6 +104,39 @@ class Base(object):
             "information."
         )
 
+    @classmethod
+    def invalidate_purchase_info(cls):
+        """
+        Forget the purchase info memoised by all strategies, e.g. because stock
+        was allocated. This is called whenever a stockrecord is saved.
+        """
+        Base.stock_version += 1
+
+    def get_purchase_info_memo(self):
+        """
+        Return the dict of memoised purchase info, or None if purchase info
+        isn't memoised by this strategy.
+        """
+        memo = getattr(self, "_purchase_info", None)
+        if memo is not None and self._purchase_info_version != Base.stock_version:
+            memo.clear()
+            self._purchase_info_version = Base.stock_version
+        return memo
+
+    def fetch_for_products(self, products):
+        """
+        Given a list of products, return a dict of ``PurchaseInfo`` instances
+        keyed by product id.
+        """
+        return {product.id: self.fetch_for_product(product) for product in products}
+
+    def fetch_for_parents(self, products):
+        """
+        Given a list of parent products, return a dict of ``PurchaseInfo``
+        instances keyed by product id.
+        """
+        return {product.id: self.fetch_for_parent(product) for product in products}
+
     def fetch_for_line(self, line, stockrecord=None):
         """
         Given a basket line instance, fetch a ``PurchaseInfo`` instance.
@@ -124,6 +168,130 @@ class Structured(Base):
 
         This method is not intended to be overridden.
         """
+        memo = self.get_purchase_info_memo()
+        if stockrecord is None:
+            # Avoid going through fetch_many for purchase info that is memoised
+            key = (product.id, None, "product")
+            if memo is not None and key in memo:
+                return memo[key]
+            return self.fetch_many([product], self.get_purchase_info)[product.id]
+
+        key = (product.id, stockrecord.id)
+        if memo is not None and key in memo:
+            return memo[key]
+        info = self.get_purchase_info(product, stockrecord)
+        if memo is not None and product.id is not None:
+            memo[key] = info
+        return info
+
+    def fetch_for_line(self, line, stockrecord=None):
+        """
+        Return the ``PurchaseInfo`` instance of a basket line.
+
+        Stock reserved for the line's basket is reserved for its owner, so it
+        is added back to the stock available to them.
+        """
+        info = super().fetch_for_line(line, stockrecord)
+        if (
+            not settings.OSCAR_STOCK_RESERVATION_ENABLED
+            or info.stockrecord is None
+            or line.basket_id is None
+        ):
+            return info
+        reserved = line.basket.reserved_quantity(info.stockrecord)
+        if not reserved:
+            return info
+        stockrecord = copy.copy(info.stockrecord)
+        stockrecord.num_reserved -= reserved
+        return self.get_purchase_info(line.product, stockrecord)
+
+    def fetch_for_parent(self, product):
+        return self.fetch_many([product], self.get_parent_purchase_info, kind="parent")[
+            product.id
+        ]
+
+    def fetch_for_products(self, products):
+        """
+        Return the ``PurchaseInfo`` instances of the passed products, keyed by
+        product id.
+
+        The stockrecords and product classes of all products are loaded at
+        once, rather than once per product.
+        """
+        return self.fetch_many(
+            products, self.get_purchase_info, self.prefetch_for_products
+        )
+
+    def fetch_for_parents(self, products):
+        """
+        Return the ``PurchaseInfo`` instances of the passed parent products,
+        keyed by product id.
+
+        The public children of all products and their stockrecords are loaded
+        at once, rather than once per product.
+        """
+        return self.fetch_many(
+            products,
+            self.get_parent_purchase_info,
+            self.prefetch_for_parents,
+            kind="parent",
+        )
+
+    def fetch_many(self, products, fetch, prefetch=None, kind="product"):
+        """
+        Return the ``PurchaseInfo`` instances of the passed products keyed by
+        product id, looking them up in the request's memo and the purchase info
+        cache before calling ``fetch`` for the remaining products.
+
+        ``kind`` tells apart the results of different ``fetch`` methods for
+        the same product, e.g. the purchase info of a parent product.
+        """
+        products = list(products)
+        infos = {}
+        memo = self.get_purchase_info_memo()
+        if memo is not None:
+            infos = {
+                product.id: memo[(product.id, None, kind)]
+                for product in products
+                if (product.id, None, kind) in memo
+            }
+        missing = [product for product in products if product.id not in infos]
+
+        cache = self.get_purchase_info_cache()
+        if cache is not None and missing:
+            cached = cache.get_many(self, missing, kind)
+            infos.update(cached)
+            missing = [product for product in missing if product.id not in cached]
+
+        if prefetch is not None and missing:
+            prefetch(missing)
+        fetched = {product.id: fetch(product) for product in missing}
+        if cache is not None and fetched:
+            cache.set_many(self, fetched, kind)
+        infos.update(fetched)
+
+        if memo is not None:
+            memo.update(
+                ((product_id, None, kind), info)
+                for product_id, info in infos.items()
+                if product_id is not None
+            )
+        return infos
+
+    def get_purchase_info_cache(self):
+        """
+        Return the cache that purchase info is shared through, or None if it
+        isn't cached. Only purchase info for anonymous users is cached.
+        """
+        if (
+            settings.OSCAR_PURCHASE_INFO_CACHE_ENABLED
+            and self.request is not None
+            and self.user is None
+        ):
+            return PurchaseInfoCache()
+        return None
+
+    def get_purchase_info(self, product, stockrecord=None):
         if stockrecord is None:
             stockrecord = self.select_stockrecord(product)
         return PurchaseInfo(
@@ -132,7 +300,7 @@ class Structured(Base):
             stockrecord=stockrecord,
         )
 
-    def fetch_for_parent(self, product):
+    def get_parent_purchase_info(self, product):
         # Select children and associated stockrecords
         children_stock = self.select_children_stockrecords(product)
         return PurchaseInfo(
@@ -141,6 +309,23 @@ class Structured(Base):
             stockrecord=None,
         )
 
+    def prefetch_for_products(self, products):
+        prefetch_related_objects(
+            products, "stockrecords", "product_class", "parent__product_class"
+        )
+
+    def prefetch_for_parents(self, products):
+        Product = get_model("catalogue", "Product")
+        prefetch_related_objects(products, "product_class")
+        prefetch_related_objects(
+            [p for p in products if not hasattr(p, "_prefetched_public_children")],
+            Prefetch(
+                "children",
+                queryset=Product.objects.public().prefetch_related("stockrecords"),
+                to_attr="_prefetched_public_children",
+            ),
+        )
+
     def select_stockrecord(self, product):
         """
         Select the appropriate stockrecord
@@ -13,6 +13,10 @@ OSCAR_BASKET_COOKIE_LIFETIME = 7 * 24 * 60 * 60
 OSCAR_BASKET_COOKIE_OPEN = "oscar_open_basket"
 OSCAR_BASKET_COOKIE_SECURE = False
 OSCAR_MAX_BASKET_QUANTITY_THRESHOLD = 10000
+# Cache the item count and totals shown in the header and mini-basket, so
+# pages that only show those don't apply offers to the basket.
+OSCAR_BASKET_SUMMARY_CACHE_ENABLED = False
+OSCAR_BASKET_SUMMARY_CACHE_TIMEOUT = 5 * 60
 
 # Recently-viewed products
 OSCAR_RECENTLY_VIEWED_COOKIE_LIFETIME = 7 * 24 * 60 * 60
@@ -23,6 +27,21 @@ OSCAR_RECENTLY_VIEWED_PRODUCTS = 20
 # Currency
 OSCAR_DEFAULT_CURRENCY = "GBP"
 
+# Share the prices and availability shown to anonymous users between requests
+OSCAR_PURCHASE_INFO_CACHE_ENABLED = False
+OSCAR_PURCHASE_INFO_CACHE_TIMEOUT = 5 * 60
+
+# Refuse to place orders when there isn't enough stock left to allocate
+OSCAR_PREVENT_OVERSELLING = False
+
+# Reserve stock for basket lines, for this number of seconds
+OSCAR_STOCK_RESERVATION_ENABLED = False
+OSCAR_STOCK_RESERVATION_TTL = 15 * 60
+
+# Cache a snapshot of the browsable category tree for the category_tree tag
+OSCAR_CATEGORY_TREE_CACHE_ENABLED = False
+OSCAR_CATEGORY_TREE_CACHE_TIMEOUT = 60 * 60
+
 # Paths
 OSCAR_IMAGE_FOLDER = "images/products/%Y/%m/"
 OSCAR_DELETE_IMAGE_FILES = True
@@ -94,6 +113,29 @@ OSCAR_OFFERS_IMPLEMENTED_TYPES = [
     "SITE",
     "VOUCHER",
 ]
+# Keep a compiled, process-local copy of the site offers which is only
+# reloaded when offers, conditions, benefits or ranges change. Requires a cache
+# backend that is shared between processes.
+OSCAR_OFFERS_CATALOGUE_ENABLED = False
+# Maintain a materialised table of the products in each range, so checking
+# whether a range contains a product doesn't need to evaluate the range's
+# product queryset. Run the "oscar_update_range_memberships" management command
+# after enabling this.
+OSCAR_OFFERS_RANGE_MEMBERSHIP_ENABLED = False
+# When offers are re-applied to a basket that has changed, only re-evaluate the
+# offers whose ranges contain the changed products.
+OSCAR_OFFERS_INCREMENTAL_APPLICATION = False
+# Cache the offers applied to each basket, keyed by the basket's contents and
+# the offer catalogue version, so they aren't re-applied on every request.
+OSCAR_OFFERS_BASKET_CACHE_ENABLED = False
+OSCAR_OFFERS_BASKET_CACHE_TIMEOUT = 5 * 60
+# Measure the time and queries taken to apply each offer, and show the results
+# in the dashboard.
+OSCAR_OFFERS_INSTRUMENTATION_ENABLED = False
+# The time in seconds the OptimalApplicator may spend searching for the best
+# combination of offers, and the smallest basket (in lines) it searches for.
+OSCAR_OFFERS_OPTIMAL_TIME_BUDGET = 0.2
+OSCAR_OFFERS_OPTIMAL_MIN_LINES = 10
 
 # Hidden Oscar features, e.g. wishlists or reviews
 OSCAR_HIDDEN_FEATURES = []
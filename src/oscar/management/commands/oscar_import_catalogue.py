@@ -30,11 +30,30 @@ class Command(BaseCommand):
             default=",",
             help="Delimiter used within CSV file(s)",
         )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of rows to import per transaction",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            metavar="PATH",
+            help="Record the number of rows imported so far in this file, and "
+            "resume from there if it exists. Only one file can be imported at a "
+            "time with this option",
+        )
 
     def handle(self, *args, **options):
         logger.info("Starting catalogue import")
+        if options["checkpoint"] and len(options["filename"]) > 1:
+            raise CommandError("Only one file can be imported with --checkpoint")
         importer = CatalogueImporter(
-            logger, delimiter=options.get("delimiter"), flush=options.get("flush")
+            logger,
+            delimiter=options.get("delimiter"),
+            flush=options.get("flush"),
+            chunk_size=options["chunk_size"],
+            checkpoint_path=options["checkpoint"],
         )
         for file_path in options["filename"]:
             logger.info(" - Importing records from '%s'", file_path)
@@ -0,0 +1,161 @@
+import json
+import os
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils.timezone import now
+
+from oscar.core.loading import get_model
+
+Basket = get_model("basket", "Basket")
+
+
+class Command(BaseCommand):
+    help = """Delete open baskets that haven't been changed, and merged baskets
+              that were merged, more than DAYS days ago. Baskets are deleted
+              in chunks, each in its own transaction, so tables aren't locked
+              for long and an interrupted run can simply be started again.
+              Baskets can be written to a JSON lines file before they are
+              deleted."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=90,
+            help="Delete baskets that have been abandoned for more than DAYS days",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of baskets to delete per transaction",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Seconds to wait between chunks, to reduce the load on the database",
+        )
+        parser.add_argument(
+            "--archive",
+            metavar="PATH",
+            help="Append the baskets, with their lines and vouchers, to this "
+            "JSON lines file before deleting them",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the number of baskets that would be deleted",
+        )
+
+    def handle(self, *args, **options):
+        threshold_date = now() - timedelta(days=options["days"])
+        baskets = self.get_queryset(threshold_date)
+        total = baskets.count()
+        self.stdout.write(
+            "Found %d baskets abandoned before %s"
+            % (total, threshold_date.strftime("%Y-%m-%d %H:%M"))
+        )
+        if options["dry_run"] or not total:
+            return
+
+        archive = None
+        if options["archive"]:
+            # Baskets archived by an earlier, interrupted run may not have been
+            # deleted, and aren't archived again.
+            self.archived_ids = self.get_archived_ids(options["archive"])
+            archive = open(options["archive"], "a", encoding="utf-8")
+        try:
+            num_deleted = 0
+            while True:
+                basket_ids = list(
+                    baskets.order_by("pk").values_list("pk", flat=True)[
+                        : options["chunk_size"]
+                    ]
+                )
+                if not basket_ids:
+                    break
+                # Baskets which were changed since they were selected are no
+                # longer abandoned, and are neither archived nor deleted
+                chunk = baskets.filter(pk__in=basket_ids)
+                with transaction.atomic():
+                    if archive is not None:
+                        unarchived_ids = [
+                            pk for pk in basket_ids if pk not in self.archived_ids
+                        ]
+                        self.archive(archive, chunk.filter(pk__in=unarchived_ids))
+                    __, deleted = chunk.delete()
+                num_deleted += deleted.get(Basket._meta.label, 0)
+                self.stdout.write("Deleted %d of %d baskets" % (num_deleted, total))
+                if options["sleep"]:
+                    time.sleep(options["sleep"])
+        finally:
+            if archive is not None:
+                archive.close()
+
+    def get_queryset(self, threshold_date):
+        """
+        Return the baskets that were abandoned before the threshold date
+        """
+        return Basket.objects.filter(
+            Q(status=Basket.OPEN, date_created__lt=threshold_date)
+            | Q(status=Basket.MERGED, date_merged__lt=threshold_date)
+            | Q(
+                status=Basket.MERGED,
+                date_merged__isnull=True,
+                date_created__lt=threshold_date,
+            )
+        ).exclude(status=Basket.OPEN, lines__date_updated__gte=threshold_date)
+
+    def get_archived_ids(self, path):
+        """
+        Return the ids of the baskets that are in the archive already
+        """
+        if not os.path.exists(path):
+            return set()
+        with open(path, encoding="utf-8") as archive:
+            return {json.loads(line)["id"] for line in archive if line.strip()}
+
+    def archive(self, archive, baskets):
+        """
+        Write the baskets to the archive, one JSON object per line
+        """
+        for basket in baskets.prefetch_related("lines__attributes", "vouchers"):
+            archive.write(
+                json.dumps(self.serialise(basket), cls=DjangoJSONEncoder) + "\n"
+            )
+            self.archived_ids.add(basket.id)
+        archive.flush()
+
+    def serialise(self, basket):
+        return {
+            "id": basket.id,
+            "owner_id": basket.owner_id,
+            "status": basket.status,
+            "date_created": basket.date_created,
+            "date_merged": basket.date_merged,
+            "vouchers": [voucher.code for voucher in basket.vouchers.all()],
+            "lines": [
+                {
+                    "line_reference": line.line_reference,
+                    "product_id": line.product_id,
+                    "stockrecord_id": line.stockrecord_id,
+                    "quantity": line.quantity,
+                    "price_currency": line.price_currency,
+                    "price_excl_tax": line.price_excl_tax,
+                    "price_incl_tax": line.price_incl_tax,
+                    "date_created": line.date_created,
+                    "date_updated": line.date_updated,
+                    "attributes": [
+                        {"option_id": attribute.option_id, "value": attribute.value}
+                        for attribute in line.attributes.all()
+                    ],
+                }
+                for line in basket.lines.all()
+            ],
+        }
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from oscar.core.loading import get_model
+
+StockReservation = get_model("partner", "StockReservation")
+
+
+class Command(BaseCommand):
+    help = """Release the stock of expired stock reservations, so it can be
+              bought by other customers. Reservations are released in chunks,
+              each in its own transaction. Should be run regularly when
+              OSCAR_STOCK_RESERVATION_ENABLED is set."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of reservations to release per transaction",
+        )
+
+    def handle(self, *args, **options):
+        num_released = 0
+        while True:
+            reservation_ids = list(
+                StockReservation.objects.expired()
+                .order_by("pk")
+                .values_list("pk", flat=True)[: options["chunk_size"]]
+            )
+            if not reservation_ids:
+                break
+            with transaction.atomic():
+                # Reservations that have been renewed in the meantime are kept
+                __, num_deleted = (
+                    StockReservation.objects.expired()
+                    .filter(pk__in=reservation_ids)
+                    .delete()
+                )
+            num_released += num_deleted.get(StockReservation._meta.label, 0)
+        self.stdout.write("Released %d expired stock reservations" % num_released)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from oscar.core.loading import get_model
+
+Range = get_model("offer", "Range")
+
+
+class Command(BaseCommand):
+    help = """Rebuild the materialised product memberships of all ranges.
+              Should be run after enabling OSCAR_OFFERS_RANGE_MEMBERSHIP_ENABLED
+              and after moving categories within the category tree."""
+
+    def handle(self, *args, **options):
+        ranges = Range.objects.all()
+        for rng in ranges:
+            rng.update_product_memberships()
+        self.stdout.write("Successfully updated %s ranges\n" % ranges.count())
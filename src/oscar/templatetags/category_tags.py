@@ -1,9 +1,11 @@
 from django import template
+from django.conf import settings
 
-from oscar.core.loading import get_model
+from oscar.core.loading import get_class, get_model
 
 register = template.Library()
 Category = get_model("catalogue", "category")
+CategoryTreeCache = get_class("catalogue.cache", "CategoryTreeCache")
 
 
 class PassThrough(object):
@@ -78,10 +80,17 @@ def get_annotated_list(depth=None, parent=None):
     # 'max_depth' is the better variable name.
     max_depth = depth
 
-    annotated_categories = []
-    tree_slug = ""
+    if settings.OSCAR_CATEGORY_TREE_CACHE_ENABLED:
+        return get_cached_annotated_list(max_depth, parent)
+    return get_uncached_annotated_list(max_depth, parent)
 
-    start_depth, prev_depth = (None, None)
+
+def get_branch(max_depth=None, parent=None):
+    """
+    Returns the browsable categories of a tree branch, together with the full
+    slug of the branch.
+    """
+    tree_slug = ""
     if parent:
         categories = parent.get_descendants()
         tree_slug = parent.get_full_slug()
@@ -93,7 +102,16 @@ def get_annotated_list(depth=None, parent=None):
     if max_depth is not None:
         categories = categories.filter(depth__lte=max_depth)
 
-    categories = categories.browsable()
+    return categories.browsable().with_full_slugs(), tree_slug
+
+
+def get_uncached_annotated_list(max_depth=None, parent=None):
+    """
+    Gets an annotated list from a tree branch, querying the database.
+    """
+    annotated_categories = []
+    start_depth, prev_depth = (None, None)
+    categories, tree_slug = get_branch(max_depth, parent)
 
     info = CheapCategoryInfo(parent, url="")
 
@@ -134,3 +152,47 @@ def get_annotated_list(depth=None, parent=None):
         info["has_children"] = node_depth > prev_depth
 
     return annotated_categories
+
+
+def get_cached_annotated_list(max_depth=None, parent=None):
+    """
+    Gets an annotated list from a tree branch, using the cached snapshot of
+    the category tree.
+    """
+    nodes = CategoryTreeCache().get_nodes()
+    if parent:
+        nodes = [
+            (node, url)
+            for node, url in nodes
+            if node.path.startswith(parent.path) and node.depth > parent.depth
+        ]
+        if max_depth is not None:
+            max_depth += parent.depth
+    if max_depth is not None:
+        nodes = [(node, url) for node, url in nodes if node.depth <= max_depth]
+
+    annotated_categories = []
+    start_depth, prev_depth = (None, None)
+    info = CheapCategoryInfo(parent, url="")
+    for node, url in nodes:
+        if start_depth is None:
+            start_depth = node.depth
+
+        # Update previous node's info
+        if prev_depth is None or node.depth > prev_depth:
+            info["has_children"] = True
+        if prev_depth is not None and node.depth < prev_depth:
+            info["num_to_close"] = list(range(0, prev_depth - node.depth))
+
+        info = CheapCategoryInfo(
+            node, url=url, num_to_close=[], level=node.depth - start_depth
+        )
+        annotated_categories.append(info)
+        prev_depth = node.depth
+
+    if prev_depth is not None:
+        # close last leaf
+        info["num_to_close"] = list(range(0, prev_depth - start_depth))
+        info["has_children"] = False
+
+    return annotated_categories
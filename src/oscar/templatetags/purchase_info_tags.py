@@ -5,6 +5,10 @@ register = template.Library()
 
 @register.simple_tag
 def purchase_info_for_product(request, product):
+    prefetched = getattr(request, "prefetched_purchase_info", {})
+    if product.id in prefetched:
+        return prefetched[product.id]
+
     if product.is_parent:
         return request.strategy.fetch_for_parent(product)
 
@@ -14,3 +18,22 @@ def purchase_info_for_product(request, product):
 @register.simple_tag
 def purchase_info_for_line(request, line):
     return request.strategy.fetch_for_line(line)
+
+
+@register.simple_tag
+def prefetch_purchase_info(request, products):
+    """
+    Fetch the purchase info of a page of products (or search results) at
+    once, for ``purchase_info_for_product`` to use when rendering each product.
+    """
+    products = [getattr(product, "object", product) for product in products]
+    products = [product for product in products if product is not None]
+    prefetched = getattr(request, "prefetched_purchase_info", {})
+    prefetched.update(
+        request.strategy.fetch_for_parents([p for p in products if p.is_parent])
+    )
+    prefetched.update(
+        request.strategy.fetch_for_products([p for p in products if not p.is_parent])
+    )
+    request.prefetched_purchase_info = prefetched
+    return ""
@@ -0,0 +1,135 @@
+import statistics
+import time
+import tracemalloc
+from collections import namedtuple
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from oscar.core.loading import get_class, get_model
+from oscar.test import factories
+
+Applicator = get_class("offer.applicator", "Applicator")
+Basket = get_model("basket", "Basket")
+Default = get_class("partner.strategy", "Default")
+
+BenchmarkResult = namedtuple(
+    "BenchmarkResult",
+    [
+        "num_lines",
+        "num_offers",
+        "wall_time",
+        "num_queries",
+        "peak_memory",
+        "num_applied_offers",
+    ],
+)
+
+
+class OfferBenchmark(object):
+    """
+    Measures ``Applicator.apply`` against a synthetic catalogue.
+
+    A catalogue, ranges and site offers of every built-in condition and
+    benefit type are generated with ``oscar.test.factories``, then offers
+    are applied to baskets of each of the requested sizes. For each basket
+    size the median wall time, the number of queries and the peak memory
+    allocated while applying offers are reported.
+
+    Data is written to the default database, so the benchmark must only be
+    run against a test database. The test suite runs it when the
+    ``OSCAR_BENCHMARK_OFFERS`` environment variable is set, e.g.::
+
+        OSCAR_BENCHMARK_OFFERS=1 py.test tests/integration/offer/test_benchmark.py -s
+    """
+
+    def __init__(
+        self,
+        num_products=100,
+        num_ranges=10,
+        num_offers=None,
+        basket_sizes=(1, 10, 50),
+        repeat=5,
+        applicator_class=None,
+    ):
+        self.num_products = max(num_products, max(basket_sizes))
+        self.num_ranges = num_ranges
+        self.num_offers = num_offers
+        self.basket_sizes = basket_sizes
+        self.repeat = repeat
+        self.applicator_class = applicator_class or Applicator
+
+    def setup(self):
+        self.products = factories.create_catalogue(self.num_products)
+        self.ranges = factories.create_ranges(self.products, self.num_ranges)
+        self.offers = factories.create_offers(self.ranges, self.num_offers)
+
+    def run(self):
+        """
+        Generate the data and return a list of results, one per basket size.
+        """
+        self.setup()
+        return [self.measure(num_lines) for num_lines in self.basket_sizes]
+
+    def load_basket(self, basket_id):
+        # Offers are applied to a freshly loaded basket, as on each request
+        basket = Basket.objects.get(pk=basket_id)
+        basket.strategy = Default()
+        return basket
+
+    def apply(self, basket):
+        self.applicator_class().apply(basket)
+
+    def measure(self, num_lines):
+        basket_id = factories.create_basket_with_lines(self.products, num_lines).id
+
+        timings = []
+        for __ in range(self.repeat):
+            basket = self.load_basket(basket_id)
+            start = time.perf_counter()
+            self.apply(basket)
+            timings.append(time.perf_counter() - start)
+
+        basket = self.load_basket(basket_id)
+        with CaptureQueriesContext(connection) as queries:
+            self.apply(basket)
+
+        basket = self.load_basket(basket_id)
+        tracemalloc.start()
+        try:
+            self.apply(basket)
+            __, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return BenchmarkResult(
+            num_lines=num_lines,
+            num_offers=len(self.offers),
+            wall_time=statistics.median(timings),
+            num_queries=len(queries),
+            peak_memory=peak_memory,
+            num_applied_offers=len(basket.offer_applications),
+        )
+
+
+def format_results(results):
+    """
+    Return the results as the lines of a table
+    """
+    lines = [
+        "%8s %8s %12s %8s %12s %8s"
+        % ("lines", "offers", "time (ms)", "queries", "memory (KB)", "applied")
+    ]
+    for result in results:
+        lines.append(
+            "%8d %8d %12.2f %8d %12.1f %8d"
+            % (
+                result.num_lines,
+                result.num_offers,
+                result.wall_time * 1000,
+                result.num_queries,
+                result.peak_memory / 1024,
+                result.num_applied_offers,
+            )
+        )
+    return lines
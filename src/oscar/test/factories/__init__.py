@@ -281,3 +281,102 @@ def create_shipping_weight_band(upper_limit, charge, weight_based=None):
     return WeightBand.objects.create(
         method=weight_based, upper_limit=upper_limit, charge=charge
     )
+
+
+# Synthetic data generators, used e.g. by oscar.test.benchmark
+
+BENEFIT_TYPES = [
+    # (type, value, whether the benefit has a range)
+    (Benefit.PERCENTAGE, D("10"), True),
+    (Benefit.FIXED, D("5.00"), True),
+    (Benefit.FIXED_UNIT, D("1.00"), True),
+    (Benefit.MULTIBUY, None, True),
+    (Benefit.FIXED_PRICE, D("20.00"), False),
+    (Benefit.SHIPPING_ABSOLUTE, D("2.00"), False),
+    (Benefit.SHIPPING_FIXED_PRICE, D("1.00"), False),
+    (Benefit.SHIPPING_PERCENTAGE, D("50"), False),
+]
+CONDITION_TYPES = [
+    (Condition.COUNT, D("2")),
+    (Condition.VALUE, D("20.00")),
+    (Condition.COVERAGE, D("2")),
+]
+
+
+def create_catalogue(num_products, price=D("10.00"), num_in_stock=1000):
+    """
+    Create the passed number of products, each with a stock record
+    """
+    products = []
+    for i in range(num_products):
+        product = create_product(
+            title="Synthetic product %d" % i, price=price, num_in_stock=num_in_stock
+        )
+        products.append(product)
+    return products
+
+
+def create_ranges(products, num_ranges, range_size=None):
+    """
+    Create ranges from slices of the passed products, spread evenly over
+    them. Ranges overlap when ``range_size`` is larger than the spacing.
+    """
+    if range_size is None:
+        range_size = max(1, len(products) // max(1, num_ranges))
+    ranges = []
+    for i in range(num_ranges):
+        start = (i * len(products)) // max(1, num_ranges)
+        end = start + range_size
+        ranges.append(RangeFactory(products=products[start:end]))
+    return ranges
+
+
+def create_offers(ranges, num_offers=None):
+    """
+    Create site offers cycling through every combination of the built-in
+    condition and benefit types, spread over the passed ranges.
+
+    By default, one offer is created for each combination.
+    """
+    combinations = [
+        (condition_type, benefit_type)
+        for condition_type in CONDITION_TYPES
+        for benefit_type in BENEFIT_TYPES
+    ]
+    if num_offers is None:
+        num_offers = len(combinations)
+    offers = []
+    for i in range(num_offers):
+        (condition_type, condition_value), (
+            benefit_type,
+            benefit_value,
+            has_range,
+        ) = combinations[i % len(combinations)]
+        product_range = ranges[i % len(ranges)]
+        condition = Condition.objects.create(
+            range=product_range, type=condition_type, value=condition_value
+        )
+        benefit = Benefit.objects.create(
+            range=product_range if has_range else None,
+            type=benefit_type,
+            value=benefit_value,
+        )
+        offers.append(
+            create_offer(
+                name="Synthetic offer %d" % i,
+                condition=condition,
+                benefit=benefit,
+                priority=i % 3,
+            )
+        )
+    return offers
+
+
+def create_basket_with_lines(products, num_lines, quantity=1):
+    """
+    Create a basket with a line for each of the first ``num_lines`` products
+    """
+    basket = create_basket(empty=True)
+    for product in products[:num_lines]:
+        basket.add_product(product, quantity)
+    return basket
@@ -12,6 +12,7 @@ from django.core import mail
 from django.core.signing import Signer
 from django.db import connection
 from django.test import RequestFactory as BaseRequestFactory
+from django.utils.functional import SimpleLazyObject
 from sorl.thumbnail.conf import settings as sorl_settings
 
 from oscar.core.loading import get_class, get_model
@@ -140,6 +141,7 @@ class EmailsMixin:
 
 class RequestFactory(BaseRequestFactory):
     Basket = get_model("basket", "basket")
+    BasketSummary = get_class("basket.utils", "BasketSummary")
     selector = get_class("partner.strategy", "Selector")()
 
     def request(self, user=None, basket=None, **request):
@@ -154,6 +156,11 @@ class RequestFactory(BaseRequestFactory):
         request.basket = basket or self.Basket()
         request.basket.strategy = request.strategy
         request.basket_hash = Signer().sign(basket.pk) if basket else None
+        request.basket_summary = SimpleLazyObject(
+            lambda: self.BasketSummary(
+                request.basket, self.BasketSummary.get_values(request.basket)
+            )
+        )
         request.cookies_to_delete = []
 
         return request
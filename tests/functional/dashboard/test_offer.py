@@ -1,7 +1,10 @@
+from django.core.cache import cache
+from django.test import override_settings
 from django.urls import reverse
 from django.utils import timezone
 
 from oscar.apps.offer import models
+from oscar.apps.offer.instrumentation import OfferEvaluationStats, OfferStatistics
 from oscar.apps.order.models import OrderDiscount
 from oscar.core.loading import get_class
 from oscar.test import factories, testcases
@@ -87,6 +90,28 @@ class TestAnAdmin(testcases.WebTestCase):
         res = form.submit()
         self.assertTrue("No offers found" in res.text)
 
+    @override_settings(OSCAR_OFFERS_INSTRUMENTATION_ENABLED=True)
+    def test_offer_list_page_shows_offer_performance(self):
+        OfferStatistics().flush()
+        cache.clear()
+        offer = factories.create_offer(name="Slow offer")
+        factories.create_offer(name="Unused offer")
+        OfferStatistics().record(
+            offer,
+            OfferEvaluationStats(
+                wall_time=0.25,
+                num_queries=12,
+                num_evaluations=2,
+                num_applications=1,
+                num_lines=3,
+            ),
+        )
+
+        list_page = self.get(reverse("dashboard:offer-list"))
+        self.assertEqual([offer], list_page.context["offer_statistics"])
+        self.assertContains(list_page, "Offer performance")
+        self.assertContains(list_page, "250.00")
+
     def test_can_update_an_existing_offer(self):
         factories.create_offer(name="Offer A")
 
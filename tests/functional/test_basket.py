@@ -6,7 +6,9 @@ from http.cookies import _unquote
 import django
 from django.contrib.messages.storage import cookie
 from django.core import signing
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.translation import gettext
 
@@ -16,7 +18,7 @@ from oscar.apps.partner import strategy
 from oscar.core.compat import get_user_model
 from oscar.test import factories
 from oscar.test.basket import add_product
-from oscar.test.factories import OptionFactory, create_product
+from oscar.test.factories import OptionFactory, create_product, create_stockrecord
 from oscar.test.testcases import WebTestCase
 
 User = get_user_model()
@@ -140,6 +142,92 @@ class BasketSummaryViewTests(WebTestCase):
         self.assertEqual(0, basket.num_lines)
 
 
+class BasketSummaryViewQueriesTests(WebTestCase):
+    is_anonymous = False
+
+    def add_lines(self, num_lines):
+        basket = Basket.open.get_or_create(owner=self.user)[0]
+        basket.strategy = strategy.Default()
+        for __ in range(num_lines):
+            add_product(basket, price=D("10.00"))
+
+    def count_queries(self):
+        # Render the page once first, so thumbnails are cached
+        self.get(reverse("basket:summary"))
+        with CaptureQueriesContext(connection) as queries:
+            self.get(reverse("basket:summary"))
+        return len(queries)
+
+    def test_number_of_queries_does_not_depend_on_the_number_of_lines(self):
+        self.add_lines(1)
+        num_queries = self.count_queries()
+        self.add_lines(4)
+        self.assertEqual(num_queries, self.count_queries())
+
+
+class QuickOrderViewTests(WebTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = create_product(
+            price=D("10.00"), num_in_stock=10, partner_sku="SKU-1"
+        )
+        self.other_product = create_product(
+            upc="UPC-2", price=D("5.00"), num_in_stock=10
+        )
+
+    def submit(self, products):
+        page = self.get(reverse("basket:quick-order"))
+        form = page.forms["quick_order_form"]
+        form["products"] = products
+        return form.submit()
+
+    def test_adds_products_to_the_basket(self):
+        response = self.submit("SKU-1, 2\nUPC-2\t3\n\nSKU-1;1")
+        self.assertRedirectsTo(response, "basket:summary")
+        basket = Basket.open.get(owner=self.user)
+        lines = {line.product_id: line.quantity for line in basket.lines.all()}
+        self.assertEqual({self.product.id: 3, self.other_product.id: 3}, lines)
+
+    def test_reports_unknown_products(self):
+        response = self.submit("SKU-1, 2\nUNKNOWN 1")
+        self.assertEqual(http_client.OK, response.status_code)
+        self.assertContains(response, "UNKNOWN")
+        self.assertFalse(Basket.open.filter(owner=self.user, lines__isnull=False))
+
+    def test_reports_products_without_enough_stock(self):
+        response = self.submit("SKU-1, 20")
+        self.assertEqual(http_client.OK, response.status_code)
+        self.assertFalse(Basket.open.filter(owner=self.user, lines__isnull=False))
+
+    def test_reports_skus_of_stockrecords_the_strategy_does_not_select(self):
+        create_stockrecord(
+            self.product,
+            price=D("8.00"),
+            partner_sku="SKU-OTHER",
+            num_in_stock=10,
+            partner_name="Other partner",
+        )
+        response = self.submit("SKU-OTHER, 1")
+        self.assertEqual(http_client.OK, response.status_code)
+        self.assertContains(response, "SKU-OTHER")
+        self.assertFalse(Basket.open.filter(owner=self.user, lines__isnull=False))
+
+    def test_reports_products_with_required_options(self):
+        self.product.product_options.add(OptionFactory(required=True))
+        self.other_product.get_product_class().options.add(
+            OptionFactory(name="Other option", code="other", required=True)
+        )
+        response = self.submit("SKU-1, 1\nUPC-2, 1")
+        self.assertEqual(http_client.OK, response.status_code)
+        self.assertContains(response, "SKU-1, UPC-2")
+        self.assertFalse(Basket.open.filter(owner=self.user, lines__isnull=False))
+
+    def test_adds_products_with_optional_options(self):
+        self.product.product_options.add(OptionFactory(required=False))
+        response = self.submit("SKU-1, 1")
+        self.assertRedirectsTo(response, "basket:summary")
+
+
 class BasketThresholdTest(WebTestCase):
     csrf_checks = False
 
@@ -0,0 +1,51 @@
+from decimal import Decimal as D
+
+from django.test import TestCase
+
+from oscar.apps.basket.models import Basket
+from oscar.apps.partner.strategy import Default
+from oscar.test import factories
+
+
+class TestLoadingABasketForARequest(TestCase):
+    def setUp(self):
+        self.basket = factories.create_basket(empty=True)
+
+    def add_lines(self, num_lines):
+        for __ in range(num_lines):
+            product = factories.create_product(price=D("10.00"), num_in_stock=10)
+            factories.ProductImageFactory(product=product)
+            self.basket.add(product)
+
+    def load(self):
+        basket = Basket.open.load_for_request(pk=self.basket.pk)
+        basket.strategy = Default()
+        for line in basket.all_lines():
+            line.product.get_product_class()
+            line.product.primary_image()
+            line.attributes.all()
+            line.unit_price_incl_tax  # pylint: disable=pointless-statement
+        return basket
+
+    def test_loads_the_basket_in_a_fixed_number_of_queries(self):
+        self.add_lines(1)
+        # The basket, its lines, line attributes, product images and stock
+        # records
+        with self.assertNumQueries(5):
+            self.load()
+        self.add_lines(4)
+        with self.assertNumQueries(5):
+            basket = self.load()
+        self.assertEqual(5, basket.num_lines)
+
+    def test_lines_are_reused(self):
+        self.add_lines(2)
+        basket = self.load()
+        with self.assertNumQueries(0):
+            self.assertEqual(2, basket.num_lines)
+            self.assertEqual(D("20.00"), basket.total_incl_tax)
+
+    def test_only_loads_open_baskets(self):
+        self.basket.freeze()
+        with self.assertRaises(Basket.DoesNotExist):
+            Basket.open.load_for_request(pk=self.basket.pk)
@@ -1,7 +1,20 @@
+from datetime import timedelta
+from decimal import Decimal as D
+from unittest import mock
+
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.http import HttpResponse
-from django.test import TestCase
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
 from oscar.apps.basket import middleware
+from oscar.apps.basket.models import Basket
+from oscar.apps.basket.utils import BasketSummary
+from oscar.apps.offer.applicator import Applicator
+from oscar.apps.offer.models import Benefit, Condition
+from oscar.apps.partner import strategy
+from oscar.test import factories
 from oscar.test.utils import RequestFactory
 
 
@@ -38,3 +51,128 @@ class TestBasketMiddleware(TestCase):
 
         self.assertEqual(None, cookie_basket)
         self.assertIn("oscar_open_basket", request.cookies_to_delete)
+
+    def test_merges_multiple_open_baskets_of_a_user(self):
+        user = factories.UserFactory()
+        product = factories.create_product(num_in_stock=10)
+        baskets = [factories.BasketFactory(owner=user) for __ in range(3)]
+        for basket in baskets:
+            basket.add_product(product, 2)
+        request = RequestFactory().get("/")
+        request.user = user
+        request.cookies_to_delete = []
+        request._basket_cache = None
+
+        basket = self.middleware.get_basket(request)
+        self.assertEqual(baskets[0].id, basket.id)
+        self.assertEqual(1, basket.lines.count())
+        self.assertEqual(2, basket.lines.get().quantity)
+        self.assertEqual(1, Basket.open.filter(owner=user).count())
+
+    def test_merges_multiple_baskets_through_an_overridden_merge_hook(self):
+        user = factories.UserFactory()
+        baskets = [factories.BasketFactory(owner=user) for __ in range(3)]
+        request = RequestFactory().get("/")
+        request.user = user
+        request.cookies_to_delete = []
+        request._basket_cache = None
+
+        merged = []
+
+        class BasketMiddleware(middleware.BasketMiddleware):
+            def merge_baskets(self, master, slave):
+                merged.append((master, slave))
+                super().merge_baskets(master, slave)
+
+        BasketMiddleware(self.get_response_for_test).get_basket(request)
+        self.assertEqual([(baskets[0], baskets[1]), (baskets[0], baskets[2])], merged)
+        self.assertEqual(1, Basket.open.filter(owner=user).count())
+
+
+@override_settings(OSCAR_BASKET_SUMMARY_CACHE_ENABLED=True)
+class TestBasketSummary(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = factories.UserFactory()
+        self.basket = factories.create_basket(empty=True)
+        self.basket.owner = self.user
+        self.basket.save()
+        self.product = factories.create_product(price=D("10.00"))
+        self.basket.add(self.product, 2)
+        rng = factories.RangeFactory(products=[self.product])
+        factories.ConditionalOfferFactory(
+            condition=factories.ConditionFactory(
+                range=rng, type=Condition.COUNT, value=1
+            ),
+            benefit=factories.BenefitFactory(
+                range=rng, type=Benefit.PERCENTAGE, value=D("10")
+            ),
+        )
+
+    def get_summary(self):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        basket_middleware = middleware.BasketMiddleware(lambda request: None)
+        basket_middleware(request)
+        # pylint: disable=no-member
+        return request.basket_summary
+
+    def test_summarises_the_basket_with_offers_applied(self):
+        summary = self.get_summary()
+        self.assertEqual(2, summary.num_items)
+        self.assertEqual(D("20.00"), summary.total_excl_tax_excl_discounts)
+        self.assertEqual(D("18.00"), summary.total_excl_tax)
+        self.assertEqual(D("2.00"), summary.total_discount)
+        self.assertEqual(
+            [self.product.id], [line.product_id for line in summary.all_lines()]
+        )
+
+    def test_cached_summaries_do_not_apply_offers(self):
+        self.assertEqual(D("18.00"), self.get_summary().total_excl_tax)
+        with mock.patch.object(Applicator, "apply") as apply:
+            summary = self.get_summary()
+            self.assertEqual(D("18.00"), summary.total_excl_tax)
+        self.assertFalse(apply.called)
+
+    def test_summary_is_refreshed_when_the_basket_changes(self):
+        self.assertEqual(2, self.get_summary().num_items)
+        self.basket.add(self.product, 1)
+        summary = self.get_summary()
+        self.assertEqual(3, summary.num_items)
+        self.assertEqual(D("27.00"), summary.total_excl_tax)
+
+    def test_summary_is_refreshed_when_a_price_changes(self):
+        self.assertEqual(D("18.00"), self.get_summary().total_excl_tax)
+        stockrecord = self.product.stockrecords.get()
+        stockrecord.price = D("20.00")
+        stockrecord.save()
+        self.assertEqual(D("36.00"), self.get_summary().total_excl_tax)
+
+    def test_summaries_are_cached_per_strategy(self):
+        self.assertTrue(self.get_summary().is_tax_known)
+        with mock.patch.object(
+            middleware.selector, "strategy", return_value=strategy.US()
+        ):
+            summary = self.get_summary()
+        self.assertFalse(summary.is_tax_known)
+        self.assertTrue(self.get_summary().is_tax_known)
+
+    def test_summaries_expire_when_an_offer_starts(self):
+        factories.ConditionalOfferFactory(
+            name="Upcoming offer", start_datetime=now() + timedelta(seconds=60)
+        )
+        cache.clear()
+        self.assertLessEqual(BasketSummary.get_timeout(), 60)
+
+    def test_summaries_expire_after_the_timeout_without_upcoming_offers(self):
+        self.assertEqual(300, BasketSummary.get_timeout())
+
+
+class TestBasketSummaryTemplates(TestCase):
+    def test_fall_back_to_the_basket(self):
+        basket = factories.create_basket(empty=True)
+        basket.add(factories.create_product(price=D("12.34")))
+        request = RequestFactory().get("/", basket=basket)
+        del request.basket_summary
+        html = render_to_string("oscar/partials/mini_basket.html", request=request)
+        self.assertIn("12.34", html)
@@ -1,11 +1,18 @@
 # -*- coding: utf-8 -*-
+import datetime
 from decimal import Decimal as D
+from unittest import mock
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
 
-from oscar.apps.basket.models import Basket
+from oscar.apps.basket.models import Basket, Line
+from oscar.apps.basket.utils import BasketPricing
 from oscar.apps.catalogue.models import Option
 from oscar.apps.partner import availability, prices, strategy
+from oscar.core.prices import TaxNotKnown
 from oscar.test import factories
 from oscar.test.factories import (
     BasketFactory,
@@ -313,6 +320,153 @@ class TestMergingTwoBaskets(TestCase):
         self.assertEqual(Basket.MERGED, self.merge_basket.status)
 
 
+class TestAddingManyProducts(TestCase):
+    def setUp(self):
+        self.basket = factories.create_basket(empty=True)
+        self.products = [
+            factories.create_product(price=D("10.00"), num_in_stock=10)
+            for __ in range(3)
+        ]
+
+    def test_creates_and_updates_lines(self):
+        self.basket.add_product(self.products[0], 1)
+        option = OptionFactory()
+        results = self.basket.add_products(
+            [
+                (self.products[0], 2, None),
+                (self.products[1], 1, None),
+                (self.products[1], 3, None),
+                (self.products[2], 1, [{"option": option, "value": "red"}]),
+            ]
+        )
+        self.assertEqual([False, True, True], [created for __, created in results])
+        self.assertEqual(3, self.basket.num_lines)
+        self.assertEqual(8, self.basket.num_items)
+        lines = {line.product_id: line for line in self.basket.all_lines()}
+        self.assertEqual(3, lines[self.products[0].id].quantity)
+        self.assertEqual(4, lines[self.products[1].id].quantity)
+        self.assertEqual(D("10.00"), lines[self.products[1].id].price_excl_tax)
+        self.assertEqual("red", lines[self.products[2].id].attributes.get().value)
+
+    def test_deletes_lines_whose_quantity_drops_to_zero(self):
+        self.basket.add_product(self.products[0], 2)
+        results = self.basket.add_products(
+            [(self.products[0], -2, None), (self.products[1], -1, None)]
+        )
+        self.assertEqual([], results)
+        self.assertEqual(0, self.basket.lines.count())
+
+    def test_raises_for_products_without_a_price(self):
+        product = factories.create_product()
+        with self.assertRaises(ValueError):
+            self.basket.add_products([(self.products[0], 1, None), (product, 1, None)])
+        self.assertEqual(0, self.basket.lines.count())
+
+    def test_uses_an_overridden_get_stock_info(self):
+        option = OptionFactory()
+        options = [{"option": option, "value": "red"}]
+        with mock.patch.object(
+            Basket,
+            "get_stock_info",
+            autospec=True,
+            side_effect=lambda basket, product, options: (
+                basket.strategy.fetch_for_product(product)
+            ),
+        ) as get_stock_info:
+            self.basket.add_products(
+                [(self.products[0], 1, None), (self.products[1], 1, options)]
+            )
+        get_stock_info.assert_any_call(self.basket, self.products[0], [])
+        get_stock_info.assert_any_call(self.basket, self.products[1], options)
+        self.assertEqual(2, self.basket.num_lines)
+
+    def test_adds_products_in_a_fixed_number_of_queries(self):
+        self.basket.add_product(self.products[0], 1)
+        with CaptureQueriesContext(connection) as queries:
+            self.basket.add_products([(product, 1, None) for product in self.products])
+
+        products = [
+            factories.create_product(price=D("10.00"), num_in_stock=10)
+            for __ in range(10)
+        ]
+        basket = factories.create_basket(empty=True)
+        basket.add_product(products[0], 1)
+        with self.assertNumQueries(len(queries)):
+            basket.add_products([(product, 1, None) for product in products])
+
+
+class TestMergingManyBaskets(TestCase):
+    def setUp(self):
+        self.product = factories.create_product(price=D("10.00"), num_in_stock=100)
+        self.option = OptionFactory()
+        self.basket = self.create_basket()
+        self.basket.add(self.product, quantity=2)
+
+    def create_basket(self):
+        basket = BasketFactory()
+        basket.strategy = strategy.Default()
+        return basket
+
+    def create_baskets(self, num_baskets):
+        baskets = []
+        for __ in range(num_baskets):
+            basket = self.create_basket()
+            voucher = factories.VoucherFactory(
+                name="Voucher %d" % basket.id, code="VOUCHER%d" % basket.id
+            )
+            basket.add(self.product, quantity=1)
+            basket.add(
+                self.product,
+                quantity=3,
+                options=[{"option": self.option, "value": "red"}],
+            )
+            basket.vouchers.add(voucher)
+            baskets.append(basket)
+        return baskets
+
+    def test_combines_and_moves_lines(self):
+        self.basket.merge_many(self.create_baskets(2))
+        lines = {line.attributes.count(): line for line in self.basket.lines.all()}
+        self.assertEqual(2, len(lines))
+        self.assertEqual(4, lines[0].quantity)
+        self.assertEqual(6, lines[1].quantity)
+        self.assertEqual("red", lines[1].attributes.get().value)
+
+    def test_takes_max_quantities(self):
+        self.basket.merge_many(self.create_baskets(2), add_quantities=False)
+        quantities = sorted(self.basket.lines.values_list("quantity", flat=True))
+        self.assertEqual([2, 3], quantities)
+
+    def test_moves_vouchers_and_marks_baskets_as_merged(self):
+        baskets = self.create_baskets(2)
+        self.basket.vouchers.add(baskets[0].vouchers.get())
+        self.basket.merge_many(baskets)
+        self.assertEqual(2, self.basket.vouchers.count())
+        for basket in baskets:
+            basket.refresh_from_db()
+            self.assertEqual(Basket.MERGED, basket.status)
+            self.assertEqual(0, basket.lines.count())
+            self.assertEqual(0, basket.vouchers.count())
+
+    def test_updates_the_dates_of_merged_lines(self):
+        baskets = self.create_baskets(1)
+        Line.objects.update(date_updated=now() - datetime.timedelta(days=30))
+        self.basket.merge_many(baskets)
+        for line in self.basket.lines.all():
+            self.assertGreater(line.date_updated, now() - datetime.timedelta(days=1))
+
+    def test_merges_in_a_fixed_number_of_queries(self):
+        baskets = self.create_baskets(2)
+        with CaptureQueriesContext(connection) as queries:
+            self.basket.merge_many(baskets)
+
+        basket = self.create_basket()
+        basket.add(self.product, quantity=2)
+        baskets = self.create_baskets(5)
+        with self.assertNumQueries(len(queries)):
+            basket.merge_many(baskets)
+
+
 class TestASubmittedBasket(TestCase):
     def setUp(self):
         self.basket = Basket()
@@ -334,3 +488,112 @@ class TestMergingAVoucherBasket(TestCase):
         baskets[1].merge(baskets[0])
 
         self.assertEqual(1, baskets[1].vouchers.all().count())
+
+
+class TestBasketPricing(TestCase):
+    def setUp(self):
+        self.basket = factories.create_basket(empty=True)
+        self.product = factories.create_product(price=D("10.00"))
+        self.basket.add(self.product, 2)
+
+    def test_totals_are_computed_once(self):
+        with mock.patch.object(
+            BasketPricing,
+            "add_line",
+            autospec=True,
+            side_effect=BasketPricing.add_line,
+        ) as add_line:
+            self.assertEqual(D("20.00"), self.basket.total_excl_tax)
+            self.assertEqual(D("20.00"), self.basket.total_incl_tax)
+            self.assertEqual(D("0.00"), self.basket.total_discount)
+        self.assertEqual(1, add_line.call_count)
+
+    def test_totals_are_recomputed_when_discounts_are_applied(self):
+        self.assertEqual(D("20.00"), self.basket.total_excl_tax)
+        line = self.basket.all_lines()[0]
+        line.discount(D("5.00"), 1, incl_tax=False)
+        self.assertEqual(D("15.00"), self.basket.total_excl_tax)
+        self.assertEqual(D("5.00"), self.basket.total_discount)
+
+    def test_totals_are_recomputed_when_the_basket_changes(self):
+        self.assertEqual(D("20.00"), self.basket.total_excl_tax)
+        self.basket.add(self.product, 1)
+        self.assertEqual(D("30.00"), self.basket.total_excl_tax)
+
+    def test_errors_are_only_raised_for_the_affected_total(self):
+        self.basket.strategy = strategy.US()
+        self.assertEqual(D("20.00"), self.basket.total_excl_tax)
+        with self.assertRaises(TaxNotKnown):
+            self.basket.total_incl_tax
+
+    def test_totals_are_recomputed_when_a_line_quantity_is_saved(self):
+        self.assertEqual(D("20.00"), self.basket.total_excl_tax)
+        line = self.basket.all_lines()[0]
+        line.quantity = 3
+        line.save()
+        self.assertEqual(D("30.00"), self.basket.total_excl_tax)
+
+    def test_totals_are_recomputed_when_offer_applications_are_reset(self):
+        self.assertEqual(D("20.00"), self.basket.total_excl_tax)
+        self.product.stockrecords.update(price=D("12.00"))
+        self.basket.reset_offer_applications()
+        self.assertEqual(D("24.00"), self.basket.total_excl_tax)
+
+    def test_totals_are_recomputed_when_a_line_quantity_changes_unsaved(self):
+        self.assertEqual(D("20.00"), self.basket.total_excl_tax)
+        self.basket.all_lines()[0].quantity = 3
+        self.assertEqual(D("30.00"), self.basket.total_excl_tax)
+
+    def test_totals_use_an_overridden_get_total(self):
+        with mock.patch.object(
+            Basket, "_get_total", autospec=True, return_value=D("1.00")
+        ) as get_total:
+            self.assertEqual(D("1.00"), self.basket.total_incl_tax)
+        get_total.assert_called_once_with(
+            self.basket, "line_price_incl_tax_incl_discounts"
+        )
+
+
+class TestBasketOfferLines(TestCase):
+    def setUp(self):
+        self.basket = factories.create_basket(empty=True)
+        self.product = factories.create_product(price=D("10.00"))
+        self.basket.add(self.product, 2)
+        self.offer = factories.create_offer()
+
+    def test_offer_lines_are_built_once(self):
+        offer_lines = self.basket.get_offer_lines()
+        self.assertEqual([self.product.id], [line.product_id for line in offer_lines])
+        self.assertIs(offer_lines[0].line, self.basket.all_lines()[0])
+        self.assertIs(offer_lines, self.basket.get_offer_lines())
+
+    def test_offer_lines_are_rebuilt_when_the_lines_are_reloaded(self):
+        offer_lines = self.basket.get_offer_lines()
+        self.basket.reset_offer_applications()
+        self.assertIsNot(offer_lines, self.basket.get_offer_lines())
+
+    def test_unit_price_and_range_membership_are_looked_up_once(self):
+        offer_line = self.basket.get_offer_lines()[0]
+        self.assertEqual(D("10.00"), offer_line.unit_effective_price)
+        self.assertTrue(offer_line.in_range(self.offer.condition.range))
+        with self.assertNumQueries(0), mock.patch.object(
+            Line, "unit_effective_price", new_callable=mock.PropertyMock
+        ) as unit_effective_price:
+            self.assertEqual(D("10.00"), offer_line.unit_effective_price)
+            self.assertTrue(offer_line.in_range(self.offer.condition.range))
+        self.assertFalse(unit_effective_price.called)
+
+    def test_consumptions_are_recorded_on_the_line(self):
+        offer_line = self.basket.get_offer_lines()[0]
+        self.assertEqual(1, offer_line.consume(1, offer=self.offer))
+        offer_line.discount(D("5.00"), 1, offer=self.offer)
+        line = self.basket.all_lines()[0]
+        self.assertEqual(2, line.quantity_with_offer_discount(self.offer))
+        self.assertEqual(D("5.00"), line.discount_value)
+        self.assertEqual(0, offer_line.quantity_without_offer_discount(self.offer))
+
+    def test_other_attributes_are_looked_up_on_the_line(self):
+        offer_line = self.basket.get_offer_lines()[0]
+        self.assertEqual(
+            self.basket.all_lines()[0].line_reference, offer_line.line_reference
+        )
@@ -1,11 +1,16 @@
 # -*- coding: utf-8 -*-
 import json
+from unittest import mock
 
 from django.core.cache import cache
 from django.test import TestCase
 from django.test.utils import override_settings
 
-from oscar.apps.catalogue.categories import create_from_breadcrumbs
+from oscar.apps.catalogue.categories import (
+    BreadcrumbTree,
+    bulk_create_from_breadcrumbs,
+    create_from_breadcrumbs,
+)
 from oscar.apps.catalogue.models import Category
 from oscar.templatetags.category_tags import get_annotated_list
 
@@ -107,6 +112,150 @@ class TestMovingACategory(TestCase):
         self.assertEqual(cat.path, "00010003")
 
 
+class TestAncestorsArePublic(TestCase):
+    def setUp(self):
+        self.teen = create_from_breadcrumbs("Books > Fiction > Horror > Teen")
+        self.fiction = Category.objects.get(name="Fiction")
+
+    def get_ancestors_are_public(self):
+        return dict(Category.objects.values_list("name", "ancestors_are_public"))
+
+    def test_updates_subtree_when_a_category_is_hidden(self):
+        self.fiction.is_public = False
+        self.fiction.save()
+        self.assertEqual(
+            {"Books": True, "Fiction": True, "Horror": False, "Teen": False},
+            self.get_ancestors_are_public(),
+        )
+        self.fiction.is_public = True
+        self.fiction.save()
+        self.assertTrue(all(self.get_ancestors_are_public().values()))
+
+    def test_can_be_deferred_until_the_end_of_an_import(self):
+        with Category.defer_ancestors_are_public():
+            self.fiction.is_public = False
+            self.fiction.save()
+            Category.objects.get(name="Horror").add_child(name="Gothic")
+            # Nothing has been updated yet
+            self.assertTrue(all(self.get_ancestors_are_public().values()))
+        self.assertEqual(
+            {
+                "Books": True,
+                "Fiction": True,
+                "Horror": False,
+                "Teen": False,
+                "Gothic": False,
+            },
+            self.get_ancestors_are_public(),
+        )
+
+    def test_fix_tree_updates_all_categories(self):
+        Category.objects.update(ancestors_are_public=False)
+        Category.objects.filter(pk=self.fiction.pk).update(is_public=False)
+        Category.fix_tree()
+        self.assertEqual(
+            {"Books": True, "Fiction": True, "Horror": False, "Teen": False},
+            self.get_ancestors_are_public(),
+        )
+
+
+class TestBulkCreateFromBreadcrumbs(TestCase):
+    def setUp(self):
+        create_from_breadcrumbs("Books > Fiction > Horror")
+        create_from_breadcrumbs("Books > Non-fiction")
+        hidden = create_from_breadcrumbs("Toys")
+        hidden.is_public = False
+        hidden.save()
+
+    def test_creates_missing_categories_in_bulk(self):
+        breadcrumbs = [
+            "Books > Fiction > Horror > Teen",
+            "Books > Fiction > Comedy",
+            "Books > Fiction > Horror",
+            "Books > Non-fiction > Biography > Music",
+            "Games > Board games",
+            "Toys > Puzzles",
+        ]
+        with self.assertNumQueries(5):
+            categories = bulk_create_from_breadcrumbs(breadcrumbs)
+        self.assertEqual(
+            ["Teen", "Comedy", "Horror", "Music", "Board games", "Puzzles"],
+            [category.name for category in categories],
+        )
+        self.assertEqual(
+            [category.pk for category in categories],
+            [create_from_breadcrumbs(trail).pk for trail in breadcrumbs],
+        )
+        self.assertEqual(12, Category.objects.count())
+        # The tree built from precomputed paths is consistent
+        self.assertEqual(([], [], [], [], []), Category.find_problems())
+        self.assertEqual(
+            "books/non-fiction/biography/music", categories[3].get_full_slug()
+        )
+        self.assertFalse(Category.objects.get(name="Puzzles").ancestors_are_public)
+
+    def test_rejects_ambiguous_names(self):
+        Category.add_root(name="Books")
+        with self.assertRaises(ValueError):
+            bulk_create_from_breadcrumbs(["Books > Comics"])
+
+    def test_reuses_a_tree_between_calls(self):
+        tree = BreadcrumbTree()
+        bulk_create_from_breadcrumbs(["Books > Fiction > Comedy"], tree=tree)
+        with self.assertNumQueries(4):
+            categories = bulk_create_from_breadcrumbs(
+                ["Books > Fiction > Comedy > Satire", "Books > Fiction"], tree=tree
+            )
+        self.assertEqual(["Satire", "Fiction"], [c.name for c in categories])
+        self.assertEqual(7, Category.objects.count())
+        self.assertEqual(([], [], [], [], []), Category.find_problems())
+
+
+class TestCategoriesWithFullSlugs(TestCase):
+    def setUp(self):
+        cache.clear()
+        for trail in (
+            "Books > Fiction > Horror > Teen",
+            "Books > Fiction > Comedy",
+            "Books > Non-fiction",
+        ):
+            create_from_breadcrumbs(trail)
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_computes_full_slugs_of_a_tree_in_one_query(self):
+        with self.assertNumQueries(1):
+            full_slugs = {
+                category.name: category.full_slug
+                for category in Category.get_tree().with_full_slugs()
+            }
+        self.assertEqual("books/fiction/horror/teen", full_slugs["Teen"])
+        self.assertEqual("books/non-fiction", full_slugs["Non-fiction"])
+
+    def test_loads_slugs_of_ancestors_outside_the_queryset(self):
+        horror = Category.objects.get(name="Horror")
+        with self.assertNumQueries(2):
+            categories = list(horror.get_descendants().with_full_slugs())
+            urls = [category.get_absolute_url() for category in categories]
+        self.assertEqual(
+            ["/catalogue/category/books/fiction/horror/teen_%d/" % categories[0].pk],
+            urls,
+        )
+
+    def test_primes_the_full_slug_cache(self):
+        list(Category.objects.with_full_slugs())
+        comedy = Category.objects.get(name="Comedy")
+        self.assertEqual("books/fiction/comedy", cache.get(comedy.get_url_cache_key()))
+
+    def test_only_primes_full_slugs_that_are_not_cached(self):
+        list(Category.objects.with_full_slugs())
+        with mock.patch.object(cache, "set_many") as set_many:
+            list(Category.objects.with_full_slugs())
+        set_many.assert_not_called()
+
+
 class TestCategoryFactory(TestCase):
     def test_can_create_single_level_category(self):
         trail = "Books"
@@ -306,3 +455,50 @@ class TestCategoryTemplateTags(TestCase):
         actual_categories = self.get_category_names(depth=1, parent=parent)
         expected_categories = {"Horror", "Comedy"}
         self.assertEqual(expected_categories, actual_categories)
+
+
+@override_settings(OSCAR_CATEGORY_TREE_CACHE_ENABLED=True)
+class TestCachedCategoryTemplateTags(TestCategoryTemplateTags):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_renders_cached_tree_without_queries(self):
+        get_annotated_list()
+        parent = Category.objects.get(name="Fiction")
+        with self.assertNumQueries(0):
+            annotated_list = get_annotated_list(depth=1, parent=parent)
+        self.assertEqual(
+            ["Horror", "Comedy"], [category.name for category, __ in annotated_list]
+        )
+        self.assertEqual(
+            parent.get_children().get(name="Comedy").get_absolute_url(),
+            annotated_list[1].get_absolute_url(),
+        )
+
+    def test_tree_is_invalidated_when_categories_change(self):
+        self.assertIn("Children", self.get_category_names())
+        children = Category.objects.get(name="Children")
+        children.is_public = False
+        children.save()
+        self.assertNotIn("Children", self.get_category_names())
+        Category.objects.get(name="Comedy").delete()
+        self.assertNotIn("Comedy", self.get_category_names())
+
+    def test_tree_is_invalidated_when_categories_are_moved(self):
+        fiction = Category.objects.get(name="Fiction")
+        self.assertEqual(
+            {"Horror", "Teen", "Gothic", "Comedy"},
+            self.get_category_names(parent=fiction),
+        )
+        Category.objects.get(name="Comedy").move(
+            Category.objects.get(name="Children"), "last-child"
+        )
+        self.assertEqual(
+            {"Horror", "Teen", "Gothic"}, self.get_category_names(parent=fiction)
+        )
+        Category.objects.get(name="Books").add_child(name="Poetry")
+        self.assertIn("Poetry", self.get_category_names())
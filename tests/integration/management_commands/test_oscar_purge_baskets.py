@@ -0,0 +1,111 @@
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models.query import QuerySet
+from django.test import TestCase
+from django.utils.timezone import now
+
+from oscar.apps.basket.models import Basket, Line, LineAttribute
+from oscar.test import factories
+
+
+class TestPurgeBasketsCommand(TestCase):
+    def setUp(self):
+        self.product = factories.create_product(price=10, num_in_stock=10)
+        self.option = factories.OptionFactory()
+        self.long_ago = now() - timedelta(days=100)
+
+    def create_basket(self, status=Basket.OPEN, **kwargs):
+        basket = factories.create_basket(empty=True)
+        basket.add_product(
+            self.product,
+            options=[{"option": self.option, "value": "red"}],
+        )
+        Basket.objects.filter(pk=basket.pk).update(
+            status=status, date_created=self.long_ago, **kwargs
+        )
+        basket.lines.update(date_updated=self.long_ago)
+        return basket
+
+    def purge(self, *args):
+        stdout = io.StringIO()
+        call_command("oscar_purge_baskets", *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_deletes_abandoned_baskets_in_chunks(self):
+        baskets = [self.create_basket() for __ in range(3)]
+        baskets.append(
+            self.create_basket(status=Basket.MERGED, date_merged=self.long_ago)
+        )
+        output = self.purge("--chunk-size", "2")
+        self.assertIn("Deleted 2 of 4 baskets", output)
+        self.assertIn("Deleted 4 of 4 baskets", output)
+        self.assertFalse(Basket.objects.filter(pk__in=[b.pk for b in baskets]))
+        self.assertEqual(0, Line.objects.count())
+        self.assertEqual(0, LineAttribute.objects.count())
+
+    def test_keeps_recent_and_other_baskets(self):
+        recent = factories.create_basket()
+        changed = self.create_basket()
+        changed.lines.update(date_updated=now())
+        merged = self.create_basket(status=Basket.MERGED, date_merged=now())
+        saved = self.create_basket(status=Basket.SAVED)
+        submitted = self.create_basket(status=Basket.SUBMITTED)
+        self.purge()
+        self.assertEqual(
+            {recent.pk, changed.pk, merged.pk, saved.pk, submitted.pk},
+            set(Basket.objects.values_list("pk", flat=True)),
+        )
+
+    def test_dry_run_does_not_delete(self):
+        basket = self.create_basket()
+        self.assertIn("Found 1 baskets", self.purge("--dry-run"))
+        self.assertTrue(Basket.objects.filter(pk=basket.pk).exists())
+
+    def test_archives_baskets_before_deleting_them(self):
+        basket = self.create_basket()
+        handle, path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        self.purge("--archive", path)
+        with open(path, encoding="utf-8") as archive:
+            rows = [json.loads(row) for row in archive]
+        self.assertEqual([basket.pk], [row["id"] for row in rows])
+        self.assertEqual(self.product.pk, rows[0]["lines"][0]["product_id"])
+        self.assertEqual("red", rows[0]["lines"][0]["attributes"][0]["value"])
+
+    def test_does_not_archive_baskets_again_when_rerun(self):
+        basket = self.create_basket()
+        handle, path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        with mock.patch.object(QuerySet, "delete", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.purge("--archive", path)
+        self.assertTrue(Basket.objects.filter(pk=basket.pk).exists())
+        self.purge("--archive", path)
+        with open(path, encoding="utf-8") as archive:
+            rows = [json.loads(row) for row in archive]
+        self.assertEqual([basket.pk], [row["id"] for row in rows])
+        self.assertFalse(Basket.objects.filter(pk=basket.pk).exists())
+
+    def test_does_not_delete_baskets_changed_after_they_were_selected(self):
+        basket = self.create_basket()
+        original_filter = QuerySet.filter
+
+        def filter_after_change(queryset, *args, **kwargs):
+            # Change the basket between selecting and deleting its chunk
+            if "pk__in" in kwargs:
+                basket.lines.update(date_updated=now())
+            return original_filter(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, "filter", filter_after_change):
+            output = self.purge()
+        self.assertIn("Deleted 0 of 1 baskets", output)
+        self.assertTrue(Basket.objects.filter(pk=basket.pk).exists())
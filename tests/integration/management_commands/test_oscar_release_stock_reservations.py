@@ -0,0 +1,43 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from oscar.apps.partner.models import StockReservation
+from oscar.test import factories
+
+
+@override_settings(OSCAR_STOCK_RESERVATION_ENABLED=True)
+class TestReleaseStockReservationsCommand(TestCase):
+    def setUp(self):
+        self.product = factories.create_product(price=10, num_in_stock=10)
+        self.stockrecord = self.product.stockrecords.get()
+        for __ in range(3):
+            basket = factories.create_basket(empty=True)
+            basket.add_product(self.product, 2)
+
+    def release(self, *args):
+        stdout = io.StringIO()
+        call_command("oscar_release_stock_reservations", *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_releases_expired_reservations_in_chunks(self):
+        expired = StockReservation.objects.order_by("pk").values_list("pk", flat=True)[
+            :2
+        ]
+        StockReservation.objects.filter(pk__in=list(expired)).update(
+            date_expires=now() - timedelta(seconds=1)
+        )
+        output = self.release("--chunk-size", "1")
+        self.assertIn("Released 2 expired stock reservations", output)
+        self.assertEqual(1, StockReservation.objects.count())
+        self.stockrecord.refresh_from_db()
+        self.assertEqual(2, self.stockrecord.num_reserved)
+        self.assertEqual(8, self.stockrecord.net_stock_level)
+
+    def test_keeps_reservations_that_have_not_expired(self):
+        output = self.release()
+        self.assertIn("Released 0 expired stock reservations", output)
+        self.assertEqual(3, StockReservation.objects.count())
@@ -0,0 +1,151 @@
+from decimal import Decimal as D
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from oscar.apps.basket.models import Basket
+from oscar.apps.offer import models
+from oscar.apps.offer.applicator import Applicator
+from oscar.apps.offer.cache import BasketOfferCache
+from oscar.apps.partner.strategy import Default
+from oscar.test.basket import add_product
+from oscar.test.factories import (
+    BasketFactory,
+    BenefitFactory,
+    CategoryFactory,
+    ConditionalOfferFactory,
+    ConditionFactory,
+    RangeFactory,
+    create_product,
+)
+
+
+@override_settings(OSCAR_OFFERS_BASKET_CACHE_ENABLED=True)
+class TestBasketOfferCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = create_product(price=D("10.00"))
+        self.range = rng = RangeFactory(products=[self.product])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.offer = ConditionalOfferFactory(
+                condition=ConditionFactory(
+                    range=rng, type=models.Condition.COUNT, value=1
+                ),
+                benefit=BenefitFactory(
+                    range=rng, type=models.Benefit.PERCENTAGE, value=D("10")
+                ),
+            )
+        basket = BasketFactory()
+        add_product(basket, product=self.product, quantity=2)
+        self.apply(basket)
+        self.basket_id = basket.id
+
+    def get_basket(self):
+        basket = Basket.objects.get(pk=self.basket_id)
+        basket.strategy = Default()
+        return basket
+
+    def apply(self, basket):
+        BasketOfferCache().apply(basket)
+
+    def test_restores_offer_applications(self):
+        basket = self.get_basket()
+        with mock.patch.object(Applicator, "apply_offers") as apply_offers:
+            self.apply(basket)
+        self.assertFalse(apply_offers.called)
+        self.assertEqual(D("2.00"), basket.total_discount)
+        self.assertEqual(D("2.00"), basket.all_lines()[0].discount_value)
+        self.assertEqual([self.offer.pk], list(basket.applied_offers()))
+        self.assertEqual(
+            1, basket.offer_applications.applications[self.offer.pk]["freq"]
+        )
+
+    def test_recalculates_when_the_basket_changes(self):
+        basket = self.get_basket()
+        add_product(basket, product=self.product, quantity=1)
+        self.apply(basket)
+        self.assertEqual(D("3.00"), basket.total_discount)
+
+    def test_recalculates_when_an_offer_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.offer.suspend()
+        basket = self.get_basket()
+        self.apply(basket)
+        self.assertEqual(D("0.00"), basket.total_discount)
+        self.assertEqual({}, basket.applied_offers())
+
+    def test_recalculates_when_the_range_products_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.range.included_products.remove(self.product)
+        basket = self.get_basket()
+        self.apply(basket)
+        self.assertEqual(D("0.00"), basket.total_discount)
+
+    def test_recalculates_when_the_product_categories_change(self):
+        category = CategoryFactory()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.range.included_products.remove(self.product)
+            self.range.included_categories.add(category)
+        self.apply(self.get_basket())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.categories.add(category)
+        basket = self.get_basket()
+        self.apply(basket)
+        self.assertEqual(D("2.00"), basket.total_discount)
+
+
+@override_settings(
+    OSCAR_OFFERS_BASKET_CACHE_ENABLED=True, OSCAR_OFFERS_INCREMENTAL_APPLICATION=True
+)
+class TestIncrementalApplicationAcrossRequests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product_a = create_product(price=D("10.00"))
+        self.product_b = create_product(price=D("20.00"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.offers = [
+                ConditionalOfferFactory(
+                    condition=ConditionFactory(
+                        range=rng, type=models.Condition.COUNT, value=1
+                    ),
+                    benefit=BenefitFactory(
+                        range=rng, type=models.Benefit.PERCENTAGE, value=D("10")
+                    ),
+                )
+                for rng in (
+                    RangeFactory(products=[self.product_a]),
+                    RangeFactory(products=[self.product_b]),
+                )
+            ]
+        basket = BasketFactory()
+        add_product(basket, product=self.product_a, quantity=2)
+        add_product(basket, product=self.product_b, quantity=2)
+        BasketOfferCache().apply(basket)
+        self.basket_id = basket.id
+
+    def get_basket(self):
+        basket = Basket.objects.get(pk=self.basket_id)
+        basket.strategy = Default()
+        return basket
+
+    def test_only_reapplies_offers_affected_by_the_change(self):
+        basket = self.get_basket()
+        add_product(basket, product=self.product_b, quantity=1)
+        basket = self.get_basket()
+        with mock.patch.object(
+            models.ConditionalOffer,
+            "apply_benefit",
+            autospec=True,
+            side_effect=models.ConditionalOffer.apply_benefit,
+        ) as apply_benefit:
+            BasketOfferCache().apply(basket)
+        self.assertEqual(
+            {self.offers[1].pk},
+            {call.args[0].pk for call in apply_benefit.mock_calls},
+        )
+        self.assertEqual(D("8.00"), basket.total_discount)
+        self.assertEqual(
+            {offer.pk for offer in self.offers}, set(basket.applied_offers())
+        )
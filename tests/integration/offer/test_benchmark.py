@@ -0,0 +1,66 @@
+import os
+from unittest import skipUnless
+
+from django.test import TestCase
+
+from oscar.apps.offer import models
+from oscar.test import factories
+from oscar.test.benchmark import OfferBenchmark, format_results
+
+
+class TestSyntheticGenerators(TestCase):
+    def test_creates_offers_of_every_type(self):
+        products = factories.create_catalogue(4)
+        ranges = factories.create_ranges(products, 2)
+        offers = factories.create_offers(ranges)
+        self.assertEqual(
+            len(factories.CONDITION_TYPES) * len(factories.BENEFIT_TYPES), len(offers)
+        )
+        self.assertEqual(
+            {benefit_type for benefit_type, *__ in factories.BENEFIT_TYPES},
+            set(models.Benefit.objects.values_list("type", flat=True)),
+        )
+        self.assertEqual([2, 2], [rng.num_products() for rng in ranges])
+
+    def test_creates_baskets_of_the_requested_size(self):
+        products = factories.create_catalogue(3)
+        basket = factories.create_basket_with_lines(products, 2)
+        self.assertEqual(2, basket.num_lines)
+
+
+class TestOfferBenchmark(TestCase):
+    def test_reports_a_result_per_basket_size(self):
+        benchmark = OfferBenchmark(
+            num_products=5, num_ranges=2, basket_sizes=(1, 5), repeat=1
+        )
+        results = benchmark.run()
+        self.assertEqual([1, 5], [result.num_lines for result in results])
+        for result in results:
+            self.assertEqual(24, result.num_offers)
+            self.assertGreater(result.wall_time, 0)
+            self.assertGreater(result.num_queries, 0)
+            self.assertGreater(result.peak_memory, 0)
+        self.assertGreater(results[1].num_applied_offers, 0)
+
+    def test_formats_results_as_a_table(self):
+        benchmark = OfferBenchmark(
+            num_products=2, num_ranges=1, num_offers=3, basket_sizes=(1, 2), repeat=1
+        )
+        lines = format_results(benchmark.run())
+        self.assertEqual(3, len(lines))
+        self.assertIn("queries", lines[0])
+
+
+@skipUnless(
+    os.environ.get("OSCAR_BENCHMARK_OFFERS"),
+    "Set OSCAR_BENCHMARK_OFFERS to benchmark applying offers",
+)
+class BenchmarkOffers(TestCase):
+    def test_benchmark(self):
+        benchmark = OfferBenchmark(
+            num_products=int(os.environ.get("OSCAR_BENCHMARK_PRODUCTS", 100)),
+            num_ranges=int(os.environ.get("OSCAR_BENCHMARK_RANGES", 10)),
+        )
+        print()
+        for line in format_results(benchmark.run()):
+            print(line)
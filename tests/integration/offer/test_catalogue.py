@@ -0,0 +1,84 @@
+import datetime
+from decimal import Decimal as D
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from oscar.apps.offer import models
+from oscar.apps.offer.applicator import Applicator
+from oscar.apps.offer.catalogue import OfferCatalogue
+from oscar.test.factories import (
+    BenefitFactory,
+    ConditionalOfferFactory,
+    ConditionFactory,
+    RangeFactory,
+)
+
+
+@override_settings(OSCAR_OFFERS_CATALOGUE_ENABLED=True)
+class TestOfferCatalogue(TestCase):
+    def setUp(self):
+        cache.delete(OfferCatalogue.version_cache_key)
+        self.catalogue = OfferCatalogue()
+        self.range = RangeFactory(includes_all_products=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.offer = ConditionalOfferFactory(
+                name="Site offer",
+                condition=ConditionFactory(
+                    range=self.range, type=models.Condition.COUNT, value=2
+                ),
+                benefit=BenefitFactory(
+                    range=self.range, type=models.Benefit.PERCENTAGE, value=10
+                ),
+            )
+
+    def test_returns_offers_with_resolved_proxies(self):
+        offers = self.catalogue.get_site_offers()
+        self.assertEqual([self.offer.pk], [offer.pk for offer in offers])
+        offer = offers[0]
+        self.assertIsInstance(offer.condition, models.CountCondition)
+        self.assertIsInstance(offer.benefit, models.PercentageDiscountBenefit)
+        self.assertIs(offer.condition.proxy(), offer.condition)
+
+    def test_does_not_query_once_compiled(self):
+        self.catalogue.get_site_offers()
+        with self.assertNumQueries(0):
+            offers = self.catalogue.get_site_offers()
+            self.assertEqual(self.range.pk, offers[0].condition.range.pk)
+            self.assertEqual(self.range.pk, offers[0].benefit.range.pk)
+
+    def test_returns_fresh_copies_sharing_ranges(self):
+        first = self.catalogue.get_site_offers()[0]
+        second = self.catalogue.get_site_offers()[0]
+        self.assertIsNot(first, second)
+        self.assertIsNot(first.condition, second.condition)
+        self.assertIs(first.condition.range, first.benefit.range)
+
+    def test_is_rebuilt_when_an_offer_is_saved(self):
+        self.catalogue.get_site_offers()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.offer.suspend()
+        self.assertEqual([], self.catalogue.get_site_offers())
+
+    def test_is_rebuilt_when_a_range_is_saved(self):
+        self.catalogue.get_site_offers()
+        self.range.name = "Renamed range"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.range.save()
+        offers = self.catalogue.get_site_offers()
+        self.assertEqual("Renamed range", offers[0].condition.range.name)
+
+    def test_excludes_offers_outside_of_their_date_range(self):
+        self.catalogue.get_site_offers()
+        # Simulate the offer expiring after the catalogue was compiled
+        compiled_offer = self.catalogue._compiled[1][0]
+        compiled_offer.end_datetime = timezone.now() - datetime.timedelta(days=1)
+        self.assertEqual([], self.catalogue.get_site_offers())
+
+    def test_is_used_by_the_applicator(self):
+        Applicator().get_site_offers()
+        with self.assertNumQueries(0):
+            offers = Applicator().get_site_offers()
+        self.assertEqual([self.offer.pk], [offer.pk for offer in offers])
+        self.assertEqual(D("10.00"), offers[0].benefit.value)
@@ -0,0 +1,112 @@
+from decimal import Decimal as D
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from oscar.apps.offer import models
+from oscar.apps.offer.applicator import Applicator
+from oscar.test.basket import add_product
+from oscar.test.factories import (
+    BasketFactory,
+    BenefitFactory,
+    ConditionalOfferFactory,
+    ConditionFactory,
+    RangeFactory,
+    create_product,
+)
+
+
+def create_offer(rng, priority=0):
+    return ConditionalOfferFactory(
+        priority=priority,
+        condition=ConditionFactory(range=rng, type=models.Condition.COUNT, value=1),
+        benefit=BenefitFactory(
+            range=rng, type=models.Benefit.PERCENTAGE, value=D("10")
+        ),
+    )
+
+
+@override_settings(OSCAR_OFFERS_INCREMENTAL_APPLICATION=True)
+class TestIncrementalApplication(TestCase):
+    def setUp(self):
+        self.applicator = Applicator()
+        self.basket = BasketFactory()
+        self.product_a = create_product(price=D("10.00"))
+        self.product_b = create_product(price=D("20.00"))
+        self.range_a = RangeFactory(products=[self.product_a])
+        self.range_b = RangeFactory(products=[self.product_b])
+        self.offer_a = create_offer(self.range_a, priority=1)
+        self.offer_b = create_offer(self.range_b)
+        add_product(self.basket, product=self.product_a, quantity=2)
+        add_product(self.basket, product=self.product_b, quantity=2)
+        self.apply()
+
+    def apply(self):
+        # Offers are reloaded on every application, as they are in a request
+        offers = list(
+            models.ConditionalOffer.objects.filter(
+                pk__in=[self.offer_a.pk, self.offer_b.pk]
+            ).order_by("-priority")
+        )
+        self.applicator.apply_offers(self.basket, offers)
+
+    def test_only_reapplies_offers_affected_by_the_change(self):
+        add_product(self.basket, product=self.product_b, quantity=1)
+        with mock.patch.object(
+            models.ConditionalOffer,
+            "apply_benefit",
+            autospec=True,
+            side_effect=models.ConditionalOffer.apply_benefit,
+        ) as apply_benefit:
+            self.apply()
+        self.assertEqual(
+            {self.offer_b.pk}, {call.args[0].pk for call in apply_benefit.mock_calls}
+        )
+
+    def test_carries_over_unaffected_discounts(self):
+        add_product(self.basket, product=self.product_b, quantity=1)
+        self.apply()
+        lines = {line.product_id: line for line in self.basket.all_lines()}
+        self.assertEqual(D("2.00"), lines[self.product_a.pk].discount_value)
+        self.assertEqual(D("6.00"), lines[self.product_b.pk].discount_value)
+        self.assertEqual(D("8.00"), self.basket.total_discount)
+        self.assertEqual(
+            {self.offer_a.pk, self.offer_b.pk}, set(self.basket.applied_offers())
+        )
+
+    def test_matches_a_full_application(self):
+        line = self.basket.all_lines().get(product=self.product_a)
+        line.delete()
+        self.basket.reset_offer_applications()
+        self.apply()
+        incremental_total = self.basket.total_incl_tax
+
+        self.basket.reset_offer_applications()
+        with override_settings(OSCAR_OFFERS_INCREMENTAL_APPLICATION=False):
+            self.apply()
+        self.assertEqual(self.basket.total_incl_tax, incremental_total)
+        self.assertEqual({self.offer_b.pk}, set(self.basket.applied_offers()))
+
+    def test_reapplies_all_offers_when_the_offers_change(self):
+        self.basket.reset_offer_applications()
+        self.applicator.apply_offers(self.basket, [self.offer_b])
+        self.assertEqual({self.offer_b.pk}, set(self.basket.applied_offers()))
+        self.assertEqual(D("4.00"), self.basket.total_discount)
+
+    def test_reapplies_offers_whose_ranges_changed(self):
+        self.range_a.add_product(self.product_b)
+        self.basket.reset_offer_applications()
+        self.apply()
+        incremental_applications = self.basket.applied_offers()
+        incremental_discounts = [
+            line.discount_value for line in self.basket.all_lines()
+        ]
+
+        self.basket.reset_offer_applications()
+        with override_settings(OSCAR_OFFERS_INCREMENTAL_APPLICATION=False):
+            self.apply()
+        self.assertEqual(self.basket.applied_offers(), incremental_applications)
+        self.assertEqual(
+            [line.discount_value for line in self.basket.all_lines()],
+            incremental_discounts,
+        )
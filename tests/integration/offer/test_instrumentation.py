@@ -0,0 +1,93 @@
+from decimal import Decimal as D
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from oscar.apps.offer.applicator import Applicator
+from oscar.apps.offer.instrumentation import OfferStatistics
+from oscar.apps.offer.signals import offer_evaluated
+from oscar.test import factories
+from oscar.test.basket import add_product
+from oscar.test.contextmanagers import mock_signal_receiver
+
+
+@override_settings(OSCAR_OFFERS_INSTRUMENTATION_ENABLED=True)
+class TestOfferInstrumentation(TestCase):
+    def setUp(self):
+        OfferStatistics().flush()
+        cache.clear()
+        self.offer = factories.create_offer()
+        self.basket = factories.create_basket(empty=True)
+        add_product(self.basket, D("10.00"), 2)
+        add_product(self.basket, D("5.00"), 1)
+
+    def test_sends_statistics_for_each_offer(self):
+        with mock_signal_receiver(offer_evaluated) as receiver:
+            Applicator().apply_offers(self.basket, [self.offer])
+        self.assertEqual(1, receiver.call_count)
+        kwargs = receiver.call_args[1]
+        self.assertEqual(self.offer, kwargs["offer"])
+        stats = kwargs["stats"]
+        self.assertGreater(stats.wall_time, 0)
+        self.assertEqual(1, stats.num_applications)
+        self.assertEqual(2, stats.num_evaluations)
+        self.assertEqual(2, stats.num_lines)
+
+    def test_counts_queries(self):
+        with mock_signal_receiver(offer_evaluated) as receiver:
+            Applicator().apply_offers(self.basket, [self.offer])
+        self.assertGreater(receiver.call_args[1]["stats"].num_queries, 0)
+
+    def test_aggregates_statistics(self):
+        Applicator().apply_offers(self.basket, [self.offer])
+        self.basket.reset_offer_applications()
+        Applicator().apply_offers(self.basket, [self.offer])
+        statistics = OfferStatistics().get_many([self.offer.id])[self.offer.id]
+        self.assertEqual(2, statistics["count"])
+        self.assertEqual(1, statistics["avg_applications"])
+        self.assertEqual(2, statistics["avg_lines"])
+
+    @override_settings(OSCAR_OFFERS_INSTRUMENTATION_ENABLED=False)
+    def test_is_disabled_by_default(self):
+        with mock_signal_receiver(offer_evaluated) as receiver:
+            Applicator().apply_offers(self.basket, [self.offer])
+        self.assertFalse(receiver.called)
+        self.assertEqual({}, OfferStatistics().get_many([self.offer.id]))
+
+    def test_buffers_statistics_until_flushed(self):
+        statistics = OfferStatistics()
+        Applicator().apply_offers(self.basket, [self.offer])
+        self.assertIsNone(cache.get(statistics.get_key(self.offer.id)))
+        statistics.flush()
+        self.assertEqual(1, cache.get(statistics.get_key(self.offer.id))["count"])
+
+    def test_flushes_buffers_older_than_the_flush_interval(self):
+        statistics = OfferStatistics()
+        with mock.patch.object(OfferStatistics, "flush_interval", 0):
+            Applicator().apply_offers(self.basket, [self.offer])
+        self.assertEqual(1, cache.get(statistics.get_key(self.offer.id))["count"])
+
+    def test_flushes_all_offers_with_two_cache_calls(self):
+        other_offer = factories.create_offer(name="Other offer")
+        Applicator().apply_offers(self.basket, [self.offer, other_offer])
+        with mock.patch(
+            "oscar.apps.offer.instrumentation.cache", wraps=cache
+        ) as mocked_cache:
+            OfferStatistics().flush()
+        self.assertEqual(
+            ["get_many", "set_many"], [name for name, _, _ in mocked_cache.mock_calls]
+        )
+
+    def test_adds_to_totals_recorded_by_other_processes(self):
+        statistics = OfferStatistics()
+        cache.set(
+            statistics.get_key(self.offer.id),
+            {"count": 3, "num_lines": 6, "max_wall_time_us": 10**9},
+            None,
+        )
+        Applicator().apply_offers(self.basket, [self.offer])
+        aggregated = statistics.get_many([self.offer.id])[self.offer.id]
+        self.assertEqual(4, aggregated["count"])
+        self.assertEqual(2, aggregated["avg_lines"])
+        self.assertEqual(1000000, aggregated["max_time_ms"])
@@ -0,0 +1,176 @@
+from decimal import Decimal as D
+
+from django.test import TestCase, override_settings
+
+from oscar.apps.offer import models
+from oscar.apps.offer.applicator import Applicator, OptimalApplicator
+from oscar.apps.offer.signals import offer_evaluated
+from oscar.test.basket import add_product
+from oscar.test.contextmanagers import mock_signal_receiver
+from oscar.test.factories import (
+    BasketFactory,
+    BenefitFactory,
+    ConditionalOfferFactory,
+    ConditionFactory,
+    RangeFactory,
+    create_product,
+)
+
+
+def create_offer(rng, count, benefit_type, value, priority=0):
+    return ConditionalOfferFactory(
+        priority=priority,
+        condition=ConditionFactory(range=rng, type=models.Condition.COUNT, value=count),
+        benefit=BenefitFactory(range=rng, type=benefit_type, value=value),
+    )
+
+
+@override_settings(OSCAR_OFFERS_OPTIMAL_MIN_LINES=0)
+class TestOptimalApplicator(TestCase):
+    def setUp(self):
+        self.basket = BasketFactory()
+        product_a = create_product(price=D("10.00"))
+        product_b = create_product(price=D("10.00"))
+        add_product(self.basket, product=product_a)
+        add_product(self.basket, product=product_b)
+
+        # Applied first by priority, this offer takes both products and stops
+        # the bigger discount on product A from being applied, while applying
+        # it second still discounts both products
+        self.multibuy = create_offer(
+            RangeFactory(products=[product_a, product_b]),
+            2,
+            models.Benefit.PERCENTAGE,
+            D("10"),
+            priority=1,
+        )
+        self.half_price = create_offer(
+            RangeFactory(products=[product_a]), 1, models.Benefit.PERCENTAGE, D("50")
+        )
+        self.offers = [self.multibuy, self.half_price]
+
+    def test_greedy_application_by_priority(self):
+        Applicator().apply_offers(self.basket, self.offers)
+        self.assertEqual(D("2.00"), self.basket.total_discount)
+
+    def test_finds_the_biggest_discount(self):
+        OptimalApplicator().apply_offers(self.basket, self.offers)
+        self.assertEqual(D("7.00"), self.basket.total_discount)
+        self.assertEqual(
+            [self.half_price.pk, self.multibuy.pk], list(self.basket.applied_offers())
+        )
+
+    def test_applies_offers_greedily_to_small_baskets(self):
+        with override_settings(OSCAR_OFFERS_OPTIMAL_MIN_LINES=3):
+            OptimalApplicator().apply_offers(self.basket, self.offers)
+        self.assertEqual(D("2.00"), self.basket.total_discount)
+
+    def test_keeps_the_greedy_application_when_out_of_time(self):
+        with override_settings(OSCAR_OFFERS_OPTIMAL_TIME_BUDGET=0):
+            OptimalApplicator().apply_offers(self.basket, self.offers)
+        self.assertEqual(D("2.00"), self.basket.total_discount)
+        self.assertEqual([self.multibuy.pk], list(self.basket.applied_offers()))
+
+    def test_applies_offers_which_do_not_discount_the_basket(self):
+        product = create_product(price=D("5.00"))
+        add_product(self.basket, product=product)
+        shipping = create_offer(
+            RangeFactory(products=[product]),
+            1,
+            models.Benefit.SHIPPING_PERCENTAGE,
+            D("100"),
+        )
+        OptimalApplicator().apply_offers(self.basket, self.offers + [shipping])
+        self.assertEqual(D("7.00"), self.basket.total_discount)
+        self.assertEqual(
+            {self.half_price.pk, self.multibuy.pk, shipping.pk},
+            set(self.basket.applied_offers()),
+        )
+
+
+@override_settings(OSCAR_OFFERS_OPTIMAL_MIN_LINES=0)
+class TestOptimalApplicatorBound(TestCase):
+    def setUp(self):
+        self.basket = BasketFactory()
+        product_a = create_product(price=D("20.00"))
+        product_b = create_product(price=D("6.00"))
+        product_c = create_product(price=D("40.00"))
+        for product in (product_a, product_b, product_c):
+            add_product(self.basket, product=product)
+
+        # Any product for 5.00. On its own it's used on the cheapest product,
+        # but once the other offers have consumed the cheaper products it's
+        # worth much more than that.
+        self.fixed_price = ConditionalOfferFactory(
+            max_basket_applications=1,
+            condition=ConditionFactory(
+                range=RangeFactory(products=[product_a, product_b, product_c]),
+                type=models.Condition.COUNT,
+                value=1,
+            ),
+            benefit=BenefitFactory(
+                range=None, type=models.Benefit.FIXED_PRICE, value=D("5.00")
+            ),
+        )
+        self.half_price = create_offer(
+            RangeFactory(products=[product_b]),
+            1,
+            models.Benefit.PERCENTAGE,
+            D("50"),
+        )
+        self.ten_percent = create_offer(
+            RangeFactory(products=[product_a]), 1, models.Benefit.PERCENTAGE, D("10")
+        )
+        self.offers = [self.half_price, self.fixed_price, self.ten_percent]
+
+    def test_greedy_application_beats_the_sum_of_standalone_discounts(self):
+        Applicator().apply_offers(self.basket, self.offers)
+        self.assertEqual(D("18.00"), self.basket.total_discount)
+
+    def test_finds_discounts_bigger_than_standalone_ones(self):
+        OptimalApplicator().apply_offers(self.basket, self.offers)
+        self.assertEqual(D("40.00"), self.basket.total_discount)
+
+    def test_searches_offers_without_a_standalone_discount(self):
+        basket = BasketFactory()
+        product_a = create_product(price=D("20.00"))
+        product_b = create_product(price=D("4.00"))
+        product_c = create_product(price=D("40.00"))
+        for product in (product_a, product_b, product_c):
+            add_product(basket, product=product)
+        # On its own, it's used on the 4.00 product and doesn't discount it
+        fixed_price = ConditionalOfferFactory(
+            max_basket_applications=1,
+            condition=ConditionFactory(
+                range=RangeFactory(products=[product_a, product_b, product_c]),
+                type=models.Condition.COUNT,
+                value=1,
+            ),
+            benefit=BenefitFactory(
+                range=None, type=models.Benefit.FIXED_PRICE, value=D("5.00")
+            ),
+        )
+        half_price = create_offer(
+            RangeFactory(products=[product_b]), 1, models.Benefit.PERCENTAGE, D("50")
+        )
+        ten_percent = create_offer(
+            RangeFactory(products=[product_a]), 1, models.Benefit.PERCENTAGE, D("10")
+        )
+        ten_percent_c = create_offer(
+            RangeFactory(products=[product_c]), 1, models.Benefit.PERCENTAGE, D("10")
+        )
+        OptimalApplicator().apply_offers(
+            basket, [fixed_price, half_price, ten_percent, ten_percent_c]
+        )
+        # Half price on the 4.00 product, 10% off the 20.00 one, and the 40.00
+        # one for 5.00
+        self.assertEqual(D("39.00"), basket.total_discount)
+
+    @override_settings(OSCAR_OFFERS_INSTRUMENTATION_ENABLED=True)
+    def test_only_the_greedy_application_is_instrumented(self):
+        with mock_signal_receiver(offer_evaluated) as receiver:
+            OptimalApplicator().apply_offers(self.basket, self.offers)
+        self.assertEqual(
+            [offer.pk for offer in self.offers],
+            [call.kwargs["offer"].pk for call in receiver.call_args_list],
+        )
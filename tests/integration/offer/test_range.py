@@ -1,7 +1,10 @@
+from decimal import Decimal as D
+
 from django.test import TestCase
 
 from oscar.apps.catalogue import models as catalogue_models
 from oscar.apps.offer import models
+from oscar.test import factories
 from oscar.test.factories import create_product
 
 
@@ -370,3 +373,39 @@ class TestRangeQuerySet(TestCase):
             0,
             "No ranges should contain child2 after explicitly removing it from the only range that contained it",
         )
+
+
+class TestFilterProducts(TestCase):
+    def setUp(self):
+        self.range = models.Range.objects.create(name="Range")
+        self.included = create_product(price=D("10.00"))
+        self.excluded = create_product(price=D("10.00"))
+        self.range.add_product(self.included)
+
+    def test_returns_ids_of_contained_products(self):
+        self.assertEqual(
+            {self.included.id},
+            self.range.filter_products([self.included.id, self.excluded.id]),
+        )
+
+    def test_is_a_single_query_once_the_range_is_loaded(self):
+        rng = models.Range.objects.get(pk=self.range.pk)
+        rng.filter_products([self.included.id])
+        with self.assertNumQueries(1):
+            rng.filter_products([self.included.id, self.excluded.id])
+
+    def test_basket_checks_each_range_once(self):
+        basket = factories.create_basket(empty=True)
+        basket.add_product(self.included)
+        basket.add_product(self.excluded)
+        rng = models.Range.objects.get(pk=self.range.pk)
+        basket.get_range_product_ids(rng)
+        with self.assertNumQueries(0):
+            self.assertEqual({self.included.id}, basket.get_range_product_ids(rng))
+
+    def test_basket_cache_follows_basket_contents(self):
+        basket = factories.create_basket(empty=True)
+        basket.add_product(self.excluded)
+        self.assertEqual(set(), basket.get_range_product_ids(self.range))
+        basket.add_product(self.included)
+        self.assertEqual({self.included.id}, basket.get_range_product_ids(self.range))
@@ -0,0 +1,149 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from oscar.apps.catalogue import models as catalogue_models
+from oscar.apps.offer import models
+from oscar.test.factories import create_product
+
+
+@override_settings(OSCAR_OFFERS_RANGE_MEMBERSHIP_ENABLED=True)
+class TestRangeMemberships(TestCase):
+    def setUp(self):
+        self.range = models.Range.objects.create(name="Range")
+        self.parent = create_product(structure="parent")
+        self.child = create_product(structure="child", parent=self.parent)
+        self.standalone = create_product()
+
+    def assertMembers(self, rng, products):
+        self.assertEqual(
+            {product.pk for product in products},
+            set(rng.product_memberships.values_list("product_id", flat=True)),
+        )
+        rng = models.Range.objects.get(pk=rng.pk)
+        self.assertEqual(set(products), set(rng.all_products()))
+
+    def test_included_products_are_members(self):
+        self.range.add_product(self.standalone)
+        self.assertMembers(self.range, [self.standalone])
+        self.assertTrue(self.range.contains_product(self.standalone))
+        self.assertFalse(self.range.contains_product(self.parent))
+
+    def test_children_of_included_parents_are_members(self):
+        self.range.add_product(self.parent)
+        self.assertMembers(self.range, [self.parent, self.child])
+        self.assertTrue(self.range.contains_product(self.child))
+
+    def test_products_added_through_the_relation_are_members(self):
+        self.range.included_products.add(self.standalone)
+        self.assertMembers(self.range, [self.standalone])
+        self.assertEqual(
+            {self.standalone.pk}, self.range.filter_products([self.standalone.pk])
+        )
+
+        self.range.included_products.set([self.parent])
+        self.assertMembers(self.range, [self.parent, self.child])
+
+        self.range.included_products.clear()
+        self.assertMembers(self.range, [])
+
+    def test_saving_a_product_only_updates_ranges_that_may_contain_it(self):
+        self.range.add_product(self.standalone)
+        other = models.Range.objects.create(name="Other")
+        other.add_product(self.parent)
+        self.assertEqual(
+            [self.range],
+            list(models.Range.objects.may_contain_products([self.standalone.pk])),
+        )
+        self.assertEqual(
+            [other], list(models.Range.objects.may_contain_products([self.child.pk]))
+        )
+        self.standalone.save()
+        self.assertMembers(self.range, [self.standalone])
+        self.assertMembers(other, [self.parent, self.child])
+
+    def test_removed_products_are_no_longer_members(self):
+        self.range.add_product(self.parent)
+        self.range.remove_product(self.child)
+        self.assertMembers(self.range, [self.parent])
+        self.assertFalse(self.range.contains_product(self.child))
+
+    def test_products_added_to_included_categories_become_members(self):
+        category = catalogue_models.Category.add_root(name="root")
+        subcategory = category.add_child(name="sub")
+        self.range.included_categories.add(category)
+        self.assertMembers(self.range, [])
+
+        self.parent.categories.add(subcategory)
+        self.assertMembers(self.range, [self.parent, self.child])
+
+        catalogue_models.ProductCategory.objects.create(
+            product=self.standalone, category=category
+        )
+        self.assertMembers(self.range, [self.parent, self.child, self.standalone])
+
+        self.parent.categories.remove(subcategory)
+        self.assertMembers(self.range, [self.standalone])
+
+    def test_includes_all_products_range(self):
+        self.range.includes_all_products = True
+        self.range.save()
+        self.assertMembers(self.range, [self.parent, self.child, self.standalone])
+
+        self.range.excluded_products.add(self.standalone)
+        self.assertMembers(self.range, [self.parent, self.child])
+
+        product = create_product()
+        self.assertTrue(self.range.contains_product(product))
+
+    def test_product_class_ranges(self):
+        self.range.classes.add(self.standalone.product_class)
+        self.assertTrue(self.range.contains_product(self.standalone))
+        self.assertIn(
+            self.range,
+            models.Range.objects.may_contain_products([create_product().pk]),
+        )
+        self.assertFalse(
+            self.range.contains_product(create_product(product_class="Other"))
+        )
+
+    def test_deleting_products(self):
+        self.range.add_product(self.standalone)
+        self.standalone.delete()
+        self.assertMembers(self.range, [])
+
+    def test_deleting_ranges(self):
+        self.range.add_product(self.standalone)
+        self.range.delete()
+        self.assertFalse(models.RangeProductMembership.objects.exists())
+
+    def test_num_products_reads_memberships(self):
+        self.range.add_product(self.parent)
+        self.assertEqual(2, self.range.num_products())
+        rng = models.Range.objects.with_num_memberships().get(pk=self.range.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(2, rng.num_products())
+
+    def test_contains_product_is_a_single_query(self):
+        self.range.add_product(self.parent)
+        rng = models.Range.objects.get(pk=self.range.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(rng.contains_product(self.child))
+
+    def test_filter_products_reads_memberships(self):
+        self.range.add_product(self.parent)
+        rng = models.Range.objects.get(pk=self.range.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                {self.parent.pk, self.child.pk},
+                rng.filter_products(
+                    [self.parent.pk, self.child.pk, self.standalone.pk]
+                ),
+            )
+
+    def test_management_command_rebuilds_memberships(self):
+        self.range.add_product(self.standalone)
+        models.RangeProductMembership.objects.all().delete()
+        call_command("oscar_update_range_memberships", stdout=io.StringIO())
+        self.assertMembers(self.range, [self.standalone])
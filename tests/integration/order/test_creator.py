@@ -14,6 +14,7 @@ from oscar.apps.catalogue.models import Product, ProductClass
 from oscar.apps.checkout import calculators
 from oscar.apps.offer.utils import Applicator
 from oscar.apps.offer import models
+from oscar.apps.order.exceptions import UnableToPlaceOrder
 from oscar.apps.order.models import Order
 from oscar.apps.order.utils import OrderCreator
 from oscar.apps.shipping.methods import FixedPrice, Free
@@ -178,6 +179,74 @@ class TestSuccessfulOrderCreation(TestCase):
             self.assertTrue(partner_name == line.partner_name == partner.name)
 
 
+class TestStockAllocation(TestCase):
+    def setUp(self):
+        self.creator = OrderCreator()
+        self.basket = factories.create_basket(empty=True)
+        self.surcharges = SurchargeApplicator().get_applicable_surcharges(self.basket)
+        self.products = [
+            factories.create_product(price=D("10.00"), num_in_stock=2)
+            for __ in range(2)
+        ]
+        for product in self.products:
+            self.basket.add_product(product, 2)
+
+    def place_order(self):
+        return place_order(
+            self.creator,
+            surcharges=self.surcharges,
+            basket=self.basket,
+            order_number="1234",
+        )
+
+    def get_num_allocated(self):
+        return [product.stockrecords.get().num_allocated for product in self.products]
+
+    def test_allocates_stock_of_all_lines(self):
+        self.place_order()
+        self.assertEqual([2, 2], self.get_num_allocated())
+
+    @override_settings(OSCAR_PREVENT_OVERSELLING=True)
+    def test_does_not_oversell(self):
+        # Another order has bought the last item in the meantime
+        self.products[1].stockrecords.get().allocate(1)
+        with self.assertRaises(UnableToPlaceOrder):
+            self.place_order()
+        self.assertFalse(Order.objects.filter(number="1234").exists())
+        self.assertEqual([None, 1], self.get_num_allocated())
+
+    def test_oversells_by_default(self):
+        self.products[1].stockrecords.get().allocate(1)
+        self.place_order()
+        self.assertEqual([2, 3], self.get_num_allocated())
+
+    @override_settings(
+        OSCAR_PREVENT_OVERSELLING=True, OSCAR_STOCK_RESERVATION_ENABLED=True
+    )
+    def test_allocates_stock_reserved_for_the_basket(self):
+        for line in self.basket.all_lines():
+            line.reserve_stock()
+        self.place_order()
+        self.assertEqual([2, 2], self.get_num_allocated())
+        self.assertEqual(
+            [0, 0],
+            [product.stockrecords.get().num_reserved for product in self.products],
+        )
+
+    def test_calls_an_overridden_update_stock_records_for_each_line(self):
+        updated = []
+
+        class LineByLineOrderCreator(OrderCreator):
+            def update_stock_records(self, line):
+                updated.append(line.product)
+                super().update_stock_records(line)
+
+        self.creator = LineByLineOrderCreator()
+        self.place_order()
+        self.assertEqual(self.products, updated)
+        self.assertEqual([2, 2], self.get_num_allocated())
+
+
 class TestPlacingOrderForDigitalGoods(TestCase):
     def setUp(self):
         self.creator = OrderCreator()
@@ -1,14 +1,19 @@
 import logging
 import os
+import tempfile
 from decimal import Decimal as D
+from unittest import mock
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
-from oscar.apps.catalogue.models import Product, ProductClass
+from oscar.apps.catalogue.models import Category, Product, ProductClass
 from oscar.apps.partner.exceptions import ImportingError
+from oscar.apps.basket.utils import BasketSummary
+from oscar.apps.partner.cache import PurchaseInfoCache
 from oscar.apps.partner.importers import CatalogueImporter
 from oscar.apps.partner.models import Partner
-from oscar.test.factories import create_product
+from oscar.test.factories import ProductFactory, create_basket, create_product
 from tests._site.apps.partner.models import StockRecord
 
 TEST_BOOKS_CSV = os.path.join(os.path.dirname(__file__), "fixtures/books-small.csv")
@@ -123,3 +128,86 @@ class ImportWithFlushTest(TestCase):
 
         with self.assertRaises(Product.DoesNotExist):
             Product.objects.get(upc=upc)
+
+
+class ChunkedImportTest(TestCase):
+    def setUp(self):
+        self.checkpoint_path = os.path.join(tempfile.mkdtemp(), "checkpoint")
+        self.importer = CatalogueImporter(
+            logger, chunk_size=3, checkpoint_path=self.checkpoint_path
+        )
+
+    def test_imports_all_chunks(self):
+        self.importer.handle(TEST_BOOKS_CSV)
+        self.assertEqual(10, Product.objects.count())
+        self.assertEqual(9, StockRecord.objects.count())
+        self.assertEqual(2, Category.objects.count())
+        fiction = Category.objects.get(name="Fiction")
+        self.assertEqual(10, fiction.product_set.count())
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+    def test_updates_existing_products_and_stockrecords(self):
+        self.importer.handle(TEST_BOOKS_CSV)
+        StockRecord.objects.update(price=D("1.00"), num_in_stock=0)
+        Product.objects.update(title="Old title")
+
+        self.importer.handle(TEST_BOOKS_CSV)
+        self.assertEqual(10, Product.objects.count())
+        product = Product.objects.get(upc="9780115531446")
+        self.assertEqual("Prepare for Your Practical Driving Test", product.title)
+        self.assertEqual(1, product.categories.count())
+        stockrecord = StockRecord.objects.get(partner_sku="9780115531446")
+        self.assertEqual(D("10.32"), stockrecord.price)
+        self.assertEqual(6, stockrecord.num_in_stock)
+
+    def test_resumes_interrupted_imports(self):
+        import_chunk = self.importer._import_chunk
+        calls = []
+
+        def interrupt_after_first_chunk(*args):
+            calls.append(args)
+            if len(calls) > 1:
+                raise ImportingError("Interrupted")
+            import_chunk(*args)
+
+        with mock.patch.object(
+            self.importer, "_import_chunk", side_effect=interrupt_after_first_chunk
+        ):
+            with self.assertRaises(ImportingError):
+                self.importer.handle(TEST_BOOKS_CSV)
+        self.assertEqual(3, Product.objects.count())
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            self.assertEqual("3", f.read())
+
+        self.importer.handle(TEST_BOOKS_CSV)
+        self.assertEqual(10, Product.objects.count())
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+
+class ImportedCachesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.importer = CatalogueImporter(logger)
+
+    @override_settings(OSCAR_PURCHASE_INFO_CACHE_ENABLED=True)
+    def test_invalidates_purchase_info_of_parents(self):
+        parent = ProductFactory(structure="parent", stockrecords=[])
+        child = ProductFactory(
+            parent=parent, structure="child", upc="9780115531446", stockrecords=[]
+        )
+        with mock.patch.object(PurchaseInfoCache, "invalidate_products") as invalidate:
+            self.importer.handle(TEST_BOOKS_CSV)
+        product_ids = set().union(*(c.args[0] for c in invalidate.call_args_list))
+        self.assertIn(child.pk, product_ids)
+        self.assertIn(parent.pk, product_ids)
+
+    @override_settings(OSCAR_BASKET_SUMMARY_CACHE_ENABLED=True)
+    def test_invalidates_summaries_of_baskets_with_imported_stockrecords(self):
+        self.importer.handle(TEST_BOOKS_CSV)
+        basket = create_basket(empty=True)
+        basket.add_product(Product.objects.get(upc="9780115531446"))
+        key = BasketSummary.get_key(basket.pk)
+        cache.set(key, {})
+        self.importer.handle(TEST_BOOKS_CSV)
+        self.assertIsNone(cache.get(key))
@@ -1,13 +1,23 @@
+from datetime import timedelta
 from decimal import Decimal as D
 
-from django.test import TestCase
+from django.db import connection
+from django.db.models.signals import post_save, pre_save
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
 
-from oscar.core.loading import get_model
+from oscar.apps.partner.exceptions import InsufficientStock
+from oscar.core.loading import get_class, get_model
 from oscar.test import factories
+from oscar.test.contextmanagers import mock_signal_receiver
 
 Partner = get_model("partner", "Partner")
 PartnerAddress = get_model("partner", "PartnerAddress")
 Country = get_model("address", "Country")
+StockRecord = get_model("partner", "StockRecord")
+StockReservation = get_model("partner", "StockReservation")
+Default = get_class("partner.strategy", "Default")
 
 
 class TestStockRecord(TestCase):
@@ -89,6 +99,163 @@ class TestStockRecord(TestCase):
         self.assertEqual(10, self.stockrecord.num_in_stock)
 
 
+class TestAllocatingStockInBulk(TestCase):
+    def setUp(self):
+        self.stockrecords = [
+            factories.create_stockrecord(price=D("10.00"), num_in_stock=5)
+            for __ in range(3)
+        ]
+
+    def test_allocates_all_stockrecords_in_one_update(self):
+        stockrecord = StockRecord.objects.get(pk=self.stockrecords[0].pk)
+        stockrecord.allocate(1)
+        allocations = [(record, 2) for record in self.stockrecords]
+        allocations.append((self.stockrecords[1], 1))
+        with CaptureQueriesContext(connection) as queries:
+            StockRecord.objects.allocate(allocations)
+        updates = [
+            query
+            for query in queries
+            if query["sql"].startswith('UPDATE "partner_stockrecord"')
+        ]
+        self.assertEqual(1, len(updates))
+        # The allocation made through another instance isn't lost
+        self.assertEqual(
+            [3, 3, 2], [record.num_allocated for record in self.stockrecords]
+        )
+
+    def test_does_not_allocate_more_than_is_in_stock(self):
+        self.stockrecords[1].allocate(4)
+        allocations = [(record, 2) for record in self.stockrecords]
+        with self.assertRaises(InsufficientStock) as cm:
+            StockRecord.objects.allocate(allocations, check_stock=True)
+        self.assertEqual([self.stockrecords[1]], cm.exception.stockrecords)
+        self.assertEqual(
+            [None, 4, None],
+            list(
+                StockRecord.objects.filter(
+                    pk__in=[record.pk for record in self.stockrecords]
+                )
+                .order_by("pk")
+                .values_list("num_allocated", flat=True)
+            ),
+        )
+
+    def test_sends_signals_only_when_stock_is_allocated(self):
+        self.stockrecords[1].allocate(4)
+        allocations = [(record, 2) for record in self.stockrecords]
+        with mock_signal_receiver(pre_save, sender=StockRecord) as pre_receiver:
+            with mock_signal_receiver(post_save, sender=StockRecord) as receiver:
+                with self.assertRaises(InsufficientStock):
+                    StockRecord.objects.allocate(allocations, check_stock=True)
+                self.assertFalse(pre_receiver.called)
+                self.assertFalse(receiver.called)
+                StockRecord.objects.allocate(allocations[:1], check_stock=True)
+        self.assertEqual(1, pre_receiver.call_count)
+        self.assertEqual(1, receiver.call_count)
+        self.assertEqual(2, receiver.call_args.kwargs["instance"].num_allocated)
+
+    def test_can_allocate_all_remaining_stock(self):
+        StockRecord.objects.allocate([(self.stockrecords[0], 5)], check_stock=True)
+        self.stockrecords[0].refresh_from_db()
+        self.assertEqual(0, self.stockrecords[0].net_stock_level)
+
+
+@override_settings(OSCAR_STOCK_RESERVATION_ENABLED=True)
+class TestStockReservation(TestCase):
+    def setUp(self):
+        self.product = factories.create_product(price=D("10.00"), num_in_stock=5)
+        self.stockrecord = self.product.stockrecords.get()
+        self.basket = factories.create_basket(empty=True)
+        self.basket.add_product(self.product, 3)
+        self.line = self.basket.all_lines()[0]
+
+    def get_num_reserved(self):
+        self.stockrecord.refresh_from_db()
+        return self.stockrecord.num_reserved
+
+    def test_reserves_stock_when_products_are_added_to_a_basket(self):
+        self.assertEqual(3, self.get_num_reserved())
+        self.assertEqual(2, self.stockrecord.net_stock_level)
+        reservation = self.line.stock_reservation
+        self.assertEqual(3, reservation.quantity)
+        self.assertFalse(reservation.is_expired)
+
+    def test_reserved_stock_is_not_available_to_other_baskets(self):
+        basket = factories.create_basket(empty=True)
+        basket.add_product(self.product, 3)
+        # Only the remaining stock could be reserved
+        self.assertEqual(3, self.get_num_reserved())
+        self.assertFalse(hasattr(basket.all_lines()[0], "stock_reservation"))
+        info = Default().fetch_for_product(self.product)
+        self.assertFalse(info.availability.is_purchase_permitted(3)[0])
+
+    def test_reserved_stock_is_available_to_its_basket(self):
+        self.basket.add_product(self.product, 2)
+        self.assertEqual(5, self.get_num_reserved())
+        line = self.basket.all_lines()[0]
+        self.assertTrue(line.purchase_info.availability.is_purchase_permitted(5)[0])
+        self.assertFalse(line.purchase_info.availability.is_purchase_permitted(6)[0])
+
+    def test_updates_reservation_when_quantity_changes(self):
+        self.line.quantity = 1
+        self.line.save()
+        self.assertEqual(1, self.get_num_reserved())
+        self.assertEqual(1, StockReservation.objects.get().quantity)
+
+    def test_releases_stock_when_lines_are_deleted(self):
+        self.line.delete()
+        self.assertEqual(0, self.get_num_reserved())
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_releases_stock_when_baskets_are_saved_for_later(self):
+        self.basket.status = self.basket.SAVED
+        self.basket.save()
+        self.line.save()
+        self.assertEqual(0, self.get_num_reserved())
+
+    def test_reserves_stock_of_products_added_in_bulk(self):
+        basket = factories.create_basket(empty=True)
+        basket.add_products([(self.product, 2, None)])
+        self.assertEqual(5, self.get_num_reserved())
+
+    def test_updates_reservations_of_lines_changed_in_bulk(self):
+        self.basket.add_products([(self.product, 1, None)])
+        self.assertEqual(4, self.get_num_reserved())
+        self.assertEqual(4, StockReservation.objects.get(line=self.line).quantity)
+
+    def test_releases_reservations_of_lines_removed_in_bulk(self):
+        self.basket.add_products([(self.product, -3, None)])
+        self.assertEqual(0, self.get_num_reserved())
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_updates_reservations_of_merged_lines(self):
+        basket = factories.create_basket(empty=True)
+        basket.add_product(self.product, 2)
+        self.basket.merge_many([basket])
+        self.assertEqual(5, self.get_num_reserved())
+        self.assertEqual(5, StockReservation.objects.get(line=self.line).quantity)
+
+    def test_keeps_reservations_of_moved_lines(self):
+        other_product = factories.create_product(price=D("5.00"), num_in_stock=5)
+        basket = factories.create_basket(empty=True)
+        basket.add_product(other_product, 2)
+        self.basket.merge_many([basket])
+        reservation = StockReservation.objects.get(stockrecord__product=other_product)
+        self.assertEqual(self.basket.id, reservation.line.basket_id)
+        self.assertEqual(2, reservation.quantity)
+
+    def test_does_not_allocate_reserved_stock(self):
+        with self.assertRaises(InsufficientStock):
+            StockRecord.objects.allocate([(self.stockrecord, 3)], check_stock=True)
+
+    def test_renews_reservations(self):
+        StockReservation.objects.update(date_expires=now() - timedelta(minutes=1))
+        self.assertTrue(StockReservation.objects.expired().exists())
+        self.line.save()
+        self.assertFalse(StockReservation.objects.expired().exists())
+
+
 class TestStockRecordNoStockTrack(TestCase):
     def setUp(self):
         self.product_class = factories.ProductClassFactory(
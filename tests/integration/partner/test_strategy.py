@@ -1,11 +1,15 @@
 from decimal import Decimal as D
+from unittest import mock
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
 from oscar.apps.basket.models import Line
 from oscar.apps.catalogue import models
 from oscar.apps.partner import strategy
+from oscar.apps.partner.cache import PurchaseInfoCache
 from oscar.test import factories
+from oscar.test.utils import RequestFactory
 
 
 class TestDefaultStrategy(TestCase):
@@ -134,3 +138,162 @@ class TestDeferredTax(TestCase):
         factories.StockRecordFactory(price=None, product=product)
         info = strategy.US().fetch_for_product(product)
         self.assertFalse(info.price.exists)
+
+
+class TestDefaultStrategyForManyProducts(TestCase):
+    def setUp(self):
+        self.strategy = strategy.Default()
+
+    def test_fetches_products_in_a_fixed_number_of_queries(self):
+        for __ in range(3):
+            factories.create_product(price=D("10.00"), num_in_stock=2)
+        factories.create_product()
+        products = list(models.Product.objects.all())
+
+        # Stockrecords and product classes
+        with self.assertNumQueries(2):
+            infos = self.strategy.fetch_for_products(products)
+        self.assertEqual({p.id for p in products}, set(infos))
+        for product in products:
+            self.assertEqual(
+                self.strategy.fetch_for_product(product).price.excl_tax,
+                infos[product.id].price.excl_tax,
+            )
+
+    def test_fetches_parents_in_a_fixed_number_of_queries(self):
+        for __ in range(3):
+            parent = factories.create_product(structure="parent")
+            factories.create_product(parent=parent, price=D("10.00"), num_in_stock=3)
+            factories.create_product(parent=parent)
+        parents = list(models.Product.objects.filter(structure="parent"))
+
+        # Product classes, children and their stockrecords
+        with self.assertNumQueries(3):
+            infos = self.strategy.fetch_for_parents(parents)
+        for parent in parents:
+            self.assertTrue(infos[parent.id].availability.is_available_to_buy)
+            self.assertEqual(D("10.00"), infos[parent.id].price.incl_tax)
+
+
+class TestPurchaseInfoMemo(TestCase):
+    def setUp(self):
+        self.strategy = RequestFactory().get("/").strategy
+        self.product = factories.create_product(price=D("10.00"), num_in_stock=5)
+
+    def test_purchase_info_is_memoised_for_a_request(self):
+        info = self.strategy.fetch_for_product(self.product)
+        with self.assertNumQueries(0):
+            self.assertIs(info, self.strategy.fetch_for_product(self.product))
+
+    def test_purchase_info_is_not_memoised_without_a_request(self):
+        offline_strategy = strategy.Default()
+        info = offline_strategy.fetch_for_product(self.product)
+        self.assertIsNot(info, offline_strategy.fetch_for_product(self.product))
+
+    def test_parent_purchase_info_is_memoised_separately(self):
+        parent = factories.create_product(structure="parent")
+        factories.create_product(parent=parent, price=D("10.00"), num_in_stock=3)
+        parent_info = self.strategy.fetch_for_parent(parent)
+        product_info = self.strategy.fetch_for_product(parent)
+        self.assertIsNot(parent_info, product_info)
+        self.assertIs(parent_info, self.strategy.fetch_for_parent(parent))
+        self.assertTrue(parent_info.availability.is_available_to_buy)
+        self.assertFalse(product_info.availability.is_available_to_buy)
+
+    def test_memo_is_invalidated_when_stock_is_allocated(self):
+        info = self.strategy.fetch_for_product(self.product)
+        self.assertTrue(info.availability.is_available_to_buy)
+        self.product.stockrecords.get().allocate(5)
+        product = models.Product.objects.get(pk=self.product.pk)
+        info = self.strategy.fetch_for_product(product)
+        self.assertFalse(info.availability.is_available_to_buy)
+
+
+@override_settings(OSCAR_PURCHASE_INFO_CACHE_ENABLED=True)
+class TestPurchaseInfoCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = factories.create_product(price=D("10.00"), num_in_stock=5)
+
+    def fetch(self, product, user=None):
+        product = models.Product.objects.get(pk=product.pk)
+        request = RequestFactory().get("/", user=user)
+        return request.strategy.fetch_for_product(product)
+
+    def fetch_for_parent(self, product):
+        product = models.Product.objects.get(pk=product.pk)
+        return RequestFactory().get("/").strategy.fetch_for_parent(product)
+
+    def test_purchase_info_is_shared_between_anonymous_requests(self):
+        info = self.fetch(self.product)
+        product = models.Product.objects.get(pk=self.product.pk)
+        with self.assertNumQueries(0):
+            cached_info = RequestFactory().get("/").strategy.fetch_for_product(product)
+        self.assertEqual(D("10.00"), cached_info.price.excl_tax)
+        self.assertEqual(info.stockrecord.pk, cached_info.stockrecord.pk)
+        self.assertEqual(info.availability.code, cached_info.availability.code)
+
+    def test_purchase_info_is_not_cached_for_authenticated_users(self):
+        user = factories.UserFactory()
+        self.fetch(self.product, user=user)
+        product = models.Product.objects.get(pk=self.product.pk)
+        with self.assertNumQueries(2):
+            RequestFactory().get("/", user=user).strategy.fetch_for_product(product)
+
+    def test_cache_is_invalidated_when_a_stockrecord_is_saved(self):
+        self.fetch(self.product)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.stockrecords.update(price=D("12.00"))
+            self.product.stockrecords.get().save()
+        self.assertEqual(D("12.00"), self.fetch(self.product).price.excl_tax)
+
+    def test_cache_of_parent_is_invalidated_when_a_child_stockrecord_is_saved(self):
+        parent = factories.create_product(structure="parent")
+        child = factories.create_product(
+            parent=parent, price=D("10.00"), num_in_stock=1
+        )
+        info = self.fetch_for_parent(parent)
+        self.assertTrue(info.availability.is_available_to_buy)
+        with self.captureOnCommitCallbacks(execute=True):
+            child.stockrecords.get().allocate(1)
+        info = self.fetch_for_parent(parent)
+        self.assertFalse(info.availability.is_available_to_buy)
+
+    def test_cache_is_invalidated_when_a_product_is_saved(self):
+        self.fetch(self.product)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.is_public = False
+            self.product.save()
+        product = models.Product.objects.get(pk=self.product.pk)
+        with self.assertNumQueries(2):
+            RequestFactory().get("/").strategy.fetch_for_product(product)
+
+    def test_cache_is_invalidated_when_a_product_class_is_saved(self):
+        self.product.stockrecords.update(num_in_stock=0)
+        self.assertFalse(self.fetch(self.product).availability.is_available_to_buy)
+        product_class = self.product.get_product_class()
+        with self.captureOnCommitCallbacks(execute=True):
+            product_class.track_stock = False
+            product_class.save()
+        self.assertTrue(self.fetch(self.product).availability.is_available_to_buy)
+
+    def test_parent_purchase_info_is_cached_separately(self):
+        parent = factories.create_product(structure="parent")
+        factories.create_product(parent=parent, price=D("10.00"), num_in_stock=1)
+        self.assertTrue(self.fetch_for_parent(parent).availability.is_available_to_buy)
+        self.assertFalse(self.fetch(parent).availability.is_available_to_buy)
+
+    def test_memoised_purchase_info_is_not_looked_up_in_the_cache(self):
+        strategy = RequestFactory().get("/").strategy
+        strategy.fetch_for_product(self.product)
+        with mock.patch.object(PurchaseInfoCache, "get_many") as get_many:
+            strategy.fetch_for_product(self.product)
+        self.assertFalse(get_many.called)
+
+    def test_cache_is_invalidated_when_offers_change(self):
+        self.fetch(self.product)
+        with self.captureOnCommitCallbacks(execute=True):
+            factories.ConditionalOfferFactory()
+        product = models.Product.objects.get(pk=self.product.pk)
+        with self.assertNumQueries(2):
+            RequestFactory().get("/").strategy.fetch_for_product(product)
@@ -0,0 +1,35 @@
+from decimal import Decimal as D
+
+from django.template import Context, Template
+from django.test import TestCase
+
+from oscar.apps.catalogue.models import Product
+from oscar.test import factories
+from oscar.test.utils import RequestFactory
+
+
+class TestPrefetchPurchaseInfo(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get("/")
+        parent = factories.create_product(structure="parent")
+        factories.create_product(parent=parent, price=D("5.00"), num_in_stock=1)
+        for __ in range(3):
+            factories.create_product(price=D("10.00"), num_in_stock=1)
+        self.products = list(Product.objects.browsable())
+
+    def render(self, template):
+        return Template("{% load purchase_info_tags %}" + template).render(
+            Context({"request": self.request, "products": self.products})
+        )
+
+    def test_products_are_not_queried_individually(self):
+        self.render("{% prefetch_purchase_info request products %}")
+        with self.assertNumQueries(0):
+            html = self.render(
+                "{% for product in products %}"
+                "{% purchase_info_for_product request product as session %}"
+                "{{ session.price.excl_tax }} "
+                "{% endfor %}"
+            )
+        self.assertEqual(3, html.count("10.00"))
+        self.assertEqual(1, html.count("5.00"))